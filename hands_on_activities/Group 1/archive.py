@@ -0,0 +1,372 @@
+#!/usr/bin/env python3
+"""
+Searchable archive of saved interviews.
+
+Interview JSON files in OUTPUT_DIRECTORY are ingested into a SQLite database:
+one row per session, one row per answer (category, language, confidence,
+adequacy, follow-up flag, concerns) and an FTS5 full-text index over the
+answer text, summaries and concerns. Ingestion is incremental: a file is only
+re-read when its size or modification time changed, so indexing a directory
+of thousands of sessions again takes milliseconds.
+
+Command line:
+
+    python archive.py ingest [DIRECTORY]
+    python archive.py query --category persecution --confidence-below 5 --language farsi
+    python archive.py query --text "police OR arrested" --concern documents
+    python archive.py stats
+
+API:
+
+    archive = InterviewArchive('./interviews/archive.sqlite3')
+    archive.ingest('./interviews')
+    rows = archive.query(category='persecution', confidence_below=5, language='farsi')
+"""
+
+import argparse
+import glob
+import json
+import os
+import re
+import sqlite3
+import time
+from typing import Dict, List, Optional
+
+from dotenv import load_dotenv
+
+from language_session import normalise_language
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS sessions (
+    id INTEGER PRIMARY KEY,
+    path TEXT UNIQUE NOT NULL,
+    size INTEGER NOT NULL,
+    mtime REAL NOT NULL,
+    session_key TEXT,
+    timestamp TEXT,
+    total_questions INTEGER,
+    answered_questions INTEGER,
+    detected_languages TEXT,
+    agent_version TEXT,
+    configuration TEXT,
+    summary_path TEXT
+);
+CREATE TABLE IF NOT EXISTS answers (
+    id INTEGER PRIMARY KEY,
+    session_id INTEGER NOT NULL REFERENCES sessions(id) ON DELETE CASCADE,
+    question_id TEXT NOT NULL,
+    question TEXT,
+    category TEXT,
+    language TEXT,
+    raw_response TEXT,
+    extracted_info TEXT,
+    summary TEXT,
+    confidence_level NUMERIC,
+    adequately_answered INTEGER,
+    follow_up_needed INTEGER,
+    concerns TEXT,
+    concern_count INTEGER,
+    follow_up_response TEXT,
+    attempt INTEGER,
+    timestamp TEXT
+);
+CREATE INDEX IF NOT EXISTS answers_session ON answers(session_id);
+CREATE INDEX IF NOT EXISTS answers_category ON answers(category, confidence_level);
+CREATE INDEX IF NOT EXISTS answers_language ON answers(language, category);
+CREATE INDEX IF NOT EXISTS sessions_timestamp ON sessions(timestamp);
+CREATE VIRTUAL TABLE IF NOT EXISTS answers_fts USING fts5(
+    raw_response, extracted_info, summary, concerns, follow_up_response,
+    content='answers', content_rowid='id'
+);
+CREATE TRIGGER IF NOT EXISTS answers_fts_insert AFTER INSERT ON answers BEGIN
+    INSERT INTO answers_fts(rowid, raw_response, extracted_info, summary, concerns, follow_up_response)
+    VALUES (new.id, new.raw_response, new.extracted_info, new.summary, new.concerns, new.follow_up_response);
+END;
+CREATE TRIGGER IF NOT EXISTS answers_fts_delete AFTER DELETE ON answers BEGIN
+    INSERT INTO answers_fts(answers_fts, rowid, raw_response, extracted_info, summary, concerns, follow_up_response)
+    VALUES ('delete', old.id, old.raw_response, old.extracted_info, old.summary, old.concerns, old.follow_up_response);
+END;
+"""
+
+
+def _as_text(value) -> str:
+    if value is None:
+        return ""
+    if isinstance(value, str):
+        return value
+    return json.dumps(value, ensure_ascii=False)
+
+
+class InterviewArchive:
+    """SQLite index over saved interview JSON files"""
+
+    def __init__(self, path: str):
+        self.path = path
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        self.conn = sqlite3.connect(path)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute("PRAGMA foreign_keys = ON")
+        self.conn.execute("PRAGMA journal_mode = WAL")
+        self.conn.executescript(SCHEMA)
+
+    def close(self):
+        self.conn.close()
+
+    def ingest(self, directory: str, file_prefix: str = 'asylum_interview_') -> Dict:
+        """
+        Index new and changed interview files in `directory` and drop sessions
+        whose file has gone. Returns counts of added, updated, unchanged,
+        removed and failed files.
+        """
+        counts = {"added": 0, "updated": 0, "unchanged": 0, "removed": 0, "failed": 0}
+        known = {row['path']: (row['id'], row['size'], row['mtime'])
+                 for row in self.conn.execute("SELECT id, path, size, mtime FROM sessions")}
+
+        paths = [
+            os.path.abspath(path)
+            for path in glob.glob(os.path.join(directory, f"{file_prefix}*.json"))
+            if not path.endswith('.trace.json') and '_summary_' not in os.path.basename(path)
+        ]
+        seen = set()
+        with self.conn:
+            for path in paths:
+                seen.add(path)
+                stat = os.stat(path)
+                previous = known.get(path)
+                if previous and previous[1] == stat.st_size and previous[2] == stat.st_mtime:
+                    counts["unchanged"] += 1
+                    continue
+                try:
+                    with open(path, 'r', encoding='utf-8') as f:
+                        document = json.load(f)
+                except (OSError, ValueError) as e:
+                    print(f"⚠️ Skipping {path}: {e}")
+                    counts["failed"] += 1
+                    continue
+                if previous:
+                    self.conn.execute("DELETE FROM sessions WHERE id = ?", (previous[0],))
+                self._insert_session(path, stat, document, file_prefix)
+                counts["updated" if previous else "added"] += 1
+
+            for path, (session_id, _, _) in known.items():
+                if path not in seen and os.path.dirname(path) == os.path.abspath(directory):
+                    self.conn.execute("DELETE FROM sessions WHERE id = ?", (session_id,))
+                    counts["removed"] += 1
+        return counts
+
+    def ingest_file(self, path: str, file_prefix: str = 'asylum_interview_'):
+        """Index (or re-index) a single interview file, e.g. one just saved"""
+        path = os.path.abspath(path)
+        with open(path, 'r', encoding='utf-8') as f:
+            document = json.load(f)
+        with self.conn:
+            self.conn.execute("DELETE FROM sessions WHERE path = ?", (path,))
+            self._insert_session(path, os.stat(path), document, file_prefix)
+
+    def _insert_session(self, path: str, stat, document: Dict, file_prefix: str):
+        metadata = document.get('interview_metadata', {})
+        session_key = os.path.splitext(os.path.basename(path))[0][len(file_prefix):]
+        summary_path = os.path.join(os.path.dirname(path), f"{file_prefix}summary_{session_key}.txt")
+
+        cursor = self.conn.execute(
+            "INSERT INTO sessions (path, size, mtime, session_key, timestamp, total_questions, "
+            "answered_questions, detected_languages, agent_version, configuration, summary_path) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (path, stat.st_size, stat.st_mtime, session_key, metadata.get('timestamp'),
+             metadata.get('total_questions'), metadata.get('answered_questions'),
+             json.dumps(metadata.get('detected_languages', []), ensure_ascii=False),
+             metadata.get('agent_version'), json.dumps(metadata.get('configuration', {})),
+             summary_path if os.path.exists(summary_path) else None)
+        )
+        session_id = cursor.lastrowid
+
+        rows = []
+        for question_id, entry in document.get('interview_data', {}).items():
+            processed_info = entry.get('processed_info') or {}
+            concerns = processed_info.get('concerns') or []
+            confidence = processed_info.get('confidence_level')
+            follow_up = entry.get('follow_up') or {}
+            rows.append((
+                session_id, question_id, entry.get('question'), entry.get('category'),
+                normalise_language(entry.get('language')), entry.get('raw_response'),
+                _as_text(processed_info.get('extracted_info')), _as_text(processed_info.get('summary')),
+                confidence if isinstance(confidence, (int, float)) else None,
+                processed_info.get('adequately_answered'), processed_info.get('follow_up_needed'),
+                "\n".join(_as_text(concern) for concern in concerns), len(concerns),
+                follow_up.get('response'), entry.get('attempt'), entry.get('timestamp')
+            ))
+        self.conn.executemany(
+            "INSERT INTO answers (session_id, question_id, question, category, language, raw_response, "
+            "extracted_info, summary, confidence_level, adequately_answered, follow_up_needed, "
+            "concerns, concern_count, follow_up_response, attempt, timestamp) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            rows
+        )
+
+    def query(self, category: Optional[str] = None, language: Optional[str] = None,
+              confidence_below: Optional[float] = None, confidence_at_least: Optional[float] = None,
+              text: Optional[str] = None, concern: Optional[str] = None,
+              adequately_answered: Optional[bool] = None, follow_up_needed: Optional[bool] = None,
+              since: Optional[str] = None, until: Optional[str] = None,
+              limit: Optional[int] = 100) -> List[Dict]:
+        """
+        Answers matching every given filter, newest session first.
+
+        `text` is an FTS5 query over response, extracted info, summary,
+        concerns and follow-up; `concern` matches the concerns alone.
+        `since` / `until` compare against the session timestamp (ISO format).
+        """
+        clauses, params = [], []
+        if category:
+            clauses.append("a.category = ?")
+            params.append(category)
+        if language:
+            clauses.append("a.language = ?")
+            params.append(normalise_language(language))
+        if confidence_below is not None:
+            clauses.append("a.confidence_level < ?")
+            params.append(confidence_below)
+        if confidence_at_least is not None:
+            clauses.append("a.confidence_level >= ?")
+            params.append(confidence_at_least)
+        if adequately_answered is not None:
+            clauses.append("a.adequately_answered = ?")
+            params.append(int(adequately_answered))
+        if follow_up_needed is not None:
+            clauses.append("a.follow_up_needed = ?")
+            params.append(int(follow_up_needed))
+        if since:
+            clauses.append("s.timestamp >= ?")
+            params.append(since)
+        if until:
+            clauses.append("s.timestamp < ?")
+            params.append(until)
+
+        match = []
+        if text:
+            match.append(f"({text})")
+        if concern:
+            match.append("concerns : " + " ".join(f'"{word}"' for word in re.findall(r"\w+", concern)))
+        if match:
+            clauses.append("a.id IN (SELECT rowid FROM answers_fts WHERE answers_fts MATCH ?)")
+            params.append(" AND ".join(match))
+
+        sql = ("SELECT a.*, s.path AS session_path, s.session_key, s.timestamp AS session_timestamp "
+               "FROM answers a JOIN sessions s ON s.id = a.session_id")
+        if clauses:
+            sql += " WHERE " + " AND ".join(clauses)
+        sql += " ORDER BY s.timestamp DESC, a.id"
+        if limit:
+            sql += f" LIMIT {int(limit)}"
+
+        results = []
+        for row in self.conn.execute(sql, params):
+            result = dict(row)
+            result['concerns'] = [line for line in result['concerns'].split("\n") if line]
+            for flag in ('adequately_answered', 'follow_up_needed'):
+                if result[flag] is not None:
+                    result[flag] = bool(result[flag])
+            results.append(result)
+        return results
+
+    def stats(self) -> Dict:
+        """Session and answer counts, answers per category and per language"""
+        scalar = lambda sql: self.conn.execute(sql).fetchone()[0]
+        return {
+            "sessions": scalar("SELECT COUNT(*) FROM sessions"),
+            "answers": scalar("SELECT COUNT(*) FROM answers"),
+            "by_category": dict(self.conn.execute(
+                "SELECT category, COUNT(*) FROM answers GROUP BY category ORDER BY 2 DESC").fetchall()),
+            "by_language": dict(self.conn.execute(
+                "SELECT COALESCE(language, 'unknown'), COUNT(*) FROM answers GROUP BY 1 ORDER BY 2 DESC").fetchall()),
+        }
+
+
+def archive_path(output_dir: str) -> str:
+    """ARCHIVE_PATH, or archive.sqlite3 in the output directory"""
+    return os.getenv('ARCHIVE_PATH') or os.path.join(output_dir, 'archive.sqlite3')
+
+
+def archive_from_env(output_dir: str) -> Optional[InterviewArchive]:
+    """InterviewArchive that saved interviews are added to (ARCHIVE_ENABLED), or None"""
+    if os.getenv('ARCHIVE_ENABLED', 'false').lower() != 'true':
+        return None
+    return InterviewArchive(archive_path(output_dir))
+
+
+def _print_answer(row: Dict):
+    confidence = row['confidence_level']
+    print(f"[{row['session_key']}] {row['question_id']} ({row['category']}, "
+          f"{row['language'] or 'unknown'}, confidence {confidence if confidence is not None else '-'})")
+    print(f"    {row['raw_response']}")
+    if row['concerns']:
+        print(f"    concerns: {'; '.join(row['concerns'])}")
+
+
+def main():
+    """Ingest interview files and query the archive from the command line"""
+    load_dotenv()
+    output_dir = os.getenv('OUTPUT_DIRECTORY', './interviews')
+
+    parser = argparse.ArgumentParser(description="Index and search saved asylum interviews")
+    parser.add_argument('--archive', default=archive_path(output_dir), help="SQLite archive file")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    ingest = commands.add_parser('ingest', help="Index new and changed interview files")
+    ingest.add_argument('directory', nargs='?', default=output_dir)
+
+    query = commands.add_parser('query', help="Find answers")
+    query.add_argument('--category')
+    query.add_argument('--language', help="Name or code, e.g. farsi or fa")
+    query.add_argument('--confidence-below', type=float)
+    query.add_argument('--confidence-at-least', type=float)
+    query.add_argument('--text', help="Full-text query (FTS5 syntax: AND, OR, NOT, \"phrases\", prefix*)")
+    query.add_argument('--concern', help="Words that must appear in the concerns")
+    query.add_argument('--inadequate', action='store_true', help="Only answers judged inadequate")
+    query.add_argument('--follow-up-needed', action='store_true')
+    query.add_argument('--since', help="Sessions on or after this ISO date")
+    query.add_argument('--until', help="Sessions before this ISO date")
+    query.add_argument('--limit', type=int, default=100)
+    query.add_argument('--json', action='store_true', help="Print results as JSON")
+
+    commands.add_parser('stats', help="Counts per category and language")
+    args = parser.parse_args()
+
+    archive = InterviewArchive(args.archive)
+    start = time.perf_counter()
+
+    if args.command == 'ingest':
+        counts = archive.ingest(args.directory, os.getenv('FILE_PREFIX', 'asylum_interview_'))
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        print(f"🗂️ {counts['added']} added, {counts['updated']} updated, {counts['unchanged']} unchanged, "
+              f"{counts['removed']} removed, {counts['failed']} failed ({elapsed_ms:.0f} ms)")
+
+    elif args.command == 'query':
+        rows = archive.query(
+            category=args.category, language=args.language,
+            confidence_below=args.confidence_below, confidence_at_least=args.confidence_at_least,
+            text=args.text, concern=args.concern,
+            adequately_answered=False if args.inadequate else None,
+            follow_up_needed=True if args.follow_up_needed else None,
+            since=args.since, until=args.until, limit=args.limit
+        )
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        if args.json:
+            print(json.dumps(rows, indent=2, ensure_ascii=False))
+        else:
+            for row in rows:
+                _print_answer(row)
+            print(f"🔎 {len(rows)} answers ({elapsed_ms:.1f} ms)")
+
+    else:
+        stats = archive.stats()
+        print(f"🗂️ {stats['sessions']} sessions, {stats['answers']} answers")
+        for category, count in stats['by_category'].items():
+            print(f"   {category:<22}{count:>7}")
+        print("   by language: " + ", ".join(f"{language} {count}" for language, count in stats['by_language'].items()))
+
+    archive.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,470 @@
+"""
+asyncio variant of the asylum interview agent.
+
+AsyncAsylumInterviewAgent keeps the question script, data layout and output
+files of AsylumInterviewAgent, but every blocking step is a coroutine: API
+calls go through the AsyncOpenAI client and device I/O (microphone reads,
+pyttsx3 playback) and file I/O (journal records, which are fsync'd,
+temporary recordings, the offline queue, the prompt cache, flow reloads) are
+moved off the event loop. One
+process and one event loop can then drive many kiosks at once, each agent
+instance holding the state of exactly one session. pyttsx3 has a single
+engine per process, so the speech of concurrent sessions takes turns.
+"""
+
+import asyncio
+import os
+from typing import Callable, Dict, List, Optional, Tuple
+
+from audio_capture import Audio, PCMSource, audio_bytes, buffer_capacity, open_audio
+from backends import (
+    ANALYSIS_SYSTEM_PROMPT,
+    LazyClient,
+    OpenAIChatAnalyser,
+    OpenAIWhisperTranscriber,
+    PyAudioInput,
+    Pyttsx3TTS,
+    SilentAudioInput,
+    SilentTTS,
+    build_analysis_prompt,
+    build_batch_analysis_prompt,
+    call_async,
+    create_local_backends,
+    error_processed_info,
+    persistent_audio_stream,
+    streamed_result,
+    whisper_result,
+)
+from http_pool import shared_pool
+from streaming_json import IncrementalJSONObject, extract_json
+from resilience import CallDeferred
+from voice_test import AsylumInterviewAgent, DeferredTranscript
+
+
+class AsyncOpenAIWhisperTranscriber(OpenAIWhisperTranscriber):
+    """Whisper transcription through an AsyncOpenAI client"""
+
+    async def atranscribe(self, audio: Audio, language: Optional[str] = None) -> Tuple[str, Optional[str]]:
+        text, detected_language, _ = await self.atranscribe_scored(audio, language=language)
+        return text, detected_language
+
+    async def atranscribe_scored(self, audio: Audio,
+                                 language: Optional[str] = None) -> Tuple[str, Optional[str], Optional[float]]:
+        with open_audio(audio) as audio_file:
+            transcript = await self.client.audio.transcriptions.create(
+                model=self.model,
+                file=audio_file,
+                response_format="verbose_json",
+                language=language
+            )
+        return whisper_result(transcript)
+
+
+class AsyncOpenAIChatAnalyser(OpenAIChatAnalyser):
+    """Response analysis through an AsyncOpenAI client"""
+
+    async def aanalyse(self, transcribed_text: str, question_data: Dict) -> Dict:
+        response = await self.client.chat.completions.create(
+            model=self.model,
+            messages=[
+                {"role": "system", "content": ANALYSIS_SYSTEM_PROMPT},
+                {"role": "user", "content": build_analysis_prompt(transcribed_text, question_data)}
+            ],
+            temperature=self.temperature
+        )
+        return extract_json(response.choices[0].message.content)
+
+    async def aanalyse_batch(self, answers: List[Tuple[str, Dict]]) -> Dict[str, Dict]:
+        response = await self.client.chat.completions.create(
+            model=self.model,
+            messages=[
+                {"role": "system", "content": ANALYSIS_SYSTEM_PROMPT},
+                {"role": "user", "content": build_batch_analysis_prompt(answers)}
+            ],
+            temperature=self.temperature
+        )
+
+        results = extract_json(response.choices[0].message.content)
+        for transcribed_text, question_data in answers:
+            if not isinstance(results.get(question_data['id']), dict):
+                results[question_data['id']] = await self.aanalyse(transcribed_text, question_data)
+        return results
+
+    async def aanalyse_stream(self, transcribed_text: str, question_data: Dict,
+                              on_field: Optional[Callable[[str, object], None]] = None) -> Dict:
+        stream = await self.client.chat.completions.create(
+            model=self.model,
+            messages=[
+                {"role": "system", "content": ANALYSIS_SYSTEM_PROMPT},
+                {"role": "user", "content": build_analysis_prompt(transcribed_text, question_data)}
+            ],
+            temperature=self.temperature,
+            stream=True
+        )
+
+        reply = IncrementalJSONObject()
+        async for chunk in stream:
+            if not chunk.choices or not chunk.choices[0].delta.content:
+                continue
+            for name, value in reply.feed(chunk.choices[0].delta.content).items():
+                if on_field:
+                    on_field(name, value)
+
+        return streamed_result(reply)
+
+
+def async_openai_client(api_key: Optional[str], max_retries: int = 0):
+    """An AsyncOpenAI client, like backends.openai_client() without SDK retries by default"""
+    pool = shared_pool()
+    if pool is not None:
+        return pool.async_openai_client(api_key, max_retries=max_retries)
+
+    from openai import AsyncOpenAI
+
+    return AsyncOpenAI(api_key=api_key, max_retries=max_retries)
+
+
+def create_async_openai_backends(api_key: Optional[str] = None, with_devices: bool = True,
+                                 client=None) -> Dict:
+    """
+    OpenAI backends sharing one AsyncOpenAI client.
+
+    Pass the same `client` to every session so they share its connection pool.
+    """
+    if client is None:
+        client = LazyClient(lambda: async_openai_client(api_key))
+        client.warm_in_background()
+    return {
+        "transcriber": AsyncOpenAIWhisperTranscriber(client),
+        "analyser": AsyncOpenAIChatAnalyser(client),
+        "tts": Pyttsx3TTS() if with_devices else SilentTTS(),
+        "audio_input": PyAudioInput(persistent_audio_stream()) if with_devices else SilentAudioInput(),
+    }
+
+
+class AsyncAsylumInterviewAgent(AsylumInterviewAgent):
+    """
+    Asylum interview agent whose interview loop runs as a coroutine.
+
+    Each instance is one session: interview_data, detected_languages and the
+    question cursor belong to it alone, while backends (and their API
+    clients) can be shared between sessions.
+    """
+
+    def _default_backends(self) -> Dict:
+        """Backends selected by INTERVIEW_BACKEND, with the AsyncOpenAI client"""
+        if self.backend_name == 'local':
+            return create_local_backends(os.getenv('LOCAL_AUDIO_DIR'), os.getenv('LOCAL_TRANSCRIPTS_FILE'))
+        return create_async_openai_backends(os.getenv('OPENAI_API_KEY'))
+
+    async def speak(self, text: str, priority: str = "normal"):
+        """Convert text to speech without blocking the event loop"""
+        print(f"🗣️ Agent: {text}")
+
+        text = self._spoken_text(text, priority)
+
+        try:
+            with self.tracer.span('speak', chars=len(text)) as span:
+                rendered = await asyncio.to_thread(self._prerendered_audio, text)
+                span['prerendered'] = rendered is not None
+                if rendered:
+                    try:
+                        await asyncio.to_thread(self.tts.play, rendered)
+                        return
+                    except Exception as e:
+                        print(f"⚠️ Pre-rendered playback failed, speaking live: {e}")
+                await call_async(self.tts, 'say', text)
+        except Exception as e:
+            print(f"❌ TTS Error: {e}")
+
+    async def record_audio(self, duration: Optional[int] = None,
+                           source: Optional[PCMSource] = None) -> Optional[Audio]:
+        """Record an answer; device reads run in a worker thread"""
+        if duration is None:
+            duration = self.record_duration
+
+        print(f"🎤 Recording for up to {duration} seconds... Speak now.")
+
+        with self.tracer.span('record_audio', max_seconds=duration) as span:
+            try:
+                owns_source = source is None
+                if owns_source:
+                    source = await asyncio.to_thread(
+                        self.audio_input.open_source, self.audio_rate, self.audio_channels, self.audio_chunk
+                    )
+
+                endpointer = self._new_endpointer(source)
+                speculation = self._new_speculation(source)
+                buffer = self.audio_buffers.acquire(
+                    buffer_capacity(source.rate, source.channels, self.audio_chunk, duration)
+                )
+                try:
+                    for _ in range(int(duration * source.rate / self.audio_chunk)):
+                        if source.realtime:
+                            data = await asyncio.to_thread(source.read, self.audio_chunk)
+                        else:
+                            data = source.read(self.audio_chunk)
+                        if not data:
+                            break
+                        if not buffer.append(data):
+                            break
+                        if speculation:
+                            speculation.feed(data)
+                        if endpointer and endpointer.feed(data):
+                            break
+                finally:
+                    if owns_source:
+                        await asyncio.to_thread(source.close)
+
+                clip = buffer.clip(source.rate, source.channels)
+                span['bytes'] = len(clip.wav)
+                span['audio_seconds'] = round(clip.duration, 3)
+                if not self._take_usable(clip, span):
+                    if speculation:
+                        speculation.cancel()
+                    return None
+                audio = await asyncio.to_thread(self._finish_recording, clip)
+                if speculation:
+                    self.speculations[audio] = speculation
+                return audio
+
+            except Exception as e:
+                print(f"❌ Recording error: {e}")
+                return None
+
+    async def transcribe_audio(self, audio: Audio) -> Tuple[Optional[str], Optional[str]]:
+        """Transcribe audio using the configured backend's coroutine when it has one"""
+        try:
+            with self.tracer.span('transcribe_audio') as span:
+                speculation = self.speculations.pop(audio, None)
+                result = await asyncio.to_thread(speculation.result) if speculation else None
+                if result:
+                    span['segments'] = speculation.segments
+                    text, detected_language = result
+                else:
+                    upload = audio
+                    if self.upload_encoder:
+                        upload = await asyncio.to_thread(self.upload_encoder.prepare, audio)
+                    span['bytes'] = len(audio_bytes(upload))
+                    text, detected_language = await self.resilience.acall(
+                        'transcribe', lambda: self._atranscribe_upload(upload))
+                span['language'] = detected_language
+
+            if detected_language and detected_language != 'unknown':
+                await asyncio.to_thread(self._note_language, detected_language)
+
+            return text, detected_language
+
+        except CallDeferred as deferred:
+            placeholder = await asyncio.to_thread(self._queue_offline, audio)
+            if deferred.pending is not None:
+                # The abandoned attempt may still be reading the recording
+                self._dispose_when_done(audio, deferred.pending)
+                audio = None
+            return placeholder, None
+        except Exception as e:
+            print(f"❌ Transcription error: {e}")
+            return None, None
+        finally:
+            if audio is not None:
+                await asyncio.to_thread(self._dispose_audio, audio)
+
+    def _dispose_when_done(self, audio: Audio, pending):
+        """Dispose of a recording in a worker thread once the abandoned task reading it has finished"""
+        loop = asyncio.get_running_loop()
+        pending.add_done_callback(lambda _: loop.run_in_executor(None, self._dispose_audio, audio))
+
+    async def _atranscribe_upload(self, upload: Audio) -> Tuple[str, Optional[str]]:
+        """One transcription call, with the session's language hint when hinting is on"""
+        if self.language_session:
+            return await self.language_session.atranscribe(self.transcriber, upload)
+        return await call_async(
+            self.transcriber, 'transcribe', upload,
+            language=self.default_language if self.default_language != 'auto' else None
+        )
+
+    async def process_response(self, transcribed_text: str, question_data: Dict) -> Dict:
+        """Process response using AI to extract structured information"""
+        if isinstance(transcribed_text, DeferredTranscript):
+            return self._deferred_transcription_info(transcribed_text)
+
+        processed_info = self._preclassify(transcribed_text, question_data)
+        if processed_info:
+            return processed_info
+
+        if self.analysis_mode in ('section', 'interview'):
+            return self._check_adequacy(transcribed_text, question_data)
+
+        try:
+            with self.tracer.span('process_response', chars=len(transcribed_text)) as span:
+                if self.analysis_mode == 'stream':
+                    processed_info = await self._process_streaming(transcribed_text, question_data)
+                    span['early'] = processed_info.get('analysis_pending', False)
+                else:
+                    processed_info = await self.resilience.acall(
+                        'analyse', lambda: call_async(self.analyser, 'analyse', transcribed_text, question_data))
+                span['adequate'] = bool(processed_info.get('adequately_answered'))
+                return processed_info
+        except CallDeferred as e:
+            return self._deferred_analysis(transcribed_text, question_data, e)
+        except Exception as e:
+            print(f"❌ Response processing error: {e}")
+            return error_processed_info(transcribed_text, e)
+
+    async def _process_streaming(self, transcribed_text: str, question_data: Dict) -> Dict:
+        """Stream the analysis and return as soon as the verdict fields are in"""
+        loop = asyncio.get_running_loop()
+        fields = {}
+        decided = asyncio.Event()
+
+        def on_field(name, value):
+            # May be called from a worker thread when the backend cannot stream natively
+            fields[name] = value
+            if self._stream_decided(fields):
+                loop.call_soon_threadsafe(decided.set)
+
+        task = asyncio.ensure_future(self.resilience.acall(
+            'analyse', lambda: call_async(self.analyser, 'analyse_stream', transcribed_text, question_data,
+                                          on_field=on_field)
+        ))
+        waiter = asyncio.ensure_future(decided.wait())
+        await asyncio.wait({task, waiter}, return_when=asyncio.FIRST_COMPLETED)
+        waiter.cancel()
+
+        if task.done():
+            return task.result()
+
+        processed_info = dict(fields, analysis_pending=True)
+        self.streams_pending.append(asyncio.ensure_future(
+            self._complete_stream_later(question_data['id'], processed_info, task)))
+        return processed_info
+
+    async def _complete_stream_later(self, question_id: str, processed_info: Dict, task: asyncio.Task):
+        """Wait for a streamed analysis, then store and journal it in a worker thread"""
+        await asyncio.wait({task})
+        await asyncio.to_thread(self._complete_stream, question_id, processed_info, task)
+
+    async def finish_streams(self):
+        """Wait for analyses that were still generating when the interview moved on"""
+        pending, self.streams_pending = self.streams_pending, []
+        if pending:
+            await asyncio.wait(pending)
+
+    async def conduct_interview(self) -> Dict:
+        """Main interview flow as a coroutine"""
+        print("\n🏛️ Asylum Interview Agent Starting...")
+        print("=" * 60)
+
+        await asyncio.to_thread(self.start_journal)
+
+        await self.speak(self.RESUME_MESSAGE if self.resumed else self.WELCOME_MESSAGE, priority="important")
+
+        i = self._open_question_from(self.flow.start)
+        while i is not None:
+            question_data = self.questions[i]
+            self.current_question_index = i
+            print(f"\n📋 Question {i+1}/{len(self.questions)} - Category: {question_data['category']}")
+            self._prefetch_next(i)
+
+            success = await self._ask_question_with_retry(question_data, i)
+
+            if not success and question_data['required']:
+                await self.speak(self.REQUIRED_QUESTION_MESSAGE)
+
+            await asyncio.to_thread(self._question_done, question_data)
+
+            if self.analysis_mode == 'section' and self._section_ends(i):
+                await self.analyse_batch()
+
+            # Reloading the flow file stats (and may recompile) it
+            i = await asyncio.to_thread(self._next_question, i)
+
+        await self.analyse_batch()
+        await self.finish_streams()
+
+        await self.speak(self.COMPLETION_MESSAGE, priority="important")
+
+        return self.interview_data
+
+    async def analyse_batch(self):
+        """Analyse the collected answers in one request and ask any follow-ups it calls for"""
+        answers = self._take_batch()
+        if not answers:
+            return
+
+        print(f"\n🔄 Analysing {len(answers)} answers together...")
+        try:
+            with self.tracer.span('analyse_batch', answers=len(answers)):
+                results = await self.resilience.acall(
+                    'analyse', lambda: call_async(self.analyser, 'analyse_batch', answers))
+        except Exception as e:
+            print(f"❌ Batch analysis error: {e}")
+            return
+
+        for question_data in await asyncio.to_thread(self._apply_batch, answers, results):
+            await self._ask_followup(question_data['follow_up'], question_data['id'])
+
+    async def _ask_question_with_retry(self, question_data: Dict, question_index: int) -> bool:
+        """Ask a question with retry logic and intelligent follow-up"""
+        question_id = question_data['id']
+        if question_data.get('follow_up'):
+            self.prerender(question_data['follow_up'])
+
+        for attempt in range(self.max_retries):
+            with self.tracer.context(question_id=question_id, attempt=attempt + 1):
+                print(f"\n🔄 Attempt {attempt + 1}/{self.max_retries}")
+
+                await self.speak(question_data['question'])
+
+                audio_file = await self.record_audio()
+                if not audio_file:
+                    await self.speak(self._retake_message())
+                    continue
+
+                print("🔄 Processing your response...")
+                transcribed_text, detected_language = await self.transcribe_audio(audio_file)
+
+                if not transcribed_text:
+                    await self.speak(self.NOT_UNDERSTOOD_MESSAGE)
+                    continue
+
+                print(f"📝 Transcribed: {transcribed_text}")
+
+                processed_info = await self.process_response(transcribed_text, question_data)
+                await asyncio.to_thread(self._store_response, question_data, transcribed_text,
+                                        detected_language, processed_info, attempt + 1)
+
+                if self._answer_settled(processed_info):
+                    print("✅ Response recorded successfully")
+
+                    if self._wants_follow_up(question_data):
+                        await self._ask_followup(question_data['follow_up'], question_id)
+
+                    return True
+                elif attempt < self.max_retries - 1:
+                    clarification = processed_info.get('suggested_follow_up',
+                                                       "Could you provide more details or rephrase your answer?")
+                    await self.speak(f"I need a bit more information. {clarification}")
+
+        print("⚠️ Maximum retries reached for this question")
+        return False
+
+    async def _ask_followup(self, follow_up_question: str, parent_question_id: str):
+        """Ask a follow-up question"""
+        print("\n🔍 Follow-up question:")
+        with self.tracer.context(question_id=parent_question_id, follow_up=True), \
+                self.tracer.span('follow_up'):
+            await self.speak(follow_up_question)
+
+            audio_file = await self.record_audio(duration=10)
+            if audio_file:
+                transcribed_text, detected_language = await self.transcribe_audio(audio_file)
+                if transcribed_text:
+                    await asyncio.to_thread(self._store_follow_up, parent_question_id, follow_up_question,
+                                            transcribed_text, detected_language)
+                    print(f"📝 Follow-up recorded: {transcribed_text}")
+
+
+async def run_sessions(agents: List[AsyncAsylumInterviewAgent]) -> List[Dict]:
+    """Run several interviews concurrently on the current event loop"""
+    return await asyncio.gather(*(agent.conduct_interview() for agent in agents))
@@ -0,0 +1,465 @@
+"""
+Audio capture helpers for the asylum interview agent.
+
+Provides interchangeable 16-bit PCM sources (microphone, WAV file, in-memory
+buffer), an energy-based voice activity detector that ends a recording once
+the speaker has gone quiet instead of always waiting the full duration, and
+preallocated in-memory WAV buffers so answers can reach the transcription
+backend without a temporary file.
+"""
+
+import array
+import io
+import math
+import struct
+import sys
+import threading
+import wave
+from typing import Iterator, List, Optional, Union
+
+SAMPLE_WIDTH = 2  # 16-bit PCM
+WAV_HEADER_SIZE = 44
+
+
+class PCMSource:
+    """Base class for anything that yields 16-bit PCM audio in chunks"""
+
+    # True when read() blocks on a real-time device rather than returning at once
+    realtime = False
+
+    def __init__(self, rate: int, channels: int = 1):
+        self.rate = rate
+        self.channels = channels
+
+    def read(self, frames: int) -> bytes:
+        """Return up to `frames` frames of PCM data, or b'' when exhausted"""
+        raise NotImplementedError
+
+    def close(self):
+        """Release any underlying resources"""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+class MicrophoneSource(PCMSource):
+    """Live microphone input through PyAudio"""
+
+    realtime = True
+
+    def __init__(self, rate: int, channels: int = 1, chunk: int = 1024):
+        super().__init__(rate, channels)
+        import pyaudio
+
+        self._audio = pyaudio.PyAudio()
+        if self._audio.get_device_count() == 0:
+            self._audio.terminate()
+            raise RuntimeError("No audio devices found")
+
+        self._stream = self._audio.open(
+            format=pyaudio.paInt16,
+            channels=channels,
+            rate=rate,
+            input=True,
+            frames_per_buffer=chunk
+        )
+
+    def read(self, frames: int) -> bytes:
+        return self._stream.read(frames, exception_on_overflow=False)
+
+    def close(self):
+        self._stream.stop_stream()
+        self._stream.close()
+        self._audio.terminate()
+
+
+class MicrophoneSession:
+    """
+    Long-lived PyAudio handle and input stream shared by every answer.
+
+    PortAudio is initialised and the device opened once; between answers the
+    stream is paused instead of closed, and resumed for the next recording.
+    Call close() (also safe after KeyboardInterrupt) to release the device.
+    """
+
+    def __init__(self):
+        self._audio = None
+        self._stream = None
+        self._format = None
+        self._lock = threading.Lock()
+
+    @property
+    def active(self) -> bool:
+        return self._stream is not None and self._stream.is_active()
+
+    def _open_stream(self, rate: int, channels: int, chunk: int):
+        import pyaudio
+
+        if self._audio is None:
+            audio = pyaudio.PyAudio()
+            if audio.get_device_count() == 0:
+                audio.terminate()
+                raise RuntimeError("No audio devices found")
+            self._audio = audio
+
+        if self._stream is not None and self._format != (rate, channels, chunk):
+            self._close_stream()
+
+        if self._stream is None:
+            self._stream = self._audio.open(
+                format=pyaudio.paInt16,
+                channels=channels,
+                rate=rate,
+                input=True,
+                frames_per_buffer=chunk,
+                start=False
+            )
+            self._format = (rate, channels, chunk)
+
+    def _close_stream(self):
+        stream, self._stream = self._stream, None
+        self._format = None
+        try:
+            if stream.is_active():
+                stream.stop_stream()
+        finally:
+            stream.close()
+
+    def open_source(self, rate: int, channels: int = 1, chunk: int = 1024) -> 'MicrophoneSessionSource':
+        """Resume capture and return a source whose close() pauses it again"""
+        with self._lock:
+            self._open_stream(rate, channels, chunk)
+            if not self._stream.is_active():
+                self._stream.start_stream()
+        return MicrophoneSessionSource(self, rate, channels)
+
+    def read(self, frames: int) -> bytes:
+        with self._lock:
+            if not self.active:
+                return b''
+            return self._stream.read(frames, exception_on_overflow=False)
+
+    def pause(self):
+        """Stop capturing between questions, keeping the device open"""
+        with self._lock:
+            if self.active:
+                self._stream.stop_stream()
+
+    def close(self):
+        """Close the stream and terminate PortAudio"""
+        with self._lock:
+            try:
+                if self._stream is not None:
+                    self._close_stream()
+            finally:
+                if self._audio is not None:
+                    audio, self._audio = self._audio, None
+                    audio.terminate()
+
+
+class MicrophoneSessionSource(PCMSource):
+    """One answer's view of a MicrophoneSession; closing it only pauses the stream"""
+
+    realtime = True
+
+    def __init__(self, session: MicrophoneSession, rate: int, channels: int = 1):
+        super().__init__(rate, channels)
+        self._session = session
+
+    def read(self, frames: int) -> bytes:
+        return self._session.read(frames)
+
+    def close(self):
+        self._session.pause()
+
+
+class WavFileSource(PCMSource):
+    """PCM read from a 16-bit WAV file, e.g. an archived answer"""
+
+    def __init__(self, path: str):
+        self._wav = wave.open(path, 'rb')
+        if self._wav.getsampwidth() != SAMPLE_WIDTH:
+            self._wav.close()
+            raise ValueError(f"Only 16-bit WAV files are supported: {path}")
+        super().__init__(self._wav.getframerate(), self._wav.getnchannels())
+
+    def read(self, frames: int) -> bytes:
+        return self._wav.readframes(frames)
+
+    def close(self):
+        self._wav.close()
+
+
+class BufferSource(PCMSource):
+    """PCM served from an in-memory bytes-like buffer"""
+
+    def __init__(self, pcm: bytes, rate: int, channels: int = 1):
+        super().__init__(rate, channels)
+        self._pcm = memoryview(bytes(pcm))
+        self._offset = 0
+
+    def read(self, frames: int) -> bytes:
+        size = frames * self.channels * SAMPLE_WIDTH
+        data = self._pcm[self._offset:self._offset + size]
+        self._offset += len(data)
+        return data.tobytes()
+
+
+def chunk_rms(data: bytes) -> float:
+    """Root-mean-square amplitude of a chunk of 16-bit PCM"""
+    samples = array.array('h')
+    samples.frombytes(data[:len(data) - len(data) % SAMPLE_WIDTH])
+    if not samples:
+        return 0.0
+    if sys.byteorder == 'big':
+        samples.byteswap()
+    return math.sqrt(sum(s * s for s in samples) / len(samples))
+
+
+class VoiceActivityDetector:
+    """
+    Energy-based endpointing.
+
+    A chunk counts as speech when its RMS exceeds both the fixed
+    `energy_threshold` and `noise_ratio` times the running noise floor,
+    which is learned from the non-speech chunks seen so far.
+    """
+
+    def __init__(self, energy_threshold: float = 500.0, noise_ratio: float = 2.0):
+        self.energy_threshold = energy_threshold
+        self.noise_ratio = noise_ratio
+        self.noise_floor = None
+
+    def is_speech(self, data: bytes) -> bool:
+        energy = chunk_rms(data)
+        threshold = self.energy_threshold
+        if self.noise_floor is not None:
+            threshold = max(threshold, self.noise_floor * self.noise_ratio)
+
+        speech = energy > threshold
+        if not speech:
+            # Exponential moving average of background noise
+            if self.noise_floor is None:
+                self.noise_floor = energy
+            else:
+                self.noise_floor = 0.9 * self.noise_floor + 0.1 * energy
+        return speech
+
+
+class SilenceEndpointer:
+    """
+    Decides, chunk by chunk, when an answer is over: after `silence_duration`
+    seconds of trailing silence following detected speech.
+    """
+
+    def __init__(self, rate: int, chunk: int, silence_duration: float = 1.5,
+                 detector: Optional[VoiceActivityDetector] = None):
+        self.detector = detector or VoiceActivityDetector()
+        self.silence_chunks = max(1, int(math.ceil(silence_duration * rate / chunk)))
+        self.heard_speech = False
+        self._trailing_silence = 0
+
+    def feed(self, data: bytes) -> bool:
+        """Process one chunk; return True once recording should stop"""
+        if self.detector.is_speech(data):
+            self.heard_speech = True
+            self._trailing_silence = 0
+        elif self.heard_speech:
+            self._trailing_silence += 1
+        return self._trailing_silence >= self.silence_chunks
+
+
+def iter_chunks(source: PCMSource, chunk: int, max_duration: float,
+                endpointer: Optional[SilenceEndpointer] = None) -> Iterator[bytes]:
+    """
+    Yield chunks from `source` for at most `max_duration` seconds, stopping
+    early when the source runs dry or the endpointer detects the end of speech.
+    """
+    for _ in range(int(max_duration * source.rate / chunk)):
+        try:
+            data = source.read(chunk)
+        except Exception as e:
+            print(f"⚠️ Audio read warning: {e}")
+            return
+        if not data:
+            return
+        yield data
+        if endpointer and endpointer.feed(data):
+            return
+
+
+def record_until_silence(source: PCMSource, chunk: int, max_duration: float,
+                         silence_duration: float = 1.5,
+                         energy_threshold: float = 500.0,
+                         detector: Optional[VoiceActivityDetector] = None) -> List[bytes]:
+    """
+    Read chunks from `source` until `silence_duration` seconds of trailing
+    silence follow detected speech, the source is exhausted, or
+    `max_duration` seconds have been captured.
+    """
+    endpointer = SilenceEndpointer(source.rate, chunk, silence_duration,
+                                   detector or VoiceActivityDetector(energy_threshold))
+    return list(iter_chunks(source, chunk, max_duration, endpointer))
+
+
+# ---------------------------------------------------------------------------
+# In-memory WAV buffers
+# ---------------------------------------------------------------------------
+
+def wav_header(data_size: int, rate: int, channels: int) -> bytes:
+    """44-byte RIFF/WAVE header for `data_size` bytes of 16-bit PCM"""
+    byte_rate = rate * channels * SAMPLE_WIDTH
+    return struct.pack(
+        '<4sI4s4sIHHIIHH4sI',
+        b'RIFF', 36 + data_size, b'WAVE',
+        b'fmt ', 16, 1, channels, rate, byte_rate, channels * SAMPLE_WIDTH, SAMPLE_WIDTH * 8,
+        b'data', data_size
+    )
+
+
+class _MemoryReader(io.RawIOBase):
+    """Seekable read-only file object over a memoryview, without copying it"""
+
+    def __init__(self, view: memoryview, name: str):
+        self._view = view
+        self._pos = 0
+        self.name = name
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def readinto(self, b) -> int:
+        size = min(len(b), len(self._view) - self._pos)
+        b[:size] = self._view[self._pos:self._pos + size]
+        self._pos += size
+        return size
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        base = {io.SEEK_SET: 0, io.SEEK_CUR: self._pos, io.SEEK_END: len(self._view)}[whence]
+        self._pos = max(0, base + offset)
+        return self._pos
+
+    def tell(self) -> int:
+        return self._pos
+
+
+class AudioClip:
+    """
+    A recorded answer held in memory as a complete WAV file.
+
+    `wav` is a view into a pooled buffer; call release() once the clip has
+    been transcribed so the buffer can be reused for the next answer.
+    """
+
+    def __init__(self, wav: memoryview, rate: int, channels: int, buffer: Optional['PCMBuffer'] = None):
+        self.wav = wav
+        self.rate = rate
+        self.channels = channels
+        self._buffer = buffer
+
+    @property
+    def data(self) -> memoryview:
+        return self.wav
+
+    @property
+    def pcm(self) -> memoryview:
+        return self.wav[WAV_HEADER_SIZE:]
+
+    @property
+    def duration(self) -> float:
+        return len(self.pcm) / (self.rate * self.channels * SAMPLE_WIDTH)
+
+    def open(self, name: str = 'answer.wav') -> io.BufferedReader:
+        return io.BufferedReader(_MemoryReader(self.wav, name))
+
+    def release(self):
+        if self._buffer is not None:
+            buffer, self._buffer = self._buffer, None
+            buffer.release()
+
+
+class PCMBuffer:
+    """
+    Preallocated recording buffer: a reserved WAV header followed by PCM.
+
+    Chunks are copied straight into place, and the header is filled in when
+    the clip is taken, so no list of frames or final join is needed.
+    """
+
+    def __init__(self, capacity: int, pool: Optional['PCMBufferPool'] = None):
+        self.capacity = capacity
+        self._data = bytearray(WAV_HEADER_SIZE + capacity)
+        self._view = memoryview(self._data)
+        self._pool = pool
+        self.length = 0
+
+    def reset(self):
+        self.length = 0
+
+    def append(self, data: bytes) -> bool:
+        """Copy a chunk into the buffer; return False when it is full"""
+        size = min(len(data), self.capacity - self.length)
+        start = WAV_HEADER_SIZE + self.length
+        self._view[start:start + size] = data[:size]
+        self.length += size
+        return size == len(data)
+
+    def clip(self, rate: int, channels: int) -> AudioClip:
+        self._view[:WAV_HEADER_SIZE] = wav_header(self.length, rate, channels)
+        return AudioClip(self._view[:WAV_HEADER_SIZE + self.length], rate, channels, self)
+
+    def release(self):
+        if self._pool is not None:
+            self._pool.put(self)
+
+
+class PCMBufferPool:
+    """Reuses recording buffers so each answer does not allocate a new one"""
+
+    def __init__(self):
+        self._free = []
+        self._lock = threading.Lock()
+
+    def acquire(self, capacity: int) -> PCMBuffer:
+        with self._lock:
+            for i, buffer in enumerate(self._free):
+                if buffer.capacity >= capacity:
+                    buffer = self._free.pop(i)
+                    buffer.reset()
+                    return buffer
+        return PCMBuffer(capacity, self)
+
+    def put(self, buffer: PCMBuffer):
+        with self._lock:
+            self._free.append(buffer)
+
+
+def buffer_capacity(rate: int, channels: int, chunk: int, duration: float) -> int:
+    """Bytes needed to hold `duration` seconds of chunked 16-bit PCM"""
+    return int(duration * rate / chunk) * chunk * channels * SAMPLE_WIDTH
+
+
+# A recorded answer: a WAV file path, or an in-memory object with `data` and
+# `open()` (AudioClip, or audio_encoding.EncodedAudio once prepared for upload)
+Audio = Union[str, AudioClip]
+
+
+def open_audio(audio: Audio) -> io.BufferedIOBase:
+    """Open a recorded answer as a binary file object"""
+    if isinstance(audio, str):
+        return open(audio, 'rb')
+    return audio.open()
+
+
+def audio_bytes(audio: Audio) -> Union[bytes, memoryview]:
+    """Raw encoded bytes of a recorded answer (a zero-copy view for clips)"""
+    if isinstance(audio, str):
+        with open(audio, 'rb') as f:
+            return f.read()
+    return audio.data
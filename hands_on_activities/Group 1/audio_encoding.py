@@ -0,0 +1,229 @@
+"""
+Pre-upload audio preparation for transcription requests.
+
+Answers are captured at AUDIO_RATE (44.1 kHz by default), far more than speech
+recognition needs. UploadEncoder mixes a recording down to mono, resamples it
+to 16 kHz, optionally trims leading/trailing silence and encodes it as FLAC
+(via soundfile) or Opus (via ffmpeg) when either is available, falling back to
+a compact 16 kHz WAV otherwise.
+"""
+
+import array
+import importlib
+import io
+import os
+import shutil
+import subprocess
+import sys
+import time
+import wave
+from typing import Dict, List, Optional, Tuple
+
+from audio_capture import SAMPLE_WIDTH, WAV_HEADER_SIZE, Audio, AudioClip, chunk_rms, wav_header
+
+_optional_modules = {}
+
+
+def optional_module(name: str):
+    """
+    Import an optional accelerator (numpy, soundfile) on first use rather than
+    at import time; None when it is not installed
+    """
+    if name not in _optional_modules:
+        try:
+            _optional_modules[name] = importlib.import_module(name)
+        except ImportError:
+            _optional_modules[name] = None
+    return _optional_modules[name]
+
+
+class EncodedAudio:
+    """An answer re-encoded for upload, carrying the file name the API should see"""
+
+    def __init__(self, data: bytes, filename: str, duration: float):
+        self.data = data
+        self.filename = filename
+        self.duration = duration
+
+    def open(self) -> io.BytesIO:
+        f = io.BytesIO(self.data)
+        f.name = self.filename
+        return f
+
+
+def read_pcm(audio: Audio):
+    """Return (pcm bytes, rate, channels) for a WAV path or AudioClip"""
+    if isinstance(audio, AudioClip):
+        return audio.pcm, audio.rate, audio.channels
+    with wave.open(audio, 'rb') as wf:
+        return wf.readframes(wf.getnframes()), wf.getframerate(), wf.getnchannels()
+
+
+def _samples(pcm) -> array.array:
+    samples = array.array('h')
+    samples.frombytes(bytes(pcm[:len(pcm) - len(pcm) % SAMPLE_WIDTH]))
+    if sys.byteorder == 'big':
+        samples.byteswap()
+    return samples
+
+
+def _to_bytes(samples: array.array) -> bytes:
+    if sys.byteorder == 'big':
+        samples = array.array('h', samples)
+        samples.byteswap()
+    return samples.tobytes()
+
+
+def to_mono(pcm, channels: int) -> bytes:
+    """Average interleaved channels into a single channel"""
+    if channels == 1:
+        return bytes(pcm)
+    np = optional_module('numpy')
+    if np is not None:
+        frames = np.frombuffer(pcm, dtype='<i2')[:len(pcm) // (SAMPLE_WIDTH * channels) * channels]
+        return frames.reshape(-1, channels).mean(axis=1).astype('<i2').tobytes()
+
+    samples = _samples(pcm)
+    mono = array.array('h', (
+        int(sum(samples[i:i + channels]) / channels)
+        for i in range(0, len(samples) - channels + 1, channels)
+    ))
+    return _to_bytes(mono)
+
+
+def resample(pcm: bytes, rate: int, target_rate: int) -> bytes:
+    """Linear-interpolation resampling of mono 16-bit PCM"""
+    if rate == target_rate or not pcm:
+        return pcm
+
+    np = optional_module('numpy')
+    if np is not None:
+        samples = np.frombuffer(pcm, dtype='<i2').astype(np.float32)
+        count = int(len(samples) * target_rate / rate)
+        positions = np.arange(count) * (rate / target_rate)
+        return np.interp(positions, np.arange(len(samples)), samples).astype('<i2').tobytes()
+
+    samples = _samples(pcm)
+    count = int(len(samples) * target_rate / rate)
+    step = rate / target_rate
+    last = len(samples) - 1
+    out = array.array('h', bytes(count * SAMPLE_WIDTH))
+    for i in range(count):
+        position = i * step
+        index = int(position)
+        fraction = position - index
+        following = samples[index + 1] if index < last else samples[index]
+        out[i] = int(samples[index] + (following - samples[index]) * fraction)
+    return _to_bytes(out)
+
+
+def trim_silence(pcm: bytes, rate: int, threshold: float = 500.0, padding: float = 0.2) -> bytes:
+    """Drop leading and trailing stretches quieter than `threshold` RMS, keeping some padding"""
+    window = int(rate * 0.02) * SAMPLE_WIDTH  # 20 ms
+    loud = [i for i in range(0, len(pcm), window) if chunk_rms(pcm[i:i + window]) > threshold]
+    if not loud:
+        return pcm
+
+    pad = int(rate * padding) * SAMPLE_WIDTH
+    start = max(0, loud[0] - pad)
+    end = min(len(pcm), loud[-1] + window + pad)
+    return pcm[start:end]
+
+
+def _encode_flac(pcm: bytes, rate: int) -> bytes:
+    buffer = io.BytesIO()
+    np = optional_module('numpy')
+    data = np.frombuffer(pcm, dtype='<i2') if np is not None else _samples(pcm)
+    optional_module('soundfile').write(buffer, data, rate, format='FLAC', subtype='PCM_16')
+    return buffer.getvalue()
+
+
+def _encode_ffmpeg(pcm: bytes, rate: int, codec_args: List[str], container: str) -> bytes:
+    result = subprocess.run(
+        ['ffmpeg', '-loglevel', 'error', '-f', 's16le', '-ar', str(rate), '-ac', '1', '-i', 'pipe:0',
+         *codec_args, '-f', container, 'pipe:1'],
+        input=pcm, stdout=subprocess.PIPE, stderr=subprocess.PIPE, check=True
+    )
+    return result.stdout
+
+
+class UploadEncoder:
+    """Shrinks recorded answers before they are sent for transcription"""
+
+    def __init__(self, target_rate: int = 16000, format: str = 'flac', trim: bool = True,
+                 trim_threshold: float = 500.0, opus_bitrate: str = '24k'):
+        self.target_rate = target_rate
+        self.format = self._available_format(format.lower())
+        self.trim = trim
+        self.trim_threshold = trim_threshold
+        self.opus_bitrate = opus_bitrate
+        self.history = []
+
+    @staticmethod
+    def _available_format(requested: str) -> str:
+        if requested == 'flac' and optional_module('soundfile') is None and shutil.which('ffmpeg') is None:
+            print("⚠️ FLAC encoding needs soundfile or ffmpeg; uploading 16 kHz WAV instead")
+            return 'wav'
+        if requested == 'opus' and shutil.which('ffmpeg') is None:
+            print("⚠️ Opus encoding needs ffmpeg; uploading 16 kHz WAV instead")
+            return 'wav'
+        return requested
+
+    def _encode(self, pcm: bytes) -> Tuple[bytes, str]:
+        if self.format == 'flac':
+            if optional_module('soundfile') is not None:
+                return _encode_flac(pcm, self.target_rate), 'answer.flac'
+            return _encode_ffmpeg(pcm, self.target_rate, ['-c:a', 'flac'], 'flac'), 'answer.flac'
+        if self.format == 'opus':
+            return _encode_ffmpeg(pcm, self.target_rate,
+                                  ['-c:a', 'libopus', '-b:a', self.opus_bitrate, '-application', 'voip'],
+                                  'ogg'), 'answer.ogg'
+        return wav_header(len(pcm), self.target_rate, 1) + pcm, 'answer.wav'
+
+    def prepare(self, audio: Audio) -> EncodedAudio:
+        """Downmix, resample, trim and encode one recorded answer"""
+        start = time.perf_counter()
+        pcm, rate, channels = read_pcm(audio)
+        original_bytes = len(pcm) + WAV_HEADER_SIZE
+
+        pcm = resample(to_mono(pcm, channels), rate, self.target_rate)
+        if self.trim:
+            pcm = trim_silence(pcm, self.target_rate, self.trim_threshold)
+        data, filename = self._encode(pcm)
+
+        stats = {
+            "original_bytes": original_bytes,
+            "upload_bytes": len(data),
+            "bytes_saved": original_bytes - len(data),
+            "encode_ms": (time.perf_counter() - start) * 1000,
+            "format": self.format,
+        }
+        self.history.append(stats)
+        print(f"📦 Upload: {original_bytes / 1024:.0f} KB → {len(data) / 1024:.0f} KB "
+              f"({stats['bytes_saved'] / original_bytes:.0%} saved, {self.format}) "
+              f"in {stats['encode_ms']:.0f} ms")
+
+        return EncodedAudio(data, filename, len(pcm) / (self.target_rate * SAMPLE_WIDTH))
+
+    def summary(self) -> Dict:
+        original = sum(s['original_bytes'] for s in self.history)
+        uploaded = sum(s['upload_bytes'] for s in self.history)
+        return {
+            "answers": len(self.history),
+            "original_bytes": original,
+            "upload_bytes": uploaded,
+            "bytes_saved": original - uploaded,
+            "encode_ms_total": sum(s['encode_ms'] for s in self.history),
+        }
+
+
+def upload_encoder_from_env() -> Optional[UploadEncoder]:
+    """UploadEncoder described by the UPLOAD_* settings, or None when disabled"""
+    if os.getenv('UPLOAD_PREPROCESS', 'false').lower() != 'true':
+        return None
+    return UploadEncoder(
+        target_rate=int(os.getenv('UPLOAD_SAMPLE_RATE', 16000)),
+        format=os.getenv('UPLOAD_FORMAT', 'flac'),
+        trim=os.getenv('UPLOAD_TRIM_SILENCE', 'true').lower() == 'true',
+        trim_threshold=float(os.getenv('VAD_ENERGY_THRESHOLD', 500))
+    )
@@ -0,0 +1,186 @@
+"""
+Local quality check of a recorded answer before it is uploaded.
+
+A silent, clipped or noise-drowned take used to be found out only after a
+full Whisper round-trip came back empty. QualityGate measures the take's
+PCM as soon as recording ends, in one vectorised NumPy pass over the int16
+buffer (pure Python when NumPy is not installed):
+
+    rms, peak        overall level, in sample units (full scale = 32767)
+    clipping_ratio   share of samples at full scale
+    speech_ratio     share of 20 ms frames louder than the speech threshold
+                     (VAD_ENERGY_THRESHOLD, or twice the noise floor)
+    noise_floor      RMS of the 10th percentile frame
+    snr_db           speech level over the noise floor
+
+A take with less than AUDIO_QUALITY_MIN_SPEECH_SECONDS of speech (silent, or
+noisy when the noise floor alone is above the speech threshold), more than
+AUDIO_QUALITY_MAX_CLIPPING clipped samples or an SNR below
+AUDIO_QUALITY_MIN_SNR_DB is rejected: the applicant is told what went wrong
+right away and the take is not sent to the API. In speculative mode each
+segment must pass the same check before it is uploaded; a failing segment
+stops the speculation, and so does a rejected take, dropping any segments
+not yet sent. The metrics of each kept take are stored with its answer in
+interview_data.
+"""
+
+import array
+import math
+import os
+import sys
+import time
+from typing import Dict, List, Optional
+
+from audio_capture import SAMPLE_WIDTH
+from audio_encoding import optional_module
+
+FRAME_SECONDS = 0.02
+# Samples this close to full scale count as clipped
+CLIP_LEVEL = 32700
+
+FEEDBACK = {
+    "silent": "I couldn't hear anything. Please speak a little louder, or move closer to the microphone.",
+    "clipped": "Your answer was too loud to understand. Please move a little further from the microphone.",
+    "noisy": "There was too much background noise. Please try to find a quieter spot and answer again.",
+}
+
+
+def _frame_levels(pcm, rate: int, channels: int):
+    """(rms, peak, clipped samples, per-frame RMS list) of 16-bit PCM"""
+    frame = max(1, int(rate * FRAME_SECONDS)) * channels
+    np = optional_module('numpy')
+    if np is not None:
+        samples = np.frombuffer(pcm, dtype='<i2', count=len(pcm) // SAMPLE_WIDTH).astype(np.int32)
+        if not len(samples):
+            return 0.0, 0, 0, []
+        squares = np.square(samples, dtype=np.float64)
+        magnitudes = np.abs(samples)
+        whole = len(samples) // frame * frame
+        frames = np.sqrt(squares[:whole].reshape(-1, frame).mean(axis=1)) if whole else squares[:0]
+        return (float(math.sqrt(squares.mean())), int(magnitudes.max()),
+                int(np.count_nonzero(magnitudes >= CLIP_LEVEL)), frames.tolist())
+
+    samples = array.array('h')
+    samples.frombytes(bytes(pcm[:len(pcm) - len(pcm) % SAMPLE_WIDTH]))
+    if not samples:
+        return 0.0, 0, 0, []
+    if sys.byteorder == 'big':
+        samples.byteswap()
+    total = 0
+    peak = 0
+    clipped = 0
+    frames = []
+    frame_total = 0
+    for i, sample in enumerate(samples, 1):
+        square = sample * sample
+        total += square
+        frame_total += square
+        magnitude = abs(sample)
+        if magnitude > peak:
+            peak = magnitude
+        if magnitude >= CLIP_LEVEL:
+            clipped += 1
+        if i % frame == 0:
+            frames.append(math.sqrt(frame_total / frame))
+            frame_total = 0
+    return math.sqrt(total / len(samples)), peak, clipped, frames
+
+
+def _percentile(values: List[float], fraction: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+def measure(pcm, rate: int, channels: int = 1, energy_threshold: float = 500.0,
+            noise_ratio: float = 2.0) -> Dict:
+    """Level, clipping, speech and SNR metrics of a take of 16-bit PCM"""
+    rms, peak, clipped, frames = _frame_levels(pcm, rate, channels)
+    sample_count = len(pcm) // SAMPLE_WIDTH
+    metrics = {
+        "duration": round(sample_count / (rate * channels), 3) if rate else 0.0,
+        "rms": round(rms, 1),
+        "peak": peak,
+        "clipping_ratio": round(clipped / sample_count, 5) if sample_count else 0.0,
+        "speech_ratio": 0.0,
+        "speech_seconds": 0.0,
+        "noise_floor": 0.0,
+        "snr_db": None,
+    }
+    if not frames:
+        return metrics
+
+    noise_floor = _percentile(frames, 0.1)
+    threshold = max(energy_threshold, noise_floor * noise_ratio)
+    metrics["noise_floor"] = round(noise_floor, 1)
+    speech = [level for level in frames if level > threshold]
+    metrics["speech_ratio"] = round(len(speech) / len(frames), 3)
+    metrics["speech_seconds"] = round(len(speech) * FRAME_SECONDS, 2)
+    if speech:
+        speech_level = math.sqrt(sum(level * level for level in speech) / len(speech))
+        metrics["snr_db"] = round(20 * math.log10(speech_level / max(noise_floor, 1.0)), 1)
+    return metrics
+
+
+class QualityGate:
+    """Decides whether a recorded take is worth uploading, and keeps count"""
+
+    def __init__(self, min_speech_seconds: float = 0.2, max_clipping: float = 0.02,
+                 min_snr_db: float = 10.0, energy_threshold: float = 500.0):
+        self.min_speech_seconds = min_speech_seconds
+        self.max_clipping = max_clipping
+        self.min_snr_db = min_snr_db
+        self.energy_threshold = energy_threshold
+        self.checked = 0
+        self.rejected = {problem: 0 for problem in FEEDBACK}
+        self.check_seconds = 0.0
+
+    def problem(self, metrics: Dict) -> Optional[str]:
+        """What makes the take unusable, or None"""
+        if metrics['speech_seconds'] < self.min_speech_seconds:
+            return 'noisy' if metrics['noise_floor'] > self.energy_threshold else 'silent'
+        if metrics['clipping_ratio'] > self.max_clipping:
+            return 'clipped'
+        if metrics['snr_db'] is not None and metrics['snr_db'] < self.min_snr_db:
+            return 'noisy'
+        return None
+
+    def check(self, pcm, rate: int, channels: int = 1) -> Dict:
+        """Metrics of a take, with "usable" and "problem" added"""
+        start = time.perf_counter()
+        metrics = measure(pcm, rate, channels, energy_threshold=self.energy_threshold)
+        problem = self.problem(metrics)
+        self.check_seconds += time.perf_counter() - start
+        self.checked += 1
+        if problem:
+            self.rejected[problem] += 1
+        return dict(metrics, usable=problem is None, problem=problem)
+
+    def passes(self, pcm, rate: int, channels: int = 1) -> bool:
+        """Whether a piece of a take (a speculative segment) is usable; not counted in stats()"""
+        return self.problem(measure(pcm, rate, channels, energy_threshold=self.energy_threshold)) is None
+
+    @staticmethod
+    def feedback(problem: str) -> str:
+        """What to tell the applicant about a rejected take"""
+        return FEEDBACK[problem]
+
+    def stats(self) -> Dict:
+        return {
+            "checked": self.checked,
+            "rejected": sum(self.rejected.values()),
+            "by_problem": dict(self.rejected),
+            "check_ms_avg": self.check_seconds * 1000 / self.checked if self.checked else 0.0,
+            "numpy": optional_module('numpy') is not None,
+        }
+
+
+def quality_gate_from_env() -> Optional[QualityGate]:
+    """QualityGate configured from AUDIO_QUALITY_*, or None when AUDIO_QUALITY_CHECK is off"""
+    if os.getenv('AUDIO_QUALITY_CHECK', 'false').lower() != 'true':
+        return None
+    return QualityGate(
+        min_speech_seconds=float(os.getenv('AUDIO_QUALITY_MIN_SPEECH_SECONDS', 0.2)),
+        max_clipping=float(os.getenv('AUDIO_QUALITY_MAX_CLIPPING', 0.02)),
+        min_snr_db=float(os.getenv('AUDIO_QUALITY_MIN_SNR_DB', 10)),
+        energy_threshold=float(os.getenv('VAD_ENERGY_THRESHOLD', 500))
+    )
@@ -0,0 +1,757 @@
+"""
+Pluggable speech and language backends for the asylum interview agent.
+
+The agent talks to four small interfaces: transcription, response analysis,
+text-to-speech and audio input. The default implementations use OpenAI,
+pyttsx3 and PyAudio; the local implementations are deterministic and need
+no API key, microphone or speaker, so a full interview can run headless.
+"""
+
+import asyncio
+import json
+import math
+import os
+import tempfile
+import threading
+import wave
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, Dict, List, Optional, Tuple
+
+from audio_capture import Audio, BufferSource, MicrophoneSession, MicrophoneSource, PCMSource, WavFileSource, SAMPLE_WIDTH, open_audio
+from http_pool import shared_pool
+from streaming_json import IncrementalJSONObject, extract_json
+
+ANALYSIS_SYSTEM_PROMPT = (
+    "You are an expert legal assistant specializing in asylum cases. "
+    "Analyze responses carefully for completeness and credibility."
+)
+
+
+def build_analysis_prompt(transcribed_text: str, question_data: Dict) -> str:
+    """Build the per-answer analysis prompt sent to the language model"""
+    return f"""
+        You are an AI assistant helping to process asylum interview responses.
+
+        Question Category: {question_data['category']}
+        Question Asked: "{question_data['question']}"
+        User Response: "{transcribed_text}"
+
+        Please analyze this response and provide:
+        1. Key information extracted
+        2. Whether the response adequately answers the question
+        3. Any red flags or concerns
+        4. Suggested follow-up questions if needed
+        5. Confidence level (1-10) in the response quality
+
+        Format your response as JSON with the following structure:
+        {{
+            "extracted_info": "main information from the response",
+            "adequately_answered": true/false,
+            "concerns": ["list of any concerns"],
+            "follow_up_needed": true/false,
+            "suggested_follow_up": "specific follow-up question if needed",
+            "confidence_level": 1-10,
+            "summary": "brief summary for case file"
+        }}
+        """
+
+
+def build_batch_analysis_prompt(answers: List[Tuple[str, Dict]]) -> str:
+    """Build one analysis prompt covering several (transcribed_text, question_data) answers"""
+    responses = "\n".join(
+        f"""        [{question_data['id']}]
+        Question Category: {question_data['category']}
+        Question Asked: "{question_data['question']}"
+        User Response: "{transcribed_text}"
+"""
+        for transcribed_text, question_data in answers
+    )
+    return f"""
+        You are an AI assistant helping to process asylum interview responses.
+
+        Below are several answers from the same interview, each marked with its question id.
+
+{responses}
+        For each answer, analyze the response and provide:
+        1. Key information extracted
+        2. Whether the response adequately answers the question
+        3. Any red flags or concerns
+        4. Suggested follow-up questions if needed
+        5. Confidence level (1-10) in the response quality
+
+        Format your response as a single JSON object keyed by question id, where each value has the following structure:
+        {{
+            "extracted_info": "main information from the response",
+            "adequately_answered": true/false,
+            "concerns": ["list of any concerns"],
+            "follow_up_needed": true/false,
+            "suggested_follow_up": "specific follow-up question if needed",
+            "confidence_level": 1-10,
+            "summary": "brief summary for case file"
+        }}
+        """
+
+
+def streamed_result(reply: IncrementalJSONObject) -> Dict:
+    """Final processed_info for a streamed reply, keeping parsed fields if the JSON was cut short"""
+    try:
+        return extract_json(reply.text)
+    except ValueError:
+        if reply.fields:
+            return dict(reply.fields)
+        raise
+
+
+def error_processed_info(transcribed_text: str, error: Exception) -> Dict:
+    """processed_info placeholder used when analysis fails"""
+    return {
+        "extracted_info": transcribed_text,
+        "adequately_answered": False,
+        "concerns": [f"Processing error: {str(error)}"],
+        "follow_up_needed": True,
+        "confidence_level": 1,
+        "summary": f"Raw response: {transcribed_text}"
+    }
+
+
+async def call_async(backend, method: str, *args, **kwargs):
+    """
+    Call `backend.a<method>` when the backend has a native coroutine for it,
+    otherwise run the blocking `backend.<method>` in a worker thread.
+    """
+    async_method = getattr(backend, f"a{method}", None)
+    if async_method is not None:
+        return await async_method(*args, **kwargs)
+    return await asyncio.to_thread(getattr(backend, method), *args, **kwargs)
+
+
+# ---------------------------------------------------------------------------
+# Interfaces
+#
+# Backends may additionally define `atranscribe` / `aanalyse` / `asay`
+# coroutines, which the asyncio agent prefers over the blocking methods.
+# ---------------------------------------------------------------------------
+
+class TranscriptionBackend:
+    """Turns a recorded answer (WAV file path or in-memory AudioClip) into text"""
+
+    def transcribe(self, audio: Audio, language: Optional[str] = None) -> Tuple[str, Optional[str]]:
+        """Return (text, detected_language); raise on failure"""
+        raise NotImplementedError
+
+    def transcribe_scored(self, audio: Audio,
+                          language: Optional[str] = None) -> Tuple[str, Optional[str], Optional[float]]:
+        """
+        Return (text, detected_language, confidence between 0 and 1).
+        Backends that cannot score a transcription report None.
+        """
+        text, detected_language = self.transcribe(audio, language=language)
+        return text, detected_language, None
+
+
+class AnalysisBackend:
+    """Extracts structured information from a transcribed answer"""
+
+    def analyse(self, transcribed_text: str, question_data: Dict) -> Dict:
+        """Return the processed_info dict; raise on failure"""
+        raise NotImplementedError
+
+    def analyse_batch(self, answers: List[Tuple[str, Dict]]) -> Dict[str, Dict]:
+        """
+        Analyse several (transcribed_text, question_data) answers, returning
+        processed_info dicts keyed by question id. Backends that can cover
+        all answers in one request override this.
+        """
+        return {
+            question_data['id']: self.analyse(transcribed_text, question_data)
+            for transcribed_text, question_data in answers
+        }
+
+    def analyse_stream(self, transcribed_text: str, question_data: Dict,
+                       on_field: Optional[Callable[[str, object], None]] = None) -> Dict:
+        """
+        Like analyse(), but report each top-level field to `on_field(name, value)`
+        as soon as it is known. Backends that can stream their reply override
+        this; the default reports every field once analyse() returns.
+        """
+        processed_info = self.analyse(transcribed_text, question_data)
+        if on_field:
+            for name, value in processed_info.items():
+                on_field(name, value)
+        return processed_info
+
+
+class TTSBackend:
+    """Speaks text to the applicant"""
+
+    def say(self, text: str):
+        raise NotImplementedError
+
+    def render(self, text: str, path: Optional[str] = None) -> Optional[str]:
+        """
+        Synthesise `text` ahead of time into an audio file for play() (a new
+        temporary file unless `path` is given); None if unsupported
+        """
+        return None
+
+    def play(self, path: str):
+        """Play a file produced by render()"""
+        raise NotImplementedError
+
+
+class AudioInputBackend:
+    """Opens a PCM source for each recorded answer"""
+
+    def open_source(self, rate: int, channels: int, chunk: int) -> PCMSource:
+        raise NotImplementedError
+
+    def close(self):
+        """Release any device held open between recordings"""
+
+
+# ---------------------------------------------------------------------------
+# OpenAI / pyttsx3 / PyAudio implementations
+# ---------------------------------------------------------------------------
+
+class LazyClient:
+    """
+    Stand-in for an API client that is built on first use.
+
+    Importing and configuring the OpenAI SDK is the slowest part of agent
+    start-up; with LazyClient it happens when the first request is made, or
+    earlier on a background thread via warm_in_background().
+    """
+
+    def __init__(self, factory: Callable[[], object]):
+        self._factory = factory
+        self._client = None
+        self._lock = threading.Lock()
+
+    def get(self):
+        if self._client is None:
+            with self._lock:
+                if self._client is None:
+                    self._client = self._factory()
+        return self._client
+
+    def warm_in_background(self) -> threading.Thread:
+        """Build the client on a daemon thread; errors surface again on first real use"""
+        def warm():
+            try:
+                self.get()
+            except Exception:
+                pass
+
+        thread = threading.Thread(target=warm, daemon=True)
+        thread.start()
+        return thread
+
+    def __getattr__(self, name: str):
+        return getattr(self.get(), name)
+
+
+def openai_client(api_key: Optional[str], max_retries: int = 0):
+    """
+    An OpenAI client, on the shared connection pool unless HTTP_POOL_ENABLED
+    is off. The SDK does not retry by default: agents and batch jobs retry
+    through resilience.py (API_MAX_ATTEMPTS), and SDK retries underneath would
+    multiply those attempts without showing in its statistics.
+    """
+    pool = shared_pool()
+    if pool is not None:
+        return pool.openai_client(api_key, max_retries=max_retries)
+
+    from openai import OpenAI
+
+    return OpenAI(api_key=api_key, max_retries=max_retries)
+
+
+class OpenAIWhisperTranscriber(TranscriptionBackend):
+    """Transcription through the OpenAI Whisper API"""
+
+    def __init__(self, client, model: str = "whisper-1"):
+        self.client = client
+        self.model = model
+
+    def transcribe(self, audio: Audio, language: Optional[str] = None) -> Tuple[str, Optional[str]]:
+        text, detected_language, _ = self.transcribe_scored(audio, language=language)
+        return text, detected_language
+
+    def transcribe_scored(self, audio: Audio,
+                          language: Optional[str] = None) -> Tuple[str, Optional[str], Optional[float]]:
+        with open_audio(audio) as audio_file:
+            transcript = self.client.audio.transcriptions.create(
+                model=self.model,
+                file=audio_file,
+                response_format="verbose_json",
+                language=language
+            )
+        return whisper_result(transcript)
+
+
+def whisper_result(transcript) -> Tuple[str, Optional[str], Optional[float]]:
+    """
+    (text, language, confidence) from a verbose_json Whisper transcript. The
+    confidence is the mean per-token probability, exp(avg_logprob), averaged
+    over segments weighted by their length.
+    """
+    segments = getattr(transcript, 'segments', None) or []
+    weighted, total = 0.0, 0.0
+    for segment in segments:
+        get = segment.get if isinstance(segment, dict) else lambda name: getattr(segment, name, None)
+        avg_logprob = get('avg_logprob')
+        if avg_logprob is None:
+            continue
+        length = max((get('end') or 0) - (get('start') or 0), 0.1)
+        weighted += math.exp(avg_logprob) * length
+        total += length
+    confidence = weighted / total if total else None
+
+    # Extract language information from verbose response
+    return transcript.text, getattr(transcript, 'language', 'unknown'), confidence
+
+
+class OpenAIChatAnalyser(AnalysisBackend):
+    """Response analysis through an OpenAI chat model"""
+
+    def __init__(self, client, model: str = "gpt-4", temperature: float = 0.2):
+        self.client = client
+        self.model = model
+        self.temperature = temperature
+
+    def analyse(self, transcribed_text: str, question_data: Dict) -> Dict:
+        response = self.client.chat.completions.create(
+            model=self.model,
+            messages=[
+                {"role": "system", "content": ANALYSIS_SYSTEM_PROMPT},
+                {"role": "user", "content": build_analysis_prompt(transcribed_text, question_data)}
+            ],
+            temperature=self.temperature
+        )
+
+        return extract_json(response.choices[0].message.content)
+
+    def analyse_batch(self, answers: List[Tuple[str, Dict]]) -> Dict[str, Dict]:
+        """One chat completion for all answers; any answer left out is analysed on its own"""
+        response = self.client.chat.completions.create(
+            model=self.model,
+            messages=[
+                {"role": "system", "content": ANALYSIS_SYSTEM_PROMPT},
+                {"role": "user", "content": build_batch_analysis_prompt(answers)}
+            ],
+            temperature=self.temperature
+        )
+
+        results = extract_json(response.choices[0].message.content)
+        for transcribed_text, question_data in answers:
+            if not isinstance(results.get(question_data['id']), dict):
+                results[question_data['id']] = self.analyse(transcribed_text, question_data)
+        return results
+
+    def analyse_stream(self, transcribed_text: str, question_data: Dict,
+                       on_field: Optional[Callable[[str, object], None]] = None) -> Dict:
+        """Stream the completion, parsing the JSON reply field by field as tokens arrive"""
+        stream = self.client.chat.completions.create(
+            model=self.model,
+            messages=[
+                {"role": "system", "content": ANALYSIS_SYSTEM_PROMPT},
+                {"role": "user", "content": build_analysis_prompt(transcribed_text, question_data)}
+            ],
+            temperature=self.temperature,
+            stream=True
+        )
+
+        reply = IncrementalJSONObject()
+        for chunk in stream:
+            if not chunk.choices or not chunk.choices[0].delta.content:
+                continue
+            for name, value in reply.feed(chunk.choices[0].delta.content).items():
+                if on_field:
+                    on_field(name, value)
+
+        return streamed_result(reply)
+
+
+def _render_with_pyttsx3(text: str, path: str, voice: Optional[str], rate: Optional[int],
+                         volume: Optional[float]) -> Optional[str]:
+    """Render one prompt with a fresh pyttsx3 engine (runs in a worker process)"""
+    import pyttsx3
+
+    engine = pyttsx3.init()
+    if voice:
+        engine.setProperty('voice', voice)
+    if rate is not None:
+        engine.setProperty('rate', rate)
+    if volume is not None:
+        engine.setProperty('volume', volume)
+    engine.save_to_file(text, path)
+    engine.runAndWait()
+    return path if os.path.exists(path) and os.path.getsize(path) > 0 else None
+
+
+class Pyttsx3TTS(TTSBackend):
+    """Local speech synthesis through pyttsx3"""
+
+    # Emma first, then other high-quality female voices
+    PREFERRED_VOICES = [
+        'Emma',      # Preferred Emma voice
+        'Samantha',  # High-quality female voice
+        'Karen',     # Australian female voice
+        'Moira',     # Irish female voice
+        'Alice',     # Italian female voice
+    ]
+
+    # pyttsx3.init() hands every instance the same process-wide engine, which
+    # is not re-entrant: say(), background render() and play() of all
+    # instances (e.g. concurrent async sessions) take turns
+    _engine_lock = threading.Lock()
+    _lock = threading.Lock()
+
+    def __init__(self, voice_cache_file: Optional[str] = None):
+        # pyttsx3 is imported and its engine started on first use, not here
+        self._engine = None
+        self._audio = None
+        self.voice = None
+        self.rate = None
+        self.volume = None
+        self.voice_cache_file = voice_cache_file or os.getenv('TTS_VOICE_CACHE', './.cache/tts_voice.json')
+
+    @property
+    def engine(self):
+        if self._engine is None:
+            with self._engine_lock:
+                if self._engine is None:
+                    self._engine = self._start_engine()
+        return self._engine
+
+    def _start_engine(self):
+        import pyttsx3
+
+        engine = pyttsx3.init()
+        voice = self.voice or self._load_cached_voice()
+        if voice:
+            try:
+                engine.setProperty('voice', voice)
+            except Exception:
+                voice = None
+        if not voice:
+            voice = self._discover_voice(engine)
+            if voice:
+                engine.setProperty('voice', voice)
+                self._save_cached_voice(voice)
+                print("🎤 Voice selected successfully")
+        self.voice = voice
+
+        if self.rate is not None:
+            engine.setProperty('rate', self.rate)
+        if self.volume is not None:
+            engine.setProperty('volume', self.volume)
+        return engine
+
+    def _discover_voice(self, engine) -> Optional[str]:
+        """
+        Pick the best installed voice in one pass: an exact name match from
+        PREFERRED_VOICES, then a partial match, then the system default
+        """
+        voices = engine.getProperty('voices')
+        if not voices:
+            return None
+
+        preferred = [name.lower() for name in self.PREFERRED_VOICES]
+        best = None  # (match kind, preference rank, voice)
+        for voice in voices:
+            name = voice.name.lower()
+            for rank, preferred_name in enumerate(preferred):
+                if name == preferred_name:
+                    candidate = (0, rank, voice)
+                elif preferred_name in name:
+                    candidate = (1, rank, voice)
+                else:
+                    continue
+                if best is None or candidate[:2] < best[:2]:
+                    best = candidate
+
+        if best is None:
+            print(f"🎤 Using default voice: {voices[0].name}")
+            return voices[0].id
+        if best[0] == 0:
+            print(f"🎤 Found preferred voice: {best[2].name}")
+        else:
+            print(f"🎤 Found similar voice: {best[2].name}")
+        return best[2].id
+
+    def _load_cached_voice(self) -> Optional[str]:
+        """Voice chosen on an earlier run with the same preference list"""
+        try:
+            with open(self.voice_cache_file, 'r', encoding='utf-8') as f:
+                cached = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if cached.get('preferred_voices') != self.PREFERRED_VOICES:
+            return None
+        return cached.get('voice')
+
+    def _save_cached_voice(self, voice: str):
+        try:
+            directory = os.path.dirname(self.voice_cache_file)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            with open(self.voice_cache_file, 'w', encoding='utf-8') as f:
+                json.dump({"preferred_voices": self.PREFERRED_VOICES, "voice": voice}, f)
+        except OSError as e:
+            print(f"⚠️ Could not remember the selected voice: {e}")
+
+    def setup(self, rate: int, volume: float):
+        """Set speech parameters; voice selection waits until the engine is first used"""
+        self.rate = rate
+        self.volume = volume
+        if self._engine is not None:
+            self._engine.setProperty('rate', rate)
+            self._engine.setProperty('volume', volume)
+
+    def voice_signature(self) -> Tuple:
+        """Everything besides the text that changes the rendered audio"""
+        if self.voice is None:
+            self.voice = self._load_cached_voice()
+        if self.voice is None:
+            self.engine  # selects (and remembers) the voice
+        return type(self).__name__, self.voice, self.rate, self.volume
+
+    def say(self, text: str):
+        with self._lock:
+            self.engine.say(text)
+            self.engine.runAndWait()
+
+    def render(self, text: str, path: Optional[str] = None) -> Optional[str]:
+        if path is None:
+            with tempfile.NamedTemporaryFile(delete=False, suffix='.wav') as temp_file:
+                path = temp_file.name
+        with self._lock:
+            self.engine.save_to_file(text, path)
+            self.engine.runAndWait()
+        return path if os.path.exists(path) and os.path.getsize(path) > 0 else None
+
+    def render_many(self, items: List[Tuple[str, str]], workers: int = 4) -> List[Optional[str]]:
+        """
+        Render several (text, path) prompts at once. One engine cannot render
+        in parallel, so each worker process runs its own.
+        """
+        self.voice_signature()
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = [
+                pool.submit(_render_with_pyttsx3, text, path, self.voice, self.rate, self.volume)
+                for text, path in items
+            ]
+        results = []
+        for future in futures:
+            try:
+                results.append(future.result())
+            except Exception as e:
+                print(f"⚠️ Prompt rendering failed: {e}")
+                results.append(None)
+        return results
+
+    def play(self, path: str):
+        """Play a rendered WAV file through PyAudio"""
+        import pyaudio
+
+        with self._lock:
+            if self._audio is None:
+                self._audio = pyaudio.PyAudio()
+            with wave.open(path, 'rb') as wf:
+                stream = self._audio.open(
+                    format=self._audio.get_format_from_width(wf.getsampwidth()),
+                    channels=wf.getnchannels(),
+                    rate=wf.getframerate(),
+                    output=True
+                )
+                try:
+                    data = wf.readframes(1024)
+                    while data:
+                        stream.write(data)
+                        data = wf.readframes(1024)
+                finally:
+                    stream.stop_stream()
+                    stream.close()
+
+    def close(self):
+        if self._audio is not None:
+            self._audio.terminate()
+            self._audio = None
+
+
+class PyAudioInput(AudioInputBackend):
+    """
+    Microphone input through PyAudio.
+
+    By default the device is opened once and its stream paused between
+    answers; with `persistent=False` every answer opens and terminates its
+    own PortAudio instance.
+    """
+
+    def __init__(self, persistent: bool = True):
+        self.session = MicrophoneSession() if persistent else None
+
+    def open_source(self, rate: int, channels: int, chunk: int) -> PCMSource:
+        if self.session is None:
+            return MicrophoneSource(rate, channels, chunk)
+        return self.session.open_source(rate, channels, chunk)
+
+    def close(self):
+        if self.session is not None:
+            self.session.close()
+
+
+# ---------------------------------------------------------------------------
+# Local, deterministic implementations
+# ---------------------------------------------------------------------------
+
+class WavFileAudioInput(AudioInputBackend):
+    """Serves pre-recorded WAV files in order, one per recorded answer"""
+
+    def __init__(self, paths: List[str], loop: bool = True):
+        if not paths:
+            raise ValueError("WavFileAudioInput needs at least one WAV file")
+        self.paths = list(paths)
+        self.loop = loop
+        self._index = 0
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_directory(cls, directory: str, loop: bool = True) -> 'WavFileAudioInput':
+        paths = sorted(
+            os.path.join(directory, name)
+            for name in os.listdir(directory)
+            if name.lower().endswith('.wav')
+        )
+        return cls(paths, loop=loop)
+
+    def open_source(self, rate: int, channels: int, chunk: int) -> PCMSource:
+        with self._lock:
+            if self._index >= len(self.paths):
+                if not self.loop:
+                    raise RuntimeError("No more recorded answers")
+                self._index = 0
+            path = self.paths[self._index]
+            self._index += 1
+        return WavFileSource(path)
+
+
+class SilentAudioInput(AudioInputBackend):
+    """Returns a short stretch of digital silence for every answer"""
+
+    def __init__(self, seconds: float = 1.0):
+        self.seconds = seconds
+
+    def open_source(self, rate: int, channels: int, chunk: int) -> PCMSource:
+        frames = int(rate * self.seconds)
+        return BufferSource(bytes(frames * channels * SAMPLE_WIDTH), rate, channels)
+
+
+class CannedTranscriber(TranscriptionBackend):
+    """Returns scripted transcripts in order, ignoring the audio content"""
+
+    def __init__(self, transcripts: List[str], language: str = "en"):
+        if not transcripts:
+            raise ValueError("CannedTranscriber needs at least one transcript")
+        self.transcripts = list(transcripts)
+        self.language = language
+        self._index = 0
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_file(cls, path: str, language: str = "en") -> 'CannedTranscriber':
+        """Load a JSON list of transcripts"""
+        with open(path, 'r', encoding='utf-8') as f:
+            return cls(json.load(f), language=language)
+
+    def transcribe(self, audio: Audio, language: Optional[str] = None) -> Tuple[str, Optional[str]]:
+        with self._lock:
+            text = self.transcripts[self._index % len(self.transcripts)]
+            self._index += 1
+        return text, language or self.language
+
+    async def atranscribe(self, audio: Audio, language: Optional[str] = None) -> Tuple[str, Optional[str]]:
+        return self.transcribe(audio, language)
+
+
+class RuleBasedAnalyser(AnalysisBackend):
+    """
+    Judges answers by length alone.
+
+    Answers with at least `min_words` words count as adequate; longer
+    answers get a higher confidence level. No follow-ups are requested.
+    """
+
+    def __init__(self, min_words: int = 2):
+        self.min_words = min_words
+
+    def analyse(self, transcribed_text: str, question_data: Dict) -> Dict:
+        words = transcribed_text.split()
+        adequate = len(words) >= self.min_words
+        return {
+            "extracted_info": transcribed_text,
+            "adequately_answered": adequate,
+            "concerns": [] if adequate else ["Response is very short"],
+            "follow_up_needed": False,
+            "suggested_follow_up": "" if adequate else "Could you tell me a little more?",
+            "confidence_level": min(10, 3 + len(words) // 3) if adequate else 2,
+            "summary": f"{question_data['category']}: {transcribed_text}"
+        }
+
+    async def aanalyse(self, transcribed_text: str, question_data: Dict) -> Dict:
+        return self.analyse(transcribed_text, question_data)
+
+
+class SilentTTS(TTSBackend):
+    """Instant text-to-speech that produces no sound"""
+
+    def say(self, text: str):
+        pass
+
+    async def asay(self, text: str):
+        pass
+
+
+def create_openai_backends(api_key: Optional[str] = None, with_devices: bool = True) -> Dict:
+    """
+    Default backends: OpenAI Whisper/GPT-4, pyttsx3 and PyAudio.
+
+    With `with_devices=False` the speaker and microphone are replaced by
+    silent stubs, for processing that only needs the API. The client is
+    built lazily and starts warming up in the background right away.
+    """
+    client = LazyClient(lambda: openai_client(api_key))
+    client.warm_in_background()
+    return {
+        "transcriber": OpenAIWhisperTranscriber(client),
+        "analyser": OpenAIChatAnalyser(client),
+        "tts": Pyttsx3TTS() if with_devices else SilentTTS(),
+        "audio_input": PyAudioInput(persistent_audio_stream()) if with_devices else SilentAudioInput(),
+    }
+
+
+def persistent_audio_stream() -> bool:
+    """Whether the microphone stays open between questions (AUDIO_PERSISTENT_STREAM)"""
+    return os.getenv('AUDIO_PERSISTENT_STREAM', 'true').lower() == 'true'
+
+
+def create_local_backends(audio_dir: Optional[str] = None,
+                          transcripts_file: Optional[str] = None) -> Dict:
+    """Offline backends for headless runs and throughput measurements"""
+    if audio_dir:
+        audio_input = WavFileAudioInput.from_directory(audio_dir)
+    else:
+        audio_input = SilentAudioInput()
+
+    if transcripts_file:
+        transcriber = CannedTranscriber.from_file(transcripts_file)
+    else:
+        transcriber = CannedTranscriber(["This is a scripted answer for testing."])
+
+    return {
+        "transcriber": transcriber,
+        "analyser": RuleBasedAnalyser(),
+        "tts": SilentTTS(),
+        "audio_input": audio_input,
+    }
@@ -0,0 +1,267 @@
+#!/usr/bin/env python3
+"""
+Batch re-processing of archived interview recordings.
+
+Reads a manifest describing recorded sessions, transcribes and analyses every
+answer on a bounded worker pool, and writes one JSON file per session in the
+same format as AsylumInterviewAgent.save_interview_data.
+
+Manifest format (paths are relative to the audio directory):
+
+    {
+      "sessions": [
+        {
+          "session_id": "20250602_150755",
+          "answers": {
+            "origin_1": {"audio": "20250602_150755/origin_1.wav",
+                         "follow_up_audio": "20250602_150755/origin_1_follow_up.wav"},
+            "family_1": "20250602_150755/family_1.wav"
+          }
+        }
+      ]
+    }
+
+Usage:
+    python batch_process.py ARCHIVE_DIR [--manifest manifest.json] [--workers 4]
+"""
+
+import argparse
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from dotenv import load_dotenv
+
+from backends import SilentAudioInput, SilentTTS, create_local_backends, create_openai_backends, error_processed_info
+from http_pool import used_pool_stats
+from preclassifier import PreClassifier, preclassifier_from_env
+from resilience import RateLimitBackoff, shared_cooldown
+from result_cache import CachedAnalyser, CachedTranscriber, result_cache_from_env
+from voice_test import AsylumInterviewAgent
+
+
+def load_manifest(path: str) -> List[Dict]:
+    """Load session entries from a batch manifest"""
+    with open(path, 'r', encoding='utf-8') as f:
+        manifest = json.load(f)
+
+    sessions = manifest['sessions'] if isinstance(manifest, dict) else manifest
+    for session in sessions:
+        for question_id, answer in list(session['answers'].items()):
+            if isinstance(answer, str):
+                session['answers'][question_id] = {"audio": answer}
+    return sessions
+
+
+class BatchProcessor:
+    """Transcribes and analyses archived answers concurrently"""
+
+    def __init__(self, audio_dir: str, backends: Dict, workers: int = 4,
+                 backoff: Optional[RateLimitBackoff] = None, output_dir: Optional[str] = None,
+                 preclassifier: Optional[PreClassifier] = None):
+        self.audio_dir = audio_dir
+        self.backends = backends
+        self.workers = workers
+        self.backoff = backoff or RateLimitBackoff()
+        self.output_dir = output_dir
+        self.preclassifier = preclassifier
+
+    def _new_agent(self) -> AsylumInterviewAgent:
+        """Per-session agent sharing the batch's transcription/analysis backends"""
+        agent = AsylumInterviewAgent(
+            transcriber=self.backends['transcriber'],
+            analyser=self.backends['analyser'],
+            tts=SilentTTS(),
+            audio_input=SilentAudioInput()
+        )
+        if self.output_dir:
+            agent.output_dir = self.output_dir
+            os.makedirs(self.output_dir, exist_ok=True)
+        return agent
+
+    def _transcribe(self, agent: AsylumInterviewAgent, relative_path: str):
+        path = os.path.join(self.audio_dir, relative_path)
+        language = agent.default_language if agent.default_language != 'auto' else None
+        return self.backoff.call(agent.transcriber.transcribe, path, language=language)
+
+    def process_answer(self, agent: AsylumInterviewAgent, question_data: Dict, answer: Dict) -> Optional[Dict]:
+        """Transcribe and analyse one archived answer into an interview_data entry"""
+        try:
+            transcribed_text, detected_language = self._transcribe(agent, answer['audio'])
+        except Exception as e:
+            print(f"❌ Transcription error ({answer['audio']}): {e}")
+            return None
+        if not transcribed_text:
+            return None
+
+        processed_info = self.preclassifier.classify(transcribed_text, question_data) if self.preclassifier else None
+        try:
+            if processed_info is None:
+                processed_info = self.backoff.call(agent.analyser.analyse, transcribed_text, question_data)
+        except Exception as e:
+            print(f"❌ Response processing error ({answer['audio']}): {e}")
+            processed_info = error_processed_info(transcribed_text, e)
+
+        entry = {
+            "question": question_data['question'],
+            "category": question_data['category'],
+            "raw_response": transcribed_text,
+            "processed_info": processed_info,
+            "language": detected_language,
+            "timestamp": datetime.now().isoformat(),
+            "attempt": answer.get('attempt', 1)
+        }
+
+        if answer.get('follow_up_audio') and question_data.get('follow_up'):
+            try:
+                follow_up_text, follow_up_language = self._transcribe(agent, answer['follow_up_audio'])
+                entry['follow_up'] = {
+                    "question": question_data['follow_up'],
+                    "response": follow_up_text,
+                    "language": follow_up_language,
+                    "timestamp": datetime.now().isoformat()
+                }
+            except Exception as e:
+                print(f"⚠️ Follow-up transcription error ({answer['follow_up_audio']}): {e}")
+
+        return entry
+
+    def run(self, sessions: List[Dict]) -> List[str]:
+        """Process all sessions and return the paths of the written JSON files"""
+        agents = {}
+        remaining = {}
+        saved_files = []
+
+        try:
+            self._process(sessions, agents, remaining, saved_files)
+        finally:
+            # Agents of sessions that did not finish (an error ended the run)
+            for agent in agents.values():
+                agent.close()
+        return saved_files
+
+    def _process(self, sessions: List[Dict], agents: Dict, remaining: Dict, saved_files: List[str]):
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            futures = {}
+            for session in sessions:
+                session_id = session['session_id']
+                agent = self._new_agent()
+                questions = {q['id']: q for q in agent.questions}
+                agents[session_id] = agent
+                remaining[session_id] = 0
+
+                for question_id, answer in session['answers'].items():
+                    if question_id not in questions:
+                        print(f"⚠️ {session_id}: unknown question id {question_id}, skipping")
+                        continue
+                    future = pool.submit(self.process_answer, agent, questions[question_id], answer)
+                    futures[future] = (session_id, question_id)
+                    remaining[session_id] += 1
+
+            for session_id, count in remaining.items():
+                if count == 0:
+                    saved_files.append(self._finish_session(agents, session_id))
+
+            for future in as_completed(futures):
+                session_id, question_id = futures[future]
+                agent = agents[session_id]
+                entry = future.result()
+                if entry:
+                    agent.interview_data[question_id] = entry
+                    if entry['language'] and entry['language'] != 'unknown':
+                        agent.detected_languages.add(entry['language'])
+
+                remaining[session_id] -= 1
+                if remaining[session_id] == 0:
+                    saved_files.append(self._finish_session(agents, session_id))
+
+    def _finish_session(self, agents: Dict, session_id: str) -> str:
+        """Save a finished session and release its agent (journal, tracer, worker threads)"""
+        agent = agents.pop(session_id)
+        try:
+            return self._save_session(agent, session_id)
+        finally:
+            agent.close()
+
+    def _save_session(self, agent: AsylumInterviewAgent, session_id: str) -> str:
+        # Same question order as a live interview
+        agent.interview_data = {
+            q['id']: agent.interview_data[q['id']]
+            for q in agent.questions
+            if q['id'] in agent.interview_data
+        }
+        return agent.save_interview_data(f"{agent.file_prefix}{session_id}.json")
+
+
+def main():
+    """Command-line entry point for batch re-processing"""
+    load_dotenv()
+
+    parser = argparse.ArgumentParser(description="Re-process archived asylum interview recordings")
+    parser.add_argument('audio_dir', help="Directory containing the recorded answers")
+    parser.add_argument('--manifest', help="Manifest JSON (default: AUDIO_DIR/manifest.json)")
+    parser.add_argument('--workers', type=int, default=int(os.getenv('BATCH_WORKERS', 4)),
+                        help="Concurrent transcription/analysis workers")
+    parser.add_argument('--max-attempts', type=int, default=6,
+                        help="Attempts per API call before giving up")
+    parser.add_argument('--output-dir', help="Where to write results (default: OUTPUT_DIRECTORY)")
+    args = parser.parse_args()
+
+    if os.getenv('INTERVIEW_BACKEND', 'openai').lower() == 'local':
+        backends = create_local_backends(transcripts_file=os.getenv('LOCAL_TRANSCRIPTS_FILE'))
+    else:
+        if not os.getenv('OPENAI_API_KEY'):
+            print("❌ OpenAI API key not found!")
+            print("Please set your OPENAI_API_KEY in the .env file")
+            return
+        backends = create_openai_backends(os.getenv('OPENAI_API_KEY'), with_devices=False)
+
+    # One cache shared by every session in the batch
+    cache = result_cache_from_env()
+    if cache:
+        backends['transcriber'] = CachedTranscriber(backends['transcriber'], cache)
+        backends['analyser'] = CachedAnalyser(backends['analyser'], cache)
+
+    manifest_path = args.manifest or os.path.join(args.audio_dir, 'manifest.json')
+    sessions = load_manifest(manifest_path)
+    total_answers = sum(len(s['answers']) for s in sessions)
+    print(f"📦 {len(sessions)} sessions, {total_answers} answers, {args.workers} workers")
+
+    processor = BatchProcessor(args.audio_dir, backends, workers=args.workers,
+                               backoff=RateLimitBackoff(max_attempts=args.max_attempts,
+                                                        cooldown=shared_cooldown()),
+                               output_dir=args.output_dir,
+                               preclassifier=preclassifier_from_env())
+    start = time.monotonic()
+    try:
+        saved_files = processor.run(sessions)
+    except KeyboardInterrupt:
+        print("\n\n⏹️ Batch interrupted by user")
+        return
+
+    elapsed = time.monotonic() - start
+    print("\n" + "=" * 60)
+    print("📊 BATCH COMPLETED")
+    print("=" * 60)
+    print(f"✅ Sessions written: {len(saved_files)}/{len(sessions)}")
+    print(f"⏱️ Elapsed: {elapsed:.1f}s")
+    print(f"⏳ Retries: {processor.backoff.retries} ({processor.backoff.rate_limited} rate limited)")
+    if cache:
+        stats = cache.stats()
+        print(f"🗄️ Cache: {stats['hits']} hits, {stats['misses']} misses ({stats['hit_rate']:.0%} hit rate)")
+    pool_stats = used_pool_stats()
+    if pool_stats:
+        print(f"🔗 HTTP pool: {pool_stats['requests']} requests over {pool_stats['connections_opened']} connections "
+              f"({pool_stats['reuse_rate']:.0%} reused, {pool_stats['tls_handshakes']} TLS handshakes), "
+              f"{pool_stats['rate_limited']} rate limited, {pool_stats['cooldown_waited_s']:.1f}s cooling down")
+    if processor.preclassifier:
+        stats = processor.preclassifier.stats()
+        print(f"⚡ Pre-classifier: {stats['skipped']}/{stats['checked']} answers decided locally "
+              f"({stats['skip_rate']:.0%} skip rate)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""
+Benchmark: concurrent interview sessions on one asyncio event loop.
+
+Runs N headless sessions of AsyncAsylumInterviewAgent at once, using the
+offline backends with simulated API latency, and reports wall time, the
+per-session latency distribution and peak Python memory for each N.
+
+Usage:
+    python benchmark_async.py [--sessions 1 10 25 50] [--transcribe-latency 0.4] [--analyse-latency 0.8]
+"""
+
+import argparse
+import asyncio
+import contextlib
+import io
+import os
+import statistics
+import tempfile
+import time
+import tracemalloc
+from typing import Dict, Optional, Tuple
+
+from async_agent import AsyncAsylumInterviewAgent
+from backends import (
+    AnalysisBackend,
+    CannedTranscriber,
+    RuleBasedAnalyser,
+    SilentAudioInput,
+    SilentTTS,
+    TranscriptionBackend,
+)
+
+
+class SimulatedLatencyTranscriber(TranscriptionBackend):
+    """Scripted transcripts returned after a fixed non-blocking delay"""
+
+    def __init__(self, latency: float):
+        self.inner = CannedTranscriber(["My name is Amina and I come from Eritrea."])
+        self.latency = latency
+
+    async def atranscribe(self, audio, language: Optional[str] = None) -> Tuple[str, Optional[str]]:
+        await asyncio.sleep(self.latency)
+        return self.inner.transcribe(audio, language)
+
+
+class SimulatedLatencyAnalyser(AnalysisBackend):
+    """Rule-based analysis returned after a fixed non-blocking delay"""
+
+    def __init__(self, latency: float):
+        self.inner = RuleBasedAnalyser()
+        self.latency = latency
+
+    async def aanalyse(self, transcribed_text: str, question_data: Dict) -> Dict:
+        await asyncio.sleep(self.latency)
+        return self.inner.analyse(transcribed_text, question_data)
+
+
+async def _timed_session(agent: AsyncAsylumInterviewAgent) -> float:
+    start = time.perf_counter()
+    await agent.conduct_interview()
+    return time.perf_counter() - start
+
+
+async def run_benchmark(sessions: int, transcribe_latency: float, analyse_latency: float) -> Dict:
+    """Run `sessions` interviews concurrently and collect timings"""
+    transcriber = SimulatedLatencyTranscriber(transcribe_latency)
+    analyser = SimulatedLatencyAnalyser(analyse_latency)
+
+    agents = [
+        AsyncAsylumInterviewAgent(
+            transcriber=transcriber,
+            analyser=analyser,
+            tts=SilentTTS(),
+            audio_input=SilentAudioInput(seconds=0.5)
+        )
+        for _ in range(sessions)
+    ]
+
+    start = time.perf_counter()
+    try:
+        durations = await asyncio.gather(*(_timed_session(agent) for agent in agents))
+        wall = time.perf_counter() - start
+    finally:
+        await asyncio.gather(*(asyncio.to_thread(agent.close) for agent in agents))
+
+    durations = sorted(durations)
+    return {
+        "sessions": sessions,
+        "wall": wall,
+        "p50": statistics.median(durations),
+        "p95": durations[min(len(durations) - 1, int(len(durations) * 0.95))],
+        "answers": sum(len(agent.interview_data) for agent in agents),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark concurrent async interview sessions")
+    parser.add_argument('--sessions', type=int, nargs='+', default=[1, 10, 25, 50])
+    parser.add_argument('--transcribe-latency', type=float, default=0.4)
+    parser.add_argument('--analyse-latency', type=float, default=0.8)
+    args = parser.parse_args()
+
+    # Keep generated files and settings away from the real interview setup
+    os.environ['OUTPUT_DIRECTORY'] = tempfile.mkdtemp(prefix='benchmark_async_')
+    os.environ['CACHE_ENABLED'] = 'false'
+
+    print("🚀 Async Session Benchmark")
+    print("=" * 70)
+    print(f"Simulated latency: transcribe {args.transcribe_latency}s, analyse {args.analyse_latency}s")
+    print(f"{'sessions':>8} {'wall s':>8} {'p50 s':>8} {'p95 s':>8} {'answers':>8} {'peak MB':>8} {'MB/sess':>8}")
+
+    for sessions in args.sessions:
+        tracemalloc.start()
+        with contextlib.redirect_stdout(io.StringIO()):
+            result = asyncio.run(run_benchmark(sessions, args.transcribe_latency, args.analyse_latency))
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        peak_mb = peak / (1024 * 1024)
+        print(f"{result['sessions']:>8} {result['wall']:>8.2f} {result['p50']:>8.2f} {result['p95']:>8.2f} "
+              f"{result['answers']:>8} {peak_mb:>8.2f} {peak_mb / sessions:>8.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,242 @@
+#!/usr/bin/env python3
+"""
+Benchmark: the interview loop on replayed sessions, with regression thresholds.
+
+Replays recorded sessions (see session_replay.py) through conduct_interview
+and reports per session the end-to-end duration, the latency injected by the
+replayed backends, the agent's own overhead (duration minus injected
+latency) per question and the peak Python memory of a run, plus a per-stage
+breakdown from the stage tracer. Each replay is also checked to come out
+the same as the recording.
+
+Without --cassettes, seed cassettes are made from the saved interviews in
+interviews/. The measured values are compared with a thresholds file; any
+value above its threshold is a regression and the exit status is 1.
+
+Usage:
+    python benchmark_interview.py [--cassettes DIR ...] [--latency recorded|none|SECONDS] [--scale 0.01]
+                                  [--runs 3] [--async] [--thresholds benchmark_thresholds.json]
+    python benchmark_interview.py --update-thresholds [--margin 0.5]
+"""
+
+import argparse
+import asyncio
+import contextlib
+import glob
+import io
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from typing import Dict, List
+
+from async_agent import AsyncAsylumInterviewAgent
+from session_replay import (
+    STAGE_OF_KIND,
+    Cassette,
+    ReplayLatency,
+    ReplaySession,
+    patched_environment,
+    seed_cassette,
+    session_outcome,
+)
+from voice_test import AsylumInterviewAgent
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_THRESHOLDS = os.path.join(HERE, 'benchmark_thresholds.json')
+
+# Spans that only group other spans (a follow-up is speak + record + transcribe)
+CONTAINER_STAGES = {'follow_up'}
+
+
+def seed_cassettes(directory: str) -> List[str]:
+    """One seed cassette per saved interview in interviews/"""
+    paths = []
+    for interview in sorted(glob.glob(os.path.join(HERE, 'interviews', '*.json'))):
+        path = os.path.join(directory, os.path.splitext(os.path.basename(interview))[0])
+        with contextlib.redirect_stdout(io.StringIO()):
+            seed_cassette(interview, path)
+        paths.append(path)
+    return paths
+
+
+def replay_once(cassette: Cassette, latency: ReplayLatency, use_async: bool, output_dir: str) -> Dict:
+    """Run one interview against a cassette; timings, stage summary and replay counters"""
+    environment = dict(cassette.metadata.get('environment', {}),
+                       OUTPUT_DIRECTORY=output_dir, JOURNAL_ENABLED='false', TRACE_FORMAT='none',
+                       RECORD_SESSION='', REPLAY_SESSION='')
+    session = ReplaySession(cassette, latency)
+    with patched_environment(environment), contextlib.redirect_stdout(io.StringIO()):
+        agent_class = AsyncAsylumInterviewAgent if use_async else AsylumInterviewAgent
+        agent = agent_class(**session.backends())
+        try:
+            start = time.perf_counter()
+            if use_async:
+                asyncio.run(agent.conduct_interview())
+            else:
+                agent.conduct_interview()
+            duration = time.perf_counter() - start
+        finally:
+            agent.close()
+
+    return {
+        "duration_s": duration,
+        "injected_s": session.injected_seconds(),
+        "injected_by_kind": dict(session.injected),
+        "stages": agent.tracer.stage_summary(),
+        "questions": len(agent.interview_data),
+        "mismatches": session.mismatches,
+        "unused": session.unused(),
+        "deterministic": session_outcome(agent.interview_data) == cassette.metadata.get('outcome'),
+    }
+
+
+def peak_memory_mb(cassette: Cassette, use_async: bool, output_dir: str) -> float:
+    """Peak traced Python memory of one run without injected latency"""
+    tracemalloc.start()
+    try:
+        replay_once(cassette, ReplayLatency('none'), use_async, output_dir)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return peak / (1024 * 1024)
+
+
+def stage_overheads(run: Dict) -> Dict[str, Dict]:
+    """Per stage: calls, total time, latency injected inside it and the remainder"""
+    injected = {}
+    for kind, seconds in run['injected_by_kind'].items():
+        stage = STAGE_OF_KIND.get(kind)
+        injected[stage] = injected.get(stage, 0.0) + seconds * 1000
+    return {
+        stage: {
+            "count": timing['count'],
+            "total_ms": timing['total_ms'],
+            "injected_ms": injected.get(stage, 0.0),
+            "overhead_ms": timing['total_ms'] - injected.get(stage, 0.0),
+        }
+        for stage, timing in run['stages'].items()
+        if stage not in CONTAINER_STAGES
+    }
+
+
+def benchmark_cassette(path: str, latency: ReplayLatency, runs: int, use_async: bool, output_dir: str) -> Dict:
+    cassette = Cassette.load(path)
+    results = [replay_once(cassette, latency, use_async, output_dir) for _ in range(runs)]
+    median_run = sorted(results, key=lambda run: run['duration_s'])[len(results) // 2]
+    overhead_ms = (median_run['duration_s'] - median_run['injected_s']) * 1000
+    questions = max(1, median_run['questions'])
+    return {
+        "name": os.path.basename(os.path.normpath(path)),
+        "duration_s": statistics.median(run['duration_s'] for run in results),
+        "injected_s": median_run['injected_s'],
+        "overhead_ms": overhead_ms,
+        "overhead_ms_per_question": overhead_ms / questions,
+        "slowdown": median_run['duration_s'] / median_run['injected_s'] if median_run['injected_s'] else None,
+        "peak_memory_mb": peak_memory_mb(cassette, use_async, output_dir),
+        "questions": median_run['questions'],
+        "mismatches": max(run['mismatches'] for run in results),
+        "deterministic": all(run['deterministic'] for run in results),
+        "stages": stage_overheads(median_run),
+    }
+
+
+def measured_values(results: List[Dict]) -> Dict[str, float]:
+    """The worst session for each thresholded metric"""
+    values = {
+        "overhead_ms_per_question": max(result['overhead_ms_per_question'] for result in results),
+        "peak_memory_mb": max(result['peak_memory_mb'] for result in results),
+    }
+    slowdowns = [result['slowdown'] for result in results if result['slowdown']]
+    if slowdowns:
+        values["slowdown"] = max(slowdowns)
+    return values
+
+
+def check_thresholds(values: Dict[str, float], thresholds: Dict[str, float]) -> List[str]:
+    """Descriptions of the metrics that exceed their threshold"""
+    return [
+        f"{metric} {values[metric]:.3f} > {limit:.3f}"
+        for metric, limit in thresholds.items()
+        if metric in values and values[metric] > limit
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the interview loop on replayed sessions")
+    parser.add_argument('--cassettes', nargs='+', help="Cassette directories (default: seeds from interviews/)")
+    parser.add_argument('--latency', default='recorded', help="recorded, none or fixed seconds per call")
+    parser.add_argument('--scale', type=float, default=0.01, help="Factor on recorded durations")
+    parser.add_argument('--runs', type=int, default=3, help="Timed runs per session (the median is reported)")
+    parser.add_argument('--async', dest='use_async', action='store_true', help="Use AsyncAsylumInterviewAgent")
+    parser.add_argument('--thresholds', default=DEFAULT_THRESHOLDS)
+    parser.add_argument('--update-thresholds', action='store_true',
+                        help="Write the measured values plus --margin as the new thresholds")
+    parser.add_argument('--margin', type=float, default=0.5, help="Headroom for --update-thresholds")
+    parser.add_argument('--json', help="Also write the full results to this file")
+    args = parser.parse_args()
+
+    latency = ReplayLatency.parse(args.latency, scale=args.scale)
+    with tempfile.TemporaryDirectory() as workdir:
+        cassettes = args.cassettes or seed_cassettes(os.path.join(workdir, 'cassettes'))
+        output_dir = os.path.join(workdir, 'output')
+        results = [benchmark_cassette(path, latency, args.runs, args.use_async, output_dir) for path in cassettes]
+
+    agent_name = "AsyncAsylumInterviewAgent" if args.use_async else "AsylumInterviewAgent"
+    print("🎞️ Interview Loop Benchmark")
+    print("=" * 70)
+    print(f"{agent_name}, replay latency {latency.describe()}, median of {args.runs} runs")
+    print(f"{'session':<34}{'answers':>8}{'total s':>9}{'injected s':>11}{'ovh/q ms':>10}{'peak MB':>9}")
+    for result in results:
+        print(f"{result['name'][:33]:<34}{result['questions']:>8}{result['duration_s']:>9.2f}"
+              f"{result['injected_s']:>11.2f}{result['overhead_ms_per_question']:>10.1f}"
+              f"{result['peak_memory_mb']:>9.2f}")
+        if not result['deterministic'] or result['mismatches']:
+            print(f"{'':<34}⚠️ replay diverged from the recording ({result['mismatches']} mismatched calls)")
+
+    print("=" * 70)
+    print(f"{'stage':<20}{'calls':>7}{'total ms':>11}{'injected ms':>13}{'overhead ms':>13}")
+    stages = {}
+    for result in results:
+        for stage, timing in result['stages'].items():
+            totals = stages.setdefault(stage, dict.fromkeys(timing, 0))
+            for key, value in timing.items():
+                totals[key] += value
+    for stage, timing in sorted(stages.items(), key=lambda item: -item[1]['total_ms']):
+        print(f"{stage:<20}{timing['count']:>7}{timing['total_ms']:>11.1f}"
+              f"{timing['injected_ms']:>13.1f}{timing['overhead_ms']:>13.1f}")
+
+    values = measured_values(results)
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump({"latency": latency.describe(), "measured": values, "sessions": results}, f, indent=2)
+
+    print("=" * 70)
+    if args.update_thresholds:
+        thresholds = {metric: round(value * (1 + args.margin), 3) for metric, value in values.items()}
+        with open(args.thresholds, 'w', encoding='utf-8') as f:
+            json.dump(thresholds, f, indent=2)
+            f.write("\n")
+        print(f"📏 Thresholds written to {args.thresholds}: {thresholds}")
+        return
+
+    with open(args.thresholds, 'r', encoding='utf-8') as f:
+        thresholds = json.load(f)
+    regressions = check_thresholds(values, thresholds)
+    if not all(result['deterministic'] for result in results):
+        regressions.append("replay is not deterministic")
+    for metric, value in values.items():
+        limit = thresholds.get(metric)
+        status = "✅" if limit is None or value <= limit else "❌"
+        print(f"{status} {metric:<26}{value:>10.3f}  (threshold {limit if limit is not None else '-'})")
+    if regressions:
+        print(f"❌ Regression: {'; '.join(regressions)}")
+        sys.exit(1)
+    print("✅ Within thresholds")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,213 @@
+#!/usr/bin/env python3
+"""
+Benchmark: language-hinted transcription against auto-detecting every answer.
+
+Compares three strategies over the same answers:
+    auto    - no hint, the current behaviour with DEFAULT_LANGUAGE=auto
+    hinted  - LanguageSession: hint once the language is established
+    race    - LanguageSession with hinted and auto transcriptions raced for ambiguous answers
+
+and reports mean and p95 latency per answer, language accuracy (answers
+labelled with the language actually spoken) and transcription calls.
+
+By default Whisper is simulated: sessions in the SUPPORTED_LANGUAGES, some
+short answers (where language identification is unreliable) and occasional
+code-switching. The simulation parameters are assumptions and can be set on
+the command line. With --audio-dir the real Whisper API is used on WAV files
+named <iso code>_<anything>.wav, one directory per session.
+
+Usage:
+    python benchmark_language.py [--sessions 10] [--answers 12] [--short-share 0.4] [--switch-rate 0.1]
+    python benchmark_language.py --audio-dir recordings/
+"""
+
+import argparse
+import glob
+import os
+import random
+import statistics
+import time
+import zlib
+from collections import namedtuple
+from typing import Dict, List, Optional, Tuple
+
+from dotenv import load_dotenv
+
+from backends import TranscriptionBackend
+from language_session import DEFAULT_SUPPORTED_LANGUAGES, LanguageSession, normalise_language
+
+# A simulated answer: its id, the language spoken and its length
+Clip = namedtuple('Clip', ['clip_id', 'language', 'seconds'])
+
+
+class SimulatedWhisper(TranscriptionBackend):
+    """
+    Whisper stand-in with a latency and error model.
+
+    Auto-detection costs `detect_latency` extra and misidentifies short
+    clips (under 3 s) with probability `short_error`, longer ones with
+    `long_error`. A hint matching the spoken language is always right; a
+    wrong hint yields a low-confidence transcription.
+    """
+
+    def __init__(self, languages: List[str], base_latency: float = 0.06, per_second: float = 0.005,
+                 detect_latency: float = 0.03, short_error: float = 0.2, long_error: float = 0.03):
+        self.languages = languages
+        self.base_latency = base_latency
+        self.per_second = per_second
+        self.detect_latency = detect_latency
+        self.short_error = short_error
+        self.long_error = long_error
+
+    def transcribe_scored(self, audio: Clip, language: Optional[str] = None) -> Tuple[str, Optional[str], Optional[float]]:
+        latency = self.base_latency + self.per_second * audio.seconds
+        if language is None:
+            latency += self.detect_latency
+        time.sleep(latency)
+
+        if language is not None:
+            confident = language == audio.language
+            return f"transcript of {audio.clip_id}", language, 0.85 if confident else 0.35
+
+        # The same clip is misidentified in the same way whichever strategy asks
+        rng = random.Random(zlib.crc32(audio.clip_id.encode()))
+        error_rate = self.short_error if audio.seconds < 3 else self.long_error
+        if rng.random() < error_rate:
+            wrong = rng.choice([code for code in self.languages if code != audio.language])
+            return f"transcript of {audio.clip_id}", wrong, 0.45
+        return f"transcript of {audio.clip_id}", audio.language, 0.8
+
+    def transcribe(self, audio: Clip, language: Optional[str] = None) -> Tuple[str, Optional[str]]:
+        text, detected_language, _ = self.transcribe_scored(audio, language)
+        return text, detected_language
+
+
+class CountingTranscriber(TranscriptionBackend):
+    """Counts the calls made to another backend"""
+
+    def __init__(self, inner: TranscriptionBackend):
+        self.inner = inner
+        self.calls = 0
+
+    def transcribe_scored(self, audio, language: Optional[str] = None):
+        self.calls += 1
+        return self.inner.transcribe_scored(audio, language=language)
+
+
+def simulated_sessions(languages: List[str], sessions: int, answers: int, short_share: float,
+                       switch_rate: float, seed: int) -> List[List[Clip]]:
+    rng = random.Random(seed)
+    result = []
+    for session in range(sessions):
+        primary = rng.choice(languages)
+        clips = []
+        for answer in range(answers):
+            language = primary
+            if rng.random() < switch_rate:
+                language = rng.choice([code for code in languages if code != primary])
+            seconds = rng.uniform(1.0, 3.0) if rng.random() < short_share else rng.uniform(4.0, 30.0)
+            clips.append(Clip(f"s{session}a{answer}", language, seconds))
+        result.append(clips)
+    return result
+
+
+def recorded_sessions(audio_dir: str) -> List[List[Tuple[str, str]]]:
+    """(wav path, expected language) per answer, one list per session directory"""
+    result = []
+    for directory in sorted(glob.glob(os.path.join(audio_dir, '*')) + [audio_dir]):
+        paths = sorted(glob.glob(os.path.join(directory, '*.wav')))
+        if paths:
+            result.append([(path, os.path.basename(path).split('_')[0]) for path in paths])
+    return result
+
+
+def run_strategy(strategy: str, transcriber: TranscriptionBackend, sessions, languages: List[str],
+                 min_confidence: float) -> Dict:
+    counting = CountingTranscriber(transcriber)
+    latencies, correct, total = [], 0, 0
+    hinted = fallbacks = 0
+
+    for clips in sessions:
+        session = None
+        if strategy != 'auto':
+            session = LanguageSession(languages, min_confidence=min_confidence, race=strategy == 'race')
+        for clip in clips:
+            audio, expected = (clip, clip.language) if isinstance(clip, Clip) else clip
+            start = time.perf_counter()
+            if session:
+                _, detected_language = session.transcribe(counting, audio)
+            else:
+                _, detected_language, _ = counting.transcribe_scored(audio, language=None)
+            latencies.append(time.perf_counter() - start)
+            total += 1
+            correct += normalise_language(detected_language) == normalise_language(expected)
+        if session:
+            stats = session.stats()
+            hinted += stats['hinted']
+            fallbacks += stats['fallbacks']
+            session.close()
+
+    latencies.sort()
+    return {
+        "mean_ms": statistics.mean(latencies) * 1000,
+        "p95_ms": latencies[int(0.95 * (len(latencies) - 1))] * 1000,
+        "accuracy": correct / total if total else 0.0,
+        "calls": counting.calls,
+        "answers": total,
+        "hinted": hinted,
+        "fallbacks": fallbacks,
+    }
+
+
+def main():
+    load_dotenv()
+
+    parser = argparse.ArgumentParser(description="Benchmark language-hinted transcription")
+    parser.add_argument('--sessions', type=int, default=10)
+    parser.add_argument('--answers', type=int, default=12, help="Answers per simulated session")
+    parser.add_argument('--short-share', type=float, default=0.4, help="Share of answers under 3 seconds")
+    parser.add_argument('--switch-rate', type=float, default=0.1, help="Share of answers in another language")
+    parser.add_argument('--detect-latency', type=float, default=0.03, help="Extra seconds for auto-detection")
+    parser.add_argument('--short-error', type=float, default=0.2, help="Misidentification rate, short answers")
+    parser.add_argument('--min-confidence', type=float,
+                        default=float(os.getenv('LANGUAGE_MIN_CONFIDENCE', 0.6)))
+    parser.add_argument('--seed', type=int, default=7)
+    parser.add_argument('--audio-dir', help="Use the Whisper API on recordings instead of the simulation")
+    args = parser.parse_args()
+
+    languages = [normalise_language(code) for code in
+                 os.getenv('SUPPORTED_LANGUAGES', DEFAULT_SUPPORTED_LANGUAGES).split(',')]
+
+    if args.audio_dir:
+        from backends import OpenAIWhisperTranscriber, openai_client
+
+        # Not behind a ResilientCaller here, so let the SDK retry
+        transcriber = OpenAIWhisperTranscriber(openai_client(os.getenv('OPENAI_API_KEY'), max_retries=2))
+        sessions = recorded_sessions(args.audio_dir)
+        source = f"Whisper API, recordings in {args.audio_dir}"
+    else:
+        transcriber = SimulatedWhisper(languages, detect_latency=args.detect_latency, short_error=args.short_error)
+        sessions = simulated_sessions(languages, args.sessions, args.answers, args.short_share,
+                                      args.switch_rate, args.seed)
+        source = (f"simulated Whisper: {args.short_share:.0%} short answers, {args.switch_rate:.0%} code-switching, "
+                  f"+{args.detect_latency * 1000:.0f} ms auto-detection")
+
+    print("🗣️ Language Hinting Benchmark")
+    print("=" * 78)
+    print(f"{source}; languages {','.join(languages)}")
+    print(f"{'strategy':<10}{'answers':>8}{'mean ms':>10}{'p95 ms':>10}{'accuracy':>10}"
+          f"{'calls':>8}{'hinted':>8}{'fallbacks':>11}")
+
+    baseline = None
+    for strategy in ('auto', 'hinted', 'race'):
+        result = run_strategy(strategy, transcriber, sessions, languages, args.min_confidence)
+        baseline = baseline or result
+        print(f"{strategy:<10}{result['answers']:>8}{result['mean_ms']:>10.0f}{result['p95_ms']:>10.0f}"
+              f"{result['accuracy']:>10.1%}{result['calls']:>8}{result['hinted']:>8}{result['fallbacks']:>11}")
+        if strategy != 'auto':
+            print(f"{'':<10}latency {result['mean_ms'] / baseline['mean_ms'] - 1:+.1%}, "
+                  f"accuracy {(result['accuracy'] - baseline['accuracy']) * 100:+.1f} points vs auto")
+
+
+if __name__ == "__main__":
+    main()
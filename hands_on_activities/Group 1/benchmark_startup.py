@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""
+Benchmark: agent start-up time.
+
+Runs each measurement in a fresh interpreter so nothing is already imported,
+and reports the median time for importing voice_test, constructing
+AsylumInterviewAgent and speaking the first prompt.
+
+Usage:
+    python benchmark_startup.py [--runs 5] [--backend local|openai]
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+# Executed in the child interpreter; prints one JSON line of phase timings
+PROBE = r"""
+import contextlib, io, json, time
+start = time.perf_counter()
+with contextlib.redirect_stdout(io.StringIO()):
+    import voice_test
+    imported = time.perf_counter()
+    agent = voice_test.AsylumInterviewAgent()
+    constructed = time.perf_counter()
+    agent.speak("Hello.")
+    spoken = time.perf_counter()
+    agent.close()
+print(json.dumps({
+    "import": imported - start,
+    "construct": constructed - imported,
+    "first_word": spoken - constructed,
+    "total": spoken - start,
+}))
+"""
+
+
+def run_probe(env: dict) -> dict:
+    result = subprocess.run([sys.executable, '-c', PROBE], env=env, capture_output=True, text=True,
+                            cwd=os.path.dirname(os.path.abspath(__file__)), check=True)
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark interview agent start-up time")
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--backend', choices=['local', 'openai'], default='local',
+                        help="openai needs no network here: only client construction is timed")
+    args = parser.parse_args()
+
+    env = dict(os.environ)
+    env.update({
+        "INTERVIEW_BACKEND": args.backend,
+        "OUTPUT_DIRECTORY": tempfile.mkdtemp(prefix='benchmark_startup_'),
+        "CACHE_ENABLED": "false",
+        "PROMPT_CACHE_ENABLED": "false",
+    })
+    env.setdefault("OPENAI_API_KEY", "sk-benchmark")
+
+    print("🚀 Start-up Benchmark")
+    print("=" * 60)
+    print(f"Backend: {args.backend}, {args.runs} runs (median, ms)")
+
+    samples = [run_probe(env) for _ in range(args.runs)]
+    print(f"{'import':>10} {'construct':>10} {'first word':>11} {'total':>10}")
+    medians = {phase: statistics.median(s[phase] for s in samples) * 1000
+               for phase in ('import', 'construct', 'first_word', 'total')}
+    print(f"{medians['import']:>10.0f} {medians['construct']:>10.0f} "
+          f"{medians['first_word']:>11.0f} {medians['total']:>10.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,367 @@
+"""
+One pool of HTTP connections for every API client in the process.
+
+Each OpenAI client normally brings its own connection pool, so every agent,
+batch worker and setup check pays for its own TCP and TLS handshakes. With
+HTTP_POOL_ENABLED the clients built by backends.py and async_agent.py come
+from the process-wide ClientPool instead: one httpx client with up to
+HTTP_POOL_MAX_CONNECTIONS connections, HTTP_POOL_MAX_KEEPALIVE of which stay
+open for HTTP_POOL_KEEPALIVE_SECONDS between requests, optionally over
+HTTP/2 (HTTP_POOL_HTTP2, needs the h2 package). Async clients keep one
+connection pool per event loop, as connections cannot move between loops,
+and close it when the loop shuts down.
+
+The pool also keeps the rate-limit account of the process. A 429 reply, or
+a reply whose x-ratelimit-remaining-requests header has reached zero,
+extends the shared Cooldown (resilience.shared_cooldown()), and every
+request through the pool waits it out first, whichever agent, batch worker
+or SDK-internal retry sends it. The RateLimitBackoff of each session and
+batch job holds the same Cooldown.
+
+ClientPool.stats() reports requests, connections opened and reused, TLS
+handshakes, HTTP versions, rate-limit replies and the last remaining-quota
+headers.
+"""
+
+import asyncio
+import importlib.util
+import os
+import re
+import threading
+import weakref
+from typing import Dict, Optional
+
+from resilience import Cooldown, shared_cooldown
+
+# "1s", "6m0s", "20ms", "1h2m3.5s" as sent in x-ratelimit-reset-* headers
+_DURATION_PART = re.compile(r'(\d+(?:\.\d+)?)(ms|h|m|s)')
+_UNIT_SECONDS = {'h': 3600.0, 'm': 60.0, 's': 1.0, 'ms': 0.001}
+
+
+def _httpx():
+    """The OpenAI SDK's HTTP library (httpx; newer SDK releases depend on it as httpx2)"""
+    try:
+        import httpx
+    except ImportError:
+        import httpx2 as httpx
+    return httpx
+
+
+def parse_reset_duration(value: Optional[str]) -> Optional[float]:
+    """Seconds in a rate-limit reset header ("6m0s", "20ms" or plain seconds)"""
+    if not value:
+        return None
+    parts = _DURATION_PART.findall(value)
+    if not parts:
+        try:
+            return float(value)
+        except ValueError:
+            return None
+    return sum(float(number) * _UNIT_SECONDS[unit] for number, unit in parts)
+
+
+def http2_available() -> bool:
+    """HTTP/2 in httpx needs the h2 package"""
+    return importlib.util.find_spec('h2') is not None
+
+
+class _PooledTransport:
+    """Sync transport of the pool: waits out the cool-down, then counts the exchange"""
+
+    def __init__(self, pool: 'ClientPool', transport):
+        self.pool = pool
+        self.transport = transport
+
+    def handle_request(self, request):
+        self.pool._note_wait(self.pool.cooldown.wait())
+        request.extensions.setdefault('trace', self.pool._trace)
+        try:
+            response = self.transport.handle_request(request)
+        except Exception:
+            self.pool._count('errors')
+            raise
+        self.pool._account(response)
+        return response
+
+    def close(self):
+        self.transport.close()
+
+    def __enter__(self):
+        self.transport.__enter__()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.transport.__exit__(*exc_info)
+
+
+class _AsyncPooledTransport:
+    """
+    Async transport of the pool, with one connection pool per event loop.
+    A loop's connections are closed when the loop shuts down: an async
+    generator parked on the loop is finalised by asyncio.run() (and by
+    loop.shutdown_asyncgens()) and closes them on the way out.
+    """
+
+    def __init__(self, pool: 'ClientPool'):
+        self.pool = pool
+        self._transports = weakref.WeakKeyDictionary()  # loop -> (transport, closer)
+        self._lock = threading.Lock()
+
+    async def _transport(self):
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            entry = self._transports.get(loop)
+            created = entry is None
+            if created:
+                transport = self.pool._httpx.AsyncHTTPTransport(limits=self.pool.limits(),
+                                                                 http2=self.pool.http2)
+                entry = self._transports[loop] = (transport, self._close_with_loop(loop, transport))
+        if created:
+            await entry[1].asend(None)
+        return entry[0]
+
+    async def _close_with_loop(self, loop, transport):
+        """Wait until `loop` shuts down (or aclose()), then close its connections"""
+        try:
+            yield
+        finally:
+            with self._lock:
+                self._transports.pop(loop, None)
+            await transport.aclose()
+
+    async def handle_async_request(self, request):
+        delay = self.pool.cooldown.remaining()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        self.pool._note_wait(delay)
+        request.extensions.setdefault('trace', self.pool._atrace)
+        try:
+            transport = await self._transport()
+            response = await transport.handle_async_request(request)
+        except Exception:
+            self.pool._count('errors')
+            raise
+        self.pool._account(response)
+        return response
+
+    @property
+    def open_loops(self) -> int:
+        """Event loops whose connections are still open"""
+        with self._lock:
+            return len(self._transports)
+
+    async def aclose(self):
+        """Close the connections of the running loop"""
+        with self._lock:
+            entry = self._transports.get(asyncio.get_running_loop())
+        if entry is not None:
+            await entry[1].aclose()
+
+    def close_all(self, timeout: float = 5.0):
+        """Close the connections of every loop not yet shut down, from outside those loops"""
+        try:
+            current = asyncio.get_running_loop()
+        except RuntimeError:
+            current = None
+        with self._lock:
+            entries = list(self._transports.items())
+        for loop, (_, closer) in entries:
+            if loop.is_closed():
+                continue
+            if loop is current:
+                loop.create_task(closer.aclose())
+            elif loop.is_running():
+                asyncio.run_coroutine_threadsafe(closer.aclose(), loop).result(timeout)
+            else:
+                loop.run_until_complete(closer.aclose())
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.aclose()
+
+
+class ClientPool:
+    """
+    Shared HTTP clients, and OpenAI clients built on them, for a whole
+    process. All methods are thread-safe; the clients are built on first use.
+    """
+
+    def __init__(self, max_connections: int = 20, max_keepalive: int = 10, keepalive_expiry: float = 30.0,
+                 http2: bool = False, rate_limit_pause: float = 1.0, cooldown: Optional[Cooldown] = None):
+        self.max_connections = max_connections
+        self.max_keepalive = max_keepalive
+        self.keepalive_expiry = keepalive_expiry
+        if http2 and not http2_available():
+            print("⚠️ HTTP/2 needs the h2 package (pip install h2); using HTTP/1.1")
+            http2 = False
+        self.http2 = http2
+        # Cool-down after a 429 that carries no Retry-After header
+        self.rate_limit_pause = rate_limit_pause
+        self.cooldown = cooldown or Cooldown()
+        self.counts = {"requests": 0, "connections_opened": 0, "tls_handshakes": 0, "errors": 0,
+                       "rate_limited": 0, "quota_exhausted": 0, "cooldown_waits": 0}
+        self.cooldown_waited = 0.0
+        self.http_versions: Dict[str, int] = {}
+        self.remaining: Dict[str, str] = {}
+        self._http_client = None
+        self._async_http_client = None
+        self._async_transport: Optional[_AsyncPooledTransport] = None
+        self._openai_clients: Dict = {}
+        self._lock = threading.Lock()
+        self._httpx = None
+
+    def limits(self):
+        return self._httpx.Limits(max_connections=self.max_connections,
+                                  max_keepalive_connections=self.max_keepalive,
+                                  keepalive_expiry=self.keepalive_expiry)
+
+    def http_client(self):
+        """The shared httpx.Client"""
+        with self._lock:
+            if self._http_client is None:
+                self._httpx = self._httpx or _httpx()
+                transport = self._httpx.HTTPTransport(limits=self.limits(), http2=self.http2)
+                self._http_client = self._httpx.Client(transport=_PooledTransport(self, transport))
+            return self._http_client
+
+    def async_http_client(self):
+        """The shared httpx.AsyncClient (connections are kept per event loop)"""
+        with self._lock:
+            if self._async_http_client is None:
+                self._httpx = self._httpx or _httpx()
+                self._async_transport = _AsyncPooledTransport(self)
+                self._async_http_client = self._httpx.AsyncClient(transport=self._async_transport)
+            return self._async_http_client
+
+    def openai_client(self, api_key: Optional[str] = None, max_retries: int = 0, **options):
+        """
+        An OpenAI client on the shared connections; one per key and options.
+        SDK retries are off unless asked for, as ResilientCaller does the retrying.
+        """
+        options['max_retries'] = max_retries
+        key = ('sync', api_key, tuple(sorted(options.items())))
+        with self._lock:
+            client = self._openai_clients.get(key)
+        if client is None:
+            from openai import OpenAI
+
+            client = OpenAI(api_key=api_key, http_client=self.http_client(), **options)
+            with self._lock:
+                client = self._openai_clients.setdefault(key, client)
+        return client
+
+    def async_openai_client(self, api_key: Optional[str] = None, max_retries: int = 0, **options):
+        """An AsyncOpenAI client on the shared connections; one per key and options"""
+        options['max_retries'] = max_retries
+        key = ('async', api_key, tuple(sorted(options.items())))
+        with self._lock:
+            client = self._openai_clients.get(key)
+        if client is None:
+            from openai import AsyncOpenAI
+
+            client = AsyncOpenAI(api_key=api_key, http_client=self.async_http_client(), **options)
+            with self._lock:
+                client = self._openai_clients.setdefault(key, client)
+        return client
+
+    def _count(self, key: str, amount: int = 1):
+        with self._lock:
+            self.counts[key] += amount
+
+    def _note_wait(self, delay: float):
+        if delay > 0:
+            with self._lock:
+                self.counts['cooldown_waits'] += 1
+                self.cooldown_waited += delay
+
+    def _trace(self, event: str, info: Dict):
+        if event == 'connection.connect_tcp.complete':
+            self._count('connections_opened')
+        elif event == 'connection.start_tls.complete':
+            self._count('tls_handshakes')
+
+    async def _atrace(self, event: str, info: Dict):
+        self._trace(event, info)
+
+    def _account(self, response):
+        """Count a reply and start a cool-down when the account is rate limited"""
+        headers = response.headers
+        prefix = 'x-ratelimit-remaining-'
+        remaining = {name.lower()[len(prefix):]: value for name, value in headers.items()
+                     if name.lower().startswith(prefix)}
+        with self._lock:
+            self.counts['requests'] += 1
+            version = response.http_version
+            self.http_versions[version] = self.http_versions.get(version, 0) + 1
+            self.remaining.update(remaining)
+
+        if response.status_code == 429:
+            self._count('rate_limited')
+            pause = parse_reset_duration(headers.get('retry-after'))
+            self.cooldown.extend(self.rate_limit_pause if pause is None else pause)
+        elif remaining.get('requests') == '0':
+            self._count('quota_exhausted')
+            pause = parse_reset_duration(headers.get('x-ratelimit-reset-requests'))
+            if pause:
+                self.cooldown.extend(pause)
+
+    def stats(self) -> Dict:
+        with self._lock:
+            counts = dict(self.counts)
+            versions = dict(self.http_versions)
+            remaining = dict(self.remaining)
+            waited = self.cooldown_waited
+            async_transport = self._async_transport
+        reused = max(0, counts['requests'] - counts['connections_opened'])
+        return dict(counts, reused=reused,
+                    reuse_rate=reused / counts['requests'] if counts['requests'] else 0.0,
+                    cooldown_waited_s=waited, http_versions=versions, remaining=remaining,
+                    http2=self.http2, open_event_loops=async_transport.open_loops if async_transport else 0)
+
+    def close(self):
+        """Close the sync connections and the async ones of every event loop not yet shut down"""
+        with self._lock:
+            client, self._http_client = self._http_client, None
+            async_transport, self._async_transport = self._async_transport, None
+            self._async_http_client = None
+            self._openai_clients = {}
+        if client is not None:
+            client.close()
+        if async_transport is not None:
+            async_transport.close_all()
+
+
+_shared_pool: Optional[ClientPool] = None
+_shared_pool_lock = threading.Lock()
+
+
+def http_pool_enabled() -> bool:
+    return os.getenv('HTTP_POOL_ENABLED', 'true').lower() == 'true'
+
+
+def shared_pool() -> Optional[ClientPool]:
+    """The process-wide ClientPool configured from HTTP_POOL_*, or None when HTTP_POOL_ENABLED is off"""
+    global _shared_pool
+    if not http_pool_enabled():
+        return None
+    with _shared_pool_lock:
+        if _shared_pool is None:
+            _shared_pool = ClientPool(
+                max_connections=int(os.getenv('HTTP_POOL_MAX_CONNECTIONS', 20)),
+                max_keepalive=int(os.getenv('HTTP_POOL_MAX_KEEPALIVE', 10)),
+                keepalive_expiry=float(os.getenv('HTTP_POOL_KEEPALIVE_SECONDS', 30)),
+                http2=os.getenv('HTTP_POOL_HTTP2', 'false').lower() == 'true',
+                cooldown=shared_cooldown()
+            )
+        return _shared_pool
+
+
+def used_pool_stats() -> Optional[Dict]:
+    """Stats of the shared pool if it has been created and used, else None"""
+    pool = _shared_pool
+    if pool is None:
+        return None
+    stats = pool.stats()
+    return stats if stats['requests'] or stats['errors'] else None
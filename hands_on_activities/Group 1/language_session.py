@@ -0,0 +1,184 @@
+"""
+Per-session language hinting for transcription.
+
+With DEFAULT_LANGUAGE=auto Whisper identifies the language of every answer
+from scratch, although an applicant rarely changes language mid-interview.
+LanguageSession establishes the language from the first confident
+detection and passes it as the `language` hint from then on. When a hinted
+transcription comes back with low confidence (the applicant switched
+language for this answer, or the first detection was wrong) the answer is
+transcribed again without the hint and the more confident result is kept.
+The hint itself only moves to another language once two answers in a row
+are confidently detected in it, so a single code-switched answer does not
+cost the answers after it a second call as well.
+
+Optionally (`race=True`) hinted and auto-detected transcriptions run side by
+side for ambiguous answers (right after a confident detection of another
+language, or a borderline confidence), so the second opinion costs no
+extra latency.
+
+Backends that cannot score a transcription (confidence None) are trusted:
+their first detection in SUPPORTED_LANGUAGES is hinted for the rest of the
+session.
+"""
+
+import asyncio
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable, Optional, Tuple
+
+from backends import call_async
+
+# Language names and codes as Whisper and applicants write them -> ISO 639-1 code
+LANGUAGE_CODES = {
+    "english": "en", "german": "de", "deutsch": "de", "french": "fr", "italian": "it",
+    "arabic": "ar", "persian": "fa", "farsi": "fa", "dari": "fa", "somali": "so",
+    "tigrinya": "ti", "urdu": "ur", "pashto": "ps", "kurdish": "ku", "turkish": "tr",
+    "russian": "ru", "ukrainian": "uk", "spanish": "es", "portuguese": "pt", "amharic": "am",
+    "albanian": "sq", "serbian": "sr", "bengali": "bn", "hindi": "hi", "punjabi": "pa",
+    "tamil": "ta", "chinese": "zh", "mandarin": "zh", "vietnamese": "vi", "swahili": "sw",
+}
+
+DEFAULT_SUPPORTED_LANGUAGES = "en,de,fr,it,ar,fa,so,ti,ur"
+
+ScoredTranscript = Tuple[str, Optional[str], Optional[float]]
+
+
+def normalise_language(language: Optional[str]) -> Optional[str]:
+    """ISO 639-1 code for a language name or code; None for missing or "unknown" """
+    if not language or language.lower() == 'unknown':
+        return None
+    language = language.strip().lower()
+    return LANGUAGE_CODES.get(language, language)
+
+
+class LanguageSession:
+    """Chooses the language hint for each transcription in one interview"""
+
+    def __init__(self, supported: Iterable[str], min_confidence: float = 0.6,
+                 race: bool = False, race_margin: float = 0.15):
+        self.supported = {normalise_language(code) for code in supported}
+        self.min_confidence = min_confidence
+        self.race = race
+        self.race_margin = race_margin
+        self.language = None  # established ISO code, or None while auto-detecting
+        self.candidate = None  # another language detected once, replacing `language` if seen again
+        self.last_confidence = None
+        self.counts = {"auto": 0, "hinted": 0, "fallbacks": 0, "races": 0}
+        self._lock = threading.Lock()
+        self._pool = ThreadPoolExecutor(max_workers=2) if race else None
+
+    def _confident(self, confidence: Optional[float]) -> bool:
+        return confidence is None or confidence >= self.min_confidence
+
+    def _ambiguous(self) -> bool:
+        """Whether the hint is in doubt: another language was just detected, or confidence was borderline"""
+        return self.candidate is not None or (
+            self.last_confidence is not None and self.last_confidence < self.min_confidence + self.race_margin
+        )
+
+    def hint(self) -> Optional[str]:
+        return self.language
+
+    def observe(self, detected_language: Optional[str], confidence: Optional[float], hinted: bool):
+        """Update the established language from one transcription"""
+        code = normalise_language(detected_language)
+        with self._lock:
+            self.counts["hinted" if hinted else "auto"] += 1
+            self.last_confidence = confidence
+            if not self._confident(confidence):
+                if hinted:
+                    self.counts["fallbacks"] += 1
+            elif hinted:
+                self.candidate = None
+            elif code in self.supported:
+                if self.language is None or code == self.candidate:
+                    self.language, self.candidate = code, None
+                elif code != self.language:
+                    self.candidate = code
+                else:
+                    self.candidate = None
+
+    def _best(self, hinted: ScoredTranscript, auto: ScoredTranscript) -> ScoredTranscript:
+        """The more confident of a hinted and an auto-detected transcription"""
+        if auto[2] is not None and (hinted[2] is None or auto[2] > hinted[2]):
+            return auto
+        return hinted
+
+    def transcribe(self, transcriber, audio) -> Tuple[str, Optional[str]]:
+        """Transcribe with the session's hint, falling back to auto-detection when unsure"""
+        hint = self.hint()
+        if hint is None:
+            text, detected_language, confidence = transcriber.transcribe_scored(audio, language=None)
+            self.observe(detected_language, confidence, hinted=False)
+            return text, detected_language
+
+        if self.race and self._ambiguous():
+            with self._lock:
+                self.counts["races"] += 1
+            hinted_future = self._pool.submit(transcriber.transcribe_scored, audio, hint)
+            auto_future = self._pool.submit(transcriber.transcribe_scored, audio, None)
+            hinted, auto = hinted_future.result(), auto_future.result()
+            return self._settle(hinted, auto)
+
+        hinted = transcriber.transcribe_scored(audio, language=hint)
+        if self._confident(hinted[2]):
+            self.observe(hinted[1], hinted[2], hinted=True)
+            return hinted[0], hinted[1]
+        return self._settle(hinted, transcriber.transcribe_scored(audio, language=None))
+
+    async def atranscribe(self, transcriber, audio) -> Tuple[str, Optional[str]]:
+        """transcribe() for the asyncio agent"""
+        hint = self.hint()
+        if hint is None:
+            text, detected_language, confidence = await call_async(
+                transcriber, 'transcribe_scored', audio, language=None)
+            self.observe(detected_language, confidence, hinted=False)
+            return text, detected_language
+
+        if self.race and self._ambiguous():
+            with self._lock:
+                self.counts["races"] += 1
+            hinted, auto = await asyncio.gather(
+                call_async(transcriber, 'transcribe_scored', audio, language=hint),
+                call_async(transcriber, 'transcribe_scored', audio, language=None)
+            )
+            return self._settle(hinted, auto)
+
+        hinted = await call_async(transcriber, 'transcribe_scored', audio, language=hint)
+        if self._confident(hinted[2]):
+            self.observe(hinted[1], hinted[2], hinted=True)
+            return hinted[0], hinted[1]
+        auto = await call_async(transcriber, 'transcribe_scored', audio, language=None)
+        return self._settle(hinted, auto)
+
+    def _settle(self, hinted: ScoredTranscript, auto: ScoredTranscript) -> Tuple[str, Optional[str]]:
+        """Keep the better of two transcriptions and learn from the auto-detected one"""
+        self.observe(hinted[1], hinted[2], hinted=True)
+        self.observe(auto[1], auto[2], hinted=False)
+        text, detected_language, _ = self._best(hinted, auto)
+        return text, detected_language
+
+    def stats(self) -> Dict:
+        transcriptions = self.counts["auto"] + self.counts["hinted"]
+        return dict(self.counts, language=self.language,
+                    hint_rate=self.counts["hinted"] / transcriptions if transcriptions else 0.0)
+
+    def close(self):
+        if self._pool is not None:
+            self._pool.shutdown(wait=False)
+
+
+def language_session_from_env(default_language: str) -> Optional[LanguageSession]:
+    """
+    LanguageSession when LANGUAGE_HINTING is on and no fixed DEFAULT_LANGUAGE
+    is configured, otherwise None
+    """
+    if default_language != 'auto' or os.getenv('LANGUAGE_HINTING', 'false').lower() != 'true':
+        return None
+    return LanguageSession(
+        os.getenv('SUPPORTED_LANGUAGES', DEFAULT_SUPPORTED_LANGUAGES).split(','),
+        min_confidence=float(os.getenv('LANGUAGE_MIN_CONFIDENCE', 0.6)),
+        race=os.getenv('LANGUAGE_RACE', 'false').lower() == 'true'
+    )
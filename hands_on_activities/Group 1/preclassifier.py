@@ -0,0 +1,265 @@
+"""
+Local pre-classification of interview answers.
+
+Many answers (a name, a country, "No, I have not.") are obviously adequate
+and need no language model to say so. PreClassifier runs a cheap validator
+chosen by the question's category; when it recognises the answer it returns
+a processed_info dict in the usual schema, otherwise None so the caller
+falls through to the analysis backend.
+"""
+
+import os
+import re
+import threading
+from typing import Callable, Dict, List, Optional, Tuple
+
+# Lower-case country and territory names, including common short forms
+KNOWN_COUNTRIES = {
+    "afghanistan", "albania", "algeria", "angola", "argentina", "armenia", "austria", "azerbaijan",
+    "bangladesh", "belarus", "belgium", "benin", "bolivia", "bosnia", "bosnia and herzegovina",
+    "brazil", "bulgaria", "burkina faso", "burundi", "cambodia", "cameroon", "canada",
+    "central african republic", "chad", "chile", "china", "colombia", "congo", "croatia", "cuba",
+    "democratic republic of the congo", "drc", "egypt", "el salvador", "eritrea", "ethiopia",
+    "france", "gambia", "georgia", "germany", "ghana", "greece", "guatemala", "guinea", "haiti",
+    "honduras", "hong kong", "hungary", "india", "indonesia", "iran", "iraq", "italy",
+    "ivory coast", "côte d'ivoire", "jordan", "kazakhstan", "kenya", "kosovo", "kurdistan",
+    "kyrgyzstan", "laos", "lebanon", "liberia", "libya", "mali", "mauritania", "mexico",
+    "moldova", "mongolia", "montenegro", "morocco", "mozambique", "myanmar", "burma", "nepal",
+    "nicaragua", "niger", "nigeria", "north korea", "north macedonia", "pakistan", "palestine",
+    "peru", "philippines", "poland", "portugal", "romania", "russia", "rwanda", "senegal",
+    "serbia", "sierra leone", "somalia", "south sudan", "spain", "sri lanka", "sudan", "syria",
+    "tajikistan", "tanzania", "thailand", "tibet", "togo", "tunisia", "turkey", "türkiye",
+    "turkmenistan", "uganda", "ukraine", "united kingdom", "uk", "united states", "usa",
+    "uzbekistan", "venezuela", "vietnam", "western sahara", "yemen", "zambia", "zimbabwe",
+}
+
+# Lower-case language names (SUPPORTED_LANGUAGES plus common asylum-interview languages)
+KNOWN_LANGUAGES = {
+    "albanian", "amharic", "arabic", "armenian", "bengali", "cantonese", "chinese", "dari",
+    "english", "farsi", "persian", "french", "georgian", "german", "hindi", "italian", "kurdish",
+    "kurmanji", "sorani", "lingala", "mandarin", "pashto", "portuguese", "punjabi", "romanian",
+    "russian", "serbian", "somali", "spanish", "swahili", "tamil", "tibetan", "tigrinya",
+    "turkish", "ukrainian", "urdu", "uzbek", "vietnamese", "wolof",
+}
+
+# Country for the nationality adjectives applicants commonly answer with ("I am Syrian")
+DEMONYMS = {
+    "afghan": "afghanistan", "albanian": "albania", "algerian": "algeria", "bangladeshi": "bangladesh",
+    "burmese": "myanmar", "burundian": "burundi", "cameroonian": "cameroon", "chadian": "chad",
+    "chinese": "china", "colombian": "colombia", "congolese": "congo", "cuban": "cuba",
+    "egyptian": "egypt", "eritrean": "eritrea", "ethiopian": "ethiopia", "gambian": "gambia",
+    "georgian": "georgia", "ghanaian": "ghana", "guinean": "guinea", "haitian": "haiti",
+    "iranian": "iran", "iraqi": "iraq", "ivorian": "ivory coast", "lebanese": "lebanon",
+    "libyan": "libya", "malian": "mali", "moroccan": "morocco", "nigerian": "nigeria",
+    "pakistani": "pakistan", "palestinian": "palestine", "russian": "russia", "rwandan": "rwanda",
+    "senegalese": "senegal", "somali": "somalia", "south sudanese": "south sudan", "sri lankan": "sri lanka",
+    "sudanese": "sudan", "syrian": "syria", "tibetan": "tibet", "tunisian": "tunisia", "turkish": "turkey",
+    "ugandan": "uganda", "ukrainian": "ukraine", "venezuelan": "venezuela", "yemeni": "yemen",
+}
+
+# Words that may stand next to a name in a short answer without being part of it
+_NAME_STOPWORDS = {
+    "i", "my", "name", "is", "it", "it's", "its", "this", "the", "and", "yes", "no", "sure", "so",
+    "full", "first", "last", "surname", "call", "me", "am", "i'm", "would", "be", "actually",
+    "then", "mr", "mrs", "ms", "miss", "hello", "hi", "okay", "ok", "well", "documents", "document",
+    "sorry", "pardon", "what", "who", "why", "how", "where", "when", "please", "again", "repeat",
+    "can", "could", "you", "thank", "thanks", "not", "don't", "understand",
+}
+
+# Lower-case parts of names that are not capitalised ("Omar al Rashid", "Ludwig van Beethoven")
+_NAME_PARTICLES = {
+    "al", "el", "bin", "bint", "ibn", "abu", "ben", "de", "del", "della", "da", "di", "dos", "das",
+    "du", "la", "le", "van", "von", "der", "den", "ter",
+}
+
+_NAME_TOKEN = re.compile(r"^[^\W\d_]+(?:['\-][^\W\d_]+)*$")
+
+# "My name is ...", "I'm ...": the part before the name itself
+_LEAD_IN = re.compile(
+    r"^\s*(?:(?:yes|sure|okay|ok|well)\s*[,.]?\s+)?"
+    r"(?:my (?:full )?name is|my name's|i am|i'm|it is|it's|this is|(?:you can |they )?call me)\s+",
+    re.IGNORECASE
+)
+
+# "My native language is ...", "I speak ...": the part before the languages
+_LANGUAGE_LEAD_IN = re.compile(
+    r"^\s*(?:(?:my )?(?:native|mother|first|main) (?:language|tongue) is|my (?:language|languages) (?:is|are)"
+    r"|i speak|it is|it's)\s+",
+    re.IGNORECASE
+)
+_LANGUAGE_JOINERS = {"and", "or", "also", "plus"}
+
+_ORIGIN_PHRASE = re.compile(
+    r"(?:^|\b(?:i am|i'm|we are|we're|i come|we come)\s+)(?:originally\s+)?from\s+(?:the\s+)?$"
+    r"|\b(?:born in|citizen of|national of|my (?:home )?country is|my nationality is)\s+(?:the\s+)?$",
+    re.IGNORECASE
+)
+
+# A plain "no" to "Have you applied for asylum before?": these words only, with a negation
+_NEGATIONS = {"no", "nope", "never", "none", "not", "haven't", "havent", "didn't", "didnt", "hadn't"}
+_NO_APPLICATION_WORDS = _NEGATIONS | {
+    "i", "have", "had", "did", "applied", "apply", "for", "asylum", "before", "anywhere", "else",
+    "elsewhere", "ever", "yet", "previously", "made", "an", "any", "application", "applications",
+}
+
+
+def _mentions_all(text: str, vocabulary) -> List[Tuple[int, int, str]]:
+    """
+    (start, end, entry) of every vocabulary entry appearing as whole words in
+    `text`, longest entries first and without overlaps, in text order
+    """
+    found = []
+    for entry in sorted(vocabulary, key=len, reverse=True):
+        for match in re.finditer(r"(?<![\w'])" + re.escape(entry) + r"(?![\w'])", text, re.IGNORECASE):
+            if all(match.end() <= start or match.start() >= end for start, end, _ in found):
+                found.append((match.start(), match.end(), entry))
+    return sorted(found)
+
+
+def _bare(text: str) -> str:
+    """An answer without surrounding whitespace and closing punctuation"""
+    return text.strip().rstrip('.!').strip()
+
+
+def validate_name(text: str) -> Optional[str]:
+    """
+    A short answer that is only a name of two or more capitalised words,
+    e.g. "Benjamin Ching" or "My name is Amina Yusuf". Anything else, such as
+    a question back ("Sorry. What did you say?"), goes to the model.
+    """
+    answer = _bare(_LEAD_IN.sub('', text, count=1))
+    if not answer or re.search(r"[?!.;:]", answer):
+        return None
+    tokens = answer.replace(',', ' ').split()
+    if not 2 <= len(tokens) <= 5:
+        return None
+    for token in tokens:
+        if not _NAME_TOKEN.match(token) or token.lower() in _NAME_STOPWORDS:
+            return None
+        if not token[0].isupper() and token.lower() not in _NAME_PARTICLES:
+            return None
+    if sum(1 for token in tokens if token[0].isupper()) < 2:
+        return None
+    return " ".join(tokens)
+
+
+def validate_country(text: str) -> Optional[str]:
+    """
+    The country of origin, when the answer is just a known country ("Syria."),
+    names it in an origin phrase ("I am from Eritrea") or gives the
+    nationality ("I'm Afghan"). Answers mentioning more than one country
+    (transit, earlier asylum) go to the model.
+    """
+    answer = _bare(text)
+    countries = _mentions_all(answer, KNOWN_COUNTRIES)
+    if len({entry for _, _, entry in countries}) > 1:
+        return None
+
+    if countries:
+        start, end, _ = countries[0]
+        before = answer[:start]
+        if re.fullmatch(r"\s*(?:the\s+)?", before, re.IGNORECASE) and not answer[end:].strip():
+            return answer[start:end]
+        if _ORIGIN_PHRASE.search(before):
+            return answer[start:end]
+        return None
+
+    match = re.fullmatch(r"(?:i am|i'm|we are|we're)\s+(?:an?\s+)?(" + "|".join(
+        re.escape(demonym) for demonym in sorted(DEMONYMS, key=len, reverse=True)) + r")(?:\s+citizen)?",
+        answer, re.IGNORECASE)
+    if match:
+        return DEMONYMS[match.group(1).lower()].title()
+    return None
+
+
+def validate_language(text: str) -> Optional[str]:
+    """
+    Every language of a short answer made only of known languages and
+    joiners ("Tigrinya and Amharic", "My native language is Dari."), in the
+    order given. A sentence saying anything else about them ("I don't speak
+    Arabic", "I only understand a little English") goes to the model.
+    """
+    if re.search(r"[?;:]", text):
+        return None
+    words = re.findall(r"[\w']+", _LANGUAGE_LEAD_IN.sub('', _bare(text), count=1).lower())
+    if not words or len(words) > 8 or any(word not in KNOWN_LANGUAGES | _LANGUAGE_JOINERS for word in words):
+        return None
+    languages = [word for word in dict.fromkeys(words) if word in KNOWN_LANGUAGES]
+    if not languages:
+        return None
+    return ", ".join(language.title() for language in languages)
+
+
+def validate_no_previous_application(text: str) -> Optional[str]:
+    """
+    A clear, short "no" ("No.", "No, never.", "I have not applied before").
+    Anything more (a "but", a place, a second statement) falls through, as
+    does a "yes", since whether its outcome needs a follow-up is left to the
+    model.
+    """
+    if re.search(r"[?;:]", text) or len(re.findall(r"[.!,]+\s*\S", text)) > 1:
+        return None
+    words = re.findall(r"[\w']+", text.lower())
+    if not words or len(words) > 10 or any(word not in _NO_APPLICATION_WORDS for word in words):
+        return None
+    # "No, I have applied before" is not a no: whatever follows an opening "no" must be negated too
+    rest = words[1:] if words[0] in ("no", "nope") else words
+    if rest and not _NEGATIONS.intersection(rest):
+        return None
+    return "No previous asylum applications"
+
+
+DEFAULT_VALIDATORS = {
+    "personal_information": validate_name,
+    "origin": validate_country,
+    "language": validate_language,
+    "legal_history": validate_no_previous_application,
+}
+
+
+class PreClassifier:
+    """Decides obviously adequate answers locally, keyed by question category"""
+
+    def __init__(self, validators: Optional[Dict[str, Callable[[str], Optional[str]]]] = None):
+        self.validators = dict(DEFAULT_VALIDATORS if validators is None else validators)
+        self.checked = 0
+        self.skipped = 0
+        self._lock = threading.Lock()
+
+    def classify(self, transcribed_text: str, question_data: Dict) -> Optional[Dict]:
+        """processed_info for a recognised answer, or None when the model should decide"""
+        validator = self.validators.get(question_data['category'])
+        extracted = validator(transcribed_text) if validator else None
+
+        with self._lock:
+            self.checked += 1
+            if extracted is not None:
+                self.skipped += 1
+
+        if extracted is None:
+            return None
+
+        return {
+            "extracted_info": extracted,
+            "adequately_answered": True,
+            "concerns": [],
+            "follow_up_needed": False,
+            "suggested_follow_up": "",
+            "confidence_level": 8,
+            "summary": f"{question_data['category']}: {extracted}",
+            "classified_by": "preclassifier"
+        }
+
+    def stats(self) -> Dict:
+        return {
+            "checked": self.checked,
+            "skipped": self.skipped,
+            "skip_rate": self.skipped / self.checked if self.checked else 0.0,
+        }
+
+
+def preclassifier_from_env() -> Optional[PreClassifier]:
+    """PreClassifier when PRECLASSIFIER_ENABLED is set, otherwise None"""
+    if os.getenv('PRECLASSIFIER_ENABLED', 'false').lower() != 'true':
+        return None
+    return PreClassifier()
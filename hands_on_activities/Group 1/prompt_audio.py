@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+"""
+Pre-rendered audio for the fixed interview script.
+
+The questions, follow-ups and system messages are the same in every session,
+so synthesising them live on every speak() is wasted time. PromptAudioCache
+renders each string once to a WAV file keyed by text, voice, rate and volume,
+and the agent plays the file back instead of running synthesis.
+
+The cache can be warmed at agent start-up (in the background) or ahead of
+time from the command line:
+
+    python prompt_audio.py [--workers 4]
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable, List, Optional
+
+from dotenv import load_dotenv
+
+
+class PromptAudioCache:
+    """Directory of rendered prompts, one WAV file per (text, voice, rate, volume)"""
+
+    def __init__(self, tts, directory: str = './.cache/prompts', workers: int = 4):
+        self.tts = tts
+        self.directory = directory
+        self.workers = workers
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+
+    def _signature(self) -> List:
+        if hasattr(self.tts, 'voice_signature'):
+            return list(self.tts.voice_signature())
+        return [type(self.tts).__name__]
+
+    def path_for(self, text: str) -> str:
+        key = hashlib.sha256(
+            json.dumps([text, *self._signature()], ensure_ascii=False).encode('utf-8')
+        ).hexdigest()
+        return os.path.join(self.directory, f"{key}.wav")
+
+    def get(self, text: str) -> Optional[str]:
+        """Path of the rendered prompt, or None if it has not been rendered"""
+        path = self.path_for(text)
+        found = os.path.exists(path) and os.path.getsize(path) > 0
+        with self._lock:
+            if found:
+                self.hits += 1
+            else:
+                self.misses += 1
+        return path if found else None
+
+    def warm(self, texts: Iterable[str]) -> int:
+        """Render every prompt not yet in the cache; return how many were rendered"""
+        missing = []
+        for text in dict.fromkeys(texts):
+            path = self.path_for(text)
+            if not os.path.exists(path):
+                # Render beside the final file, then move it into place atomically
+                missing.append((text, path, f"{path}.{os.getpid()}.tmp.wav"))
+        if not missing:
+            return 0
+
+        items = [(text, temp_path) for text, _, temp_path in missing]
+        if hasattr(self.tts, 'render_many'):
+            rendered = self.tts.render_many(items, self.workers)
+        else:
+            with ThreadPoolExecutor(max_workers=self.workers) as pool:
+                rendered = list(pool.map(lambda item: self.tts.render(*item), items))
+
+        count = 0
+        for (_, path, temp_path), result in zip(missing, rendered):
+            if result and os.path.exists(temp_path) and os.path.getsize(temp_path) > 0:
+                os.replace(temp_path, path)
+                count += 1
+            elif os.path.exists(temp_path):
+                os.unlink(temp_path)
+        return count
+
+    def warm_in_background(self, texts: Iterable[str]) -> threading.Thread:
+        """Warm the cache on a daemon thread so start-up does not wait for it"""
+        texts = list(texts)
+        # Settle the voice (and so the cache keys) on the calling thread, since
+        # some TTS engines must be started on the main thread
+        self._signature()
+        thread = threading.Thread(target=self._warm_quietly, args=(texts,), daemon=True)
+        thread.start()
+        return thread
+
+    def _warm_quietly(self, texts: List[str]):
+        try:
+            start = time.perf_counter()
+            count = self.warm(texts)
+            if count:
+                print(f"🔊 Prompt audio cache: rendered {count} prompts in {time.perf_counter() - start:.1f}s")
+        except Exception as e:
+            print(f"⚠️ Prompt audio warm-up failed: {e}")
+
+    def stats(self) -> Dict:
+        return {"hits": self.hits, "misses": self.misses}
+
+
+def prompt_cache_from_env(tts) -> Optional[PromptAudioCache]:
+    """PromptAudioCache described by the PROMPT_CACHE_* settings, or None when disabled"""
+    if os.getenv('PROMPT_CACHE_ENABLED', 'false').lower() != 'true':
+        return None
+    return PromptAudioCache(
+        tts,
+        directory=os.getenv('PROMPT_CACHE_DIRECTORY', './.cache/prompts'),
+        workers=int(os.getenv('PROMPT_CACHE_WORKERS', 4))
+    )
+
+
+def main():
+    """Render the whole question script ahead of time"""
+    load_dotenv()
+
+    parser = argparse.ArgumentParser(description="Pre-render the interview prompts to audio files")
+    parser.add_argument('--workers', type=int, default=int(os.getenv('PROMPT_CACHE_WORKERS', 4)),
+                        help="Prompts rendered in parallel")
+    parser.add_argument('--directory', default=os.getenv('PROMPT_CACHE_DIRECTORY', './.cache/prompts'))
+    args = parser.parse_args()
+
+    from backends import Pyttsx3TTS, SilentAudioInput, create_local_backends
+    from voice_test import AsylumInterviewAgent
+
+    os.environ['PROMPT_CACHE_ENABLED'] = 'false'  # the agent must not start its own warm-up
+    backends = create_local_backends()
+    agent = AsylumInterviewAgent(transcriber=backends['transcriber'], analyser=backends['analyser'],
+                                 tts=Pyttsx3TTS(), audio_input=SilentAudioInput())
+    cache = PromptAudioCache(agent.tts, args.directory, args.workers)
+
+    prompts = agent.script_prompts()
+    start = time.perf_counter()
+    count = cache.warm(prompts)
+    print(f"🔊 {count} of {len(prompts)} prompts rendered into {args.directory} "
+          f"in {time.perf_counter() - start:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,262 @@
+"""
+Declarative question flows.
+
+A flow file (JSON, or YAML when PyYAML is installed) lists the interview
+questions in their default order. Each question may add rules that are
+evaluated locally on answers already analysed, so irrelevant questions are
+cut without any extra model call:
+
+    {
+      "start": "personal_info_1",
+      "questions": [
+        {"id": "family_1", "category": "family", "required": false,
+         "question": "Do you have any family members with you or still in your home country?",
+         "follow_up": "Are any family members in danger?",
+         "follow_up_if": {"all": [{"field": "follow_up_needed", "equals": true},
+                                  {"not": {"field": "raw_response", "matches": "^\\\\s*no\\\\b"}}]},
+         "branches": [{"if": {"field": "extracted_info", "matches": "no family"}, "goto": "documentation"}],
+         "next": "previous_applications"},
+        ...
+      ]
+    }
+
+Conditions test a field of a question's processed_info (or of the stored
+answer itself, e.g. raw_response or language): equals, not_equals, in,
+matches (case-insensitive regex), below, at_least, exists; combined with
+all / any / not. "question" names another question whose answer is tested;
+by default it is the question just asked. A missing answer or field never
+matches. "next" and "goto" take a question id or "END"; without "next" the
+following question in the file is next.
+
+compile_flow() validates the file and precompiles every rule into a
+predicate and every edge into a question index, so walking the flow during
+an interview is a few dictionary lookups. FlowSource reloads the file when it
+changes on disk.
+"""
+
+import importlib
+import json
+import os
+import re
+from typing import Callable, Dict, List, Optional
+
+END = "END"
+
+DEFAULT_FLOW_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'question_flows', 'asylum_interview.json')
+
+# Answers so far (question id -> interview_data entry) and the id of the question just asked
+Predicate = Callable[[Dict[str, Dict], str], bool]
+
+_MISSING = object()
+
+
+def _field_value(answers: Dict[str, Dict], question_id: str, field: str):
+    entry = answers.get(question_id)
+    if entry is None:
+        return _MISSING
+    processed_info = entry.get('processed_info') or {}
+    if field in processed_info:
+        return processed_info[field]
+    return entry.get(field, _MISSING)
+
+
+def compile_condition(condition: Dict, where: str) -> Predicate:
+    """Turn one condition into a predicate; raise ValueError on a malformed condition"""
+    if not isinstance(condition, dict):
+        raise ValueError(f"{where}: a condition must be an object, got {condition!r}")
+
+    if 'all' in condition:
+        parts = [compile_condition(part, where) for part in condition['all']]
+        return lambda answers, current: all(part(answers, current) for part in parts)
+    if 'any' in condition:
+        parts = [compile_condition(part, where) for part in condition['any']]
+        return lambda answers, current: any(part(answers, current) for part in parts)
+    if 'not' in condition:
+        inner = compile_condition(condition['not'], where)
+        return lambda answers, current: not inner(answers, current)
+
+    if 'field' not in condition:
+        raise ValueError(f"{where}: condition needs 'field' (or all / any / not): {condition!r}")
+    field = condition['field']
+    question = condition.get('question')
+
+    if 'equals' in condition:
+        expected = condition['equals']
+        test = lambda value: value == expected
+    elif 'not_equals' in condition:
+        expected = condition['not_equals']
+        test = lambda value: value != expected
+    elif 'in' in condition:
+        options = list(condition['in'])
+        test = lambda value: value in options
+    elif 'matches' in condition:
+        try:
+            pattern = re.compile(condition['matches'], re.IGNORECASE)
+        except re.error as e:
+            raise ValueError(f"{where}: bad pattern {condition['matches']!r}: {e}")
+        test = lambda value: isinstance(value, str) and pattern.search(value) is not None
+    elif 'below' in condition:
+        limit = condition['below']
+        test = lambda value: isinstance(value, (int, float)) and value < limit
+    elif 'at_least' in condition:
+        limit = condition['at_least']
+        test = lambda value: isinstance(value, (int, float)) and value >= limit
+    elif 'exists' in condition:
+        wanted = bool(condition['exists'])
+        return lambda answers, current: \
+            (_field_value(answers, question or current, field) is not _MISSING) == wanted
+    else:
+        raise ValueError(f"{where}: condition on '{field}' has no test "
+                         f"(equals, not_equals, in, matches, below, at_least, exists)")
+
+    def predicate(answers: Dict[str, Dict], current: str) -> bool:
+        value = _field_value(answers, question or current, field)
+        return value is not _MISSING and test(value)
+    return predicate
+
+
+# The rule used when a question does not say when to ask its follow-up
+DEFAULT_FOLLOW_UP_IF = {"field": "follow_up_needed", "equals": True}
+
+
+class CompiledFlow:
+    """
+    A validated question flow with every edge resolved to a question index.
+
+    `questions` keeps the file order (and the question dict layout the agent
+    has always used), so code that lists or counts questions is unaffected.
+    """
+
+    def __init__(self, definition: Dict, source: str = "<flow>"):
+        questions = definition.get('questions')
+        if not questions:
+            raise ValueError(f"{source}: flow has no questions")
+
+        self.source = source
+        self.questions: List[Dict] = []
+        self.index: Dict[str, int] = {}
+        for position, node in enumerate(questions):
+            for key in ('id', 'category', 'question'):
+                if not node.get(key):
+                    raise ValueError(f"{source}: question #{position + 1} has no '{key}'")
+            if node['id'] in self.index or node['id'] == END:
+                raise ValueError(f"{source}: duplicate or reserved question id '{node['id']}'")
+            self.index[node['id']] = position
+            self.questions.append({
+                "id": node['id'],
+                "category": node['category'],
+                "question": node['question'],
+                "required": bool(node.get('required', False)),
+                "follow_up": node.get('follow_up'),
+            })
+
+        start = definition.get('start', questions[0]['id'])
+        self.start = self._resolve(start, f"{source}: start")
+
+        self._default_next: List[Optional[int]] = []
+        self._branches: List[List] = []
+        self._follow_up_if: List[Predicate] = []
+        self._successors: List[List[int]] = []
+        for position, node in enumerate(questions):
+            where = f"{source}: {node['id']}"
+            default = node.get('next', questions[position + 1]['id'] if position + 1 < len(questions) else END)
+            default_index = self._resolve(default, f"{where}.next")
+
+            branches = []
+            for number, branch in enumerate(node.get('branches') or []):
+                if 'if' not in branch or 'goto' not in branch:
+                    raise ValueError(f"{where}: branch #{number + 1} needs 'if' and 'goto'")
+                branches.append((compile_condition(branch['if'], f"{where}.branches[{number}]"),
+                                 self._resolve(branch['goto'], f"{where}.branches[{number}].goto")))
+
+            self._default_next.append(default_index)
+            self._branches.append(branches)
+            self._follow_up_if.append(
+                compile_condition(node.get('follow_up_if', DEFAULT_FOLLOW_UP_IF), f"{where}.follow_up_if"))
+            self._successors.append(list(dict.fromkeys(
+                target for target in [target for _, target in branches] + [default_index] if target is not None
+            )))
+
+    def _resolve(self, question_id: str, where: str) -> Optional[int]:
+        if question_id == END or question_id is None:
+            return None
+        if question_id not in self.index:
+            raise ValueError(f"{where}: unknown question '{question_id}'")
+        return self.index[question_id]
+
+    def next_index(self, position: int, answers: Dict[str, Dict]) -> Optional[int]:
+        """Index of the question after `position` given the answers so far; None at the end"""
+        current = self.questions[position]['id']
+        for predicate, target in self._branches[position]:
+            if predicate(answers, current):
+                return target
+        return self._default_next[position]
+
+    def has_branches(self, position: int) -> bool:
+        """Whether the question after `position` can depend on its answer"""
+        return bool(self._branches[position])
+
+    def wants_follow_up(self, position: int, answers: Dict[str, Dict]) -> bool:
+        """Whether the question's follow-up should be asked, given its answer"""
+        question_data = self.questions[position]
+        return bool(question_data.get('follow_up')) and \
+            self._follow_up_if[position](answers, question_data['id'])
+
+    def successors(self, position: int) -> List[int]:
+        """Every question that can come directly after `position`"""
+        return self._successors[position]
+
+
+def load_flow_definition(path: str) -> Dict:
+    """Parse a JSON or YAML flow file"""
+    with open(path, 'r', encoding='utf-8') as f:
+        text = f.read()
+    if path.endswith(('.yaml', '.yml')):
+        try:
+            yaml = importlib.import_module('yaml')
+        except ImportError:
+            raise ValueError(f"{path}: reading YAML flows needs PyYAML (pip install pyyaml)")
+        return yaml.safe_load(text)
+    return json.loads(text)
+
+
+def compile_flow(path: str) -> CompiledFlow:
+    return CompiledFlow(load_flow_definition(path), source=path)
+
+
+class FlowSource:
+    """A flow file, recompiled when its modification time changes"""
+
+    def __init__(self, path: str, reload: bool = True):
+        self.path = path
+        self.reload = reload
+        self._mtime = os.path.getmtime(path)
+        self.flow = compile_flow(path)
+
+    def refresh(self) -> bool:
+        """
+        Recompile the flow if the file changed; True when a new flow is in
+        place. A file that fails to compile is reported and the previous flow
+        kept, so a bad edit cannot stop a running interview.
+        """
+        if not self.reload:
+            return False
+        try:
+            mtime = os.path.getmtime(self.path)
+            if mtime == self._mtime:
+                return False
+            self._mtime = mtime
+            self.flow = compile_flow(self.path)
+        except (OSError, ValueError) as e:
+            print(f"⚠️ Question flow not reloaded: {e}")
+            return False
+        print(f"🔁 Question flow reloaded from {self.path}")
+        return True
+
+
+def flow_source_from_env() -> FlowSource:
+    """The flow named by QUESTION_FLOW (default: the built-in asylum interview flow)"""
+    return FlowSource(
+        os.getenv('QUESTION_FLOW') or DEFAULT_FLOW_PATH,
+        reload=os.getenv('QUESTION_FLOW_RELOAD', 'true').lower() == 'true'
+    )
@@ -0,0 +1,298 @@
+#!/usr/bin/env python3
+"""
+Streaming report engine for single interviews and whole archives.
+
+Sessions come from a generator (saved JSON files are read one at a time, or
+a live agent's interview_data), each session is rendered to one string and
+written to a large buffered file, and only running totals are kept between
+sessions. Memory use therefore stays flat however many sessions a report
+covers.
+
+Formats: text (the layout of the per-interview summary report), csv (one row
+per answer) and html (a self-contained page). The text and html reports end
+with caseload totals per category and language.
+
+    python report.py [DIRECTORY] --format html --since 2025-06-02 --until 2025-06-09 --output weekly.html
+    python report.py --format csv --output answers.csv
+"""
+
+import argparse
+import csv
+import html
+import io
+import json
+import os
+from collections import namedtuple
+from datetime import datetime
+from typing import Dict, Iterable, Iterator, Optional
+
+from dotenv import load_dotenv
+
+BUFFER_SIZE = 1024 * 1024
+
+# One interview: where it came from, its interview_metadata and interview_data
+Session = namedtuple('Session', ['source', 'metadata', 'interview_data'])
+
+
+def iter_session_files(directory: str, file_prefix: str = 'asylum_interview_',
+                       since: Optional[str] = None, until: Optional[str] = None) -> Iterator[Session]:
+    """
+    Saved interviews in `directory`, oldest first, loaded one at a time.
+    `since` / `until` are ISO dates compared with the interview timestamp.
+    """
+    paths = sorted(
+        entry.path for entry in os.scandir(directory)
+        if entry.name.startswith(file_prefix) and entry.name.endswith('.json')
+        and not entry.name.endswith('.trace.json') and '_summary_' not in entry.name
+    )
+    for path in paths:
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                document = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"⚠️ Skipping {path}: {e}")
+            continue
+        metadata = document.get('interview_metadata', {})
+        timestamp = metadata.get('timestamp', '')
+        if (since and timestamp < since) or (until and timestamp >= until):
+            continue
+        yield Session(path, metadata, document.get('interview_data', {}))
+
+
+class CaseloadTotals:
+    """Running totals across sessions; size depends on categories and languages, not sessions"""
+
+    def __init__(self):
+        self.sessions = 0
+        self.incomplete_sessions = 0
+        self.answers = 0
+        self.categories = {}
+        self.languages = {}
+        self.first_timestamp = None
+        self.last_timestamp = None
+
+    def add(self, session: Session):
+        self.sessions += 1
+        metadata = session.metadata
+        if metadata.get('answered_questions', 0) < metadata.get('total_questions', 0):
+            self.incomplete_sessions += 1
+        timestamp = metadata.get('timestamp')
+        if timestamp:
+            self.first_timestamp = min(self.first_timestamp or timestamp, timestamp)
+            self.last_timestamp = max(self.last_timestamp or timestamp, timestamp)
+
+        for data in session.interview_data.values():
+            self.answers += 1
+            processed_info = data.get('processed_info') or {}
+            totals = self.categories.setdefault(data.get('category', 'unknown'), {
+                "answers": 0, "confidence_sum": 0.0, "confidence_count": 0,
+                "inadequate": 0, "follow_up_needed": 0, "with_concerns": 0
+            })
+            totals["answers"] += 1
+            confidence = processed_info.get('confidence_level')
+            if isinstance(confidence, (int, float)):
+                totals["confidence_sum"] += confidence
+                totals["confidence_count"] += 1
+            if processed_info.get('adequately_answered') is False:
+                totals["inadequate"] += 1
+            if processed_info.get('follow_up_needed'):
+                totals["follow_up_needed"] += 1
+            if processed_info.get('concerns'):
+                totals["with_concerns"] += 1
+
+            language = data.get('language') or 'unknown'
+            self.languages[language] = self.languages.get(language, 0) + 1
+
+    def category_rows(self) -> Iterator[Dict]:
+        for category, totals in sorted(self.categories.items()):
+            count = totals["confidence_count"]
+            yield {
+                "category": category,
+                "answers": totals["answers"],
+                "avg_confidence": totals["confidence_sum"] / count if count else None,
+                "inadequate": totals["inadequate"],
+                "follow_up_needed": totals["follow_up_needed"],
+                "with_concerns": totals["with_concerns"],
+            }
+
+
+def answer_blocks(interview_data: Dict) -> str:
+    """The per-question section of the text summary report"""
+    lines = []
+    for data in interview_data.values():
+        lines.append(f"QUESTION: {data['question']}\n")
+        lines.append(f"CATEGORY: {data['category']}\n")
+        lines.append(f"RESPONSE: {data['raw_response']}\n")
+
+        if 'processed_info' in data and 'summary' in data['processed_info']:
+            lines.append(f"SUMMARY: {data['processed_info']['summary']}\n")
+
+        if 'follow_up' in data:
+            lines.append(f"FOLLOW-UP: {data['follow_up']['response']}\n")
+
+        lines.append("-" * 30 + "\n\n")
+    return "".join(lines)
+
+
+class TextReport:
+    extension = 'txt'
+
+    def begin(self, title: str) -> str:
+        return f"{title.upper()}\n" + "=" * 50 + "\n\n" + \
+            f"Generated: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n\n"
+
+    def session(self, session: Session, detail: bool) -> str:
+        metadata = session.metadata
+        languages = metadata.get('detected_languages') or []
+        header = (f"SESSION: {os.path.basename(session.source)}\n"
+                  f"Interview Date: {metadata.get('timestamp', 'unknown')}\n"
+                  f"Questions Answered: {len(session.interview_data)}/{metadata.get('total_questions', '?')}\n"
+                  f"Languages Detected: {', '.join(languages) if languages else 'None detected'}\n")
+        if not detail:
+            return header + "\n"
+        return header + "\n" + answer_blocks(session.interview_data) + "\n"
+
+    def end(self, totals: CaseloadTotals) -> str:
+        lines = ["CASELOAD TOTALS\n", "=" * 50 + "\n",
+                 f"Sessions: {totals.sessions} ({totals.incomplete_sessions} incomplete)\n",
+                 f"Period: {totals.first_timestamp or '-'} to {totals.last_timestamp or '-'}\n",
+                 f"Answers: {totals.answers}\n\n",
+                 f"{'category':<22}{'answers':>8}{'avg conf':>10}{'inadequate':>12}{'follow-up':>11}{'concerns':>10}\n"]
+        for row in totals.category_rows():
+            confidence = f"{row['avg_confidence']:.1f}" if row['avg_confidence'] is not None else "-"
+            lines.append(f"{row['category']:<22}{row['answers']:>8}{confidence:>10}{row['inadequate']:>12}"
+                         f"{row['follow_up_needed']:>11}{row['with_concerns']:>10}\n")
+        lines.append("\nLanguages: " + (", ".join(
+            f"{language} {count}" for language, count in sorted(totals.languages.items(), key=lambda item: -item[1])
+        ) or "none") + "\n")
+        return "".join(lines)
+
+
+class CSVReport:
+    """One row per answer; the caseload totals are left out, since CSV has no place for them"""
+    extension = 'csv'
+    COLUMNS = ["session", "interview_date", "question_id", "category", "language", "confidence_level",
+               "adequately_answered", "follow_up_needed", "concerns", "response", "summary", "follow_up"]
+
+    def _rows(self, rows) -> str:
+        buffer = io.StringIO()
+        csv.writer(buffer).writerows(rows)
+        return buffer.getvalue()
+
+    def begin(self, title: str) -> str:
+        return self._rows([self.COLUMNS])
+
+    def session(self, session: Session, detail: bool) -> str:
+        name = os.path.basename(session.source)
+        timestamp = session.metadata.get('timestamp', '')
+        rows = []
+        for question_id, data in session.interview_data.items():
+            processed_info = data.get('processed_info') or {}
+            rows.append([
+                name, timestamp, question_id, data.get('category'), data.get('language'),
+                processed_info.get('confidence_level'), processed_info.get('adequately_answered'),
+                processed_info.get('follow_up_needed'), "; ".join(map(str, processed_info.get('concerns') or [])),
+                data.get('raw_response'), processed_info.get('summary'), (data.get('follow_up') or {}).get('response')
+            ])
+        return self._rows(rows)
+
+    def end(self, totals: CaseloadTotals) -> str:
+        return ""
+
+
+class HTMLReport:
+    extension = 'html'
+
+    def begin(self, title: str) -> str:
+        return (f"<!DOCTYPE html>\n<html><head><meta charset=\"utf-8\"><title>{html.escape(title)}</title>\n"
+                "<style>body{font-family:sans-serif;margin:2em}table{border-collapse:collapse;margin-bottom:1.5em}"
+                "td,th{border:1px solid #ccc;padding:4px 8px;text-align:left;vertical-align:top}"
+                ".low{background:#fdd}</style></head><body>\n"
+                f"<h1>{html.escape(title)}</h1>\n"
+                f"<p>Generated {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}</p>\n")
+
+    def session(self, session: Session, detail: bool) -> str:
+        metadata = session.metadata
+        parts = [f"<h2>{html.escape(os.path.basename(session.source))}</h2>\n"
+                 f"<p>{html.escape(str(metadata.get('timestamp', 'unknown')))} &middot; "
+                 f"{len(session.interview_data)}/{metadata.get('total_questions', '?')} questions answered</p>\n"]
+        if detail:
+            parts.append("<table><tr><th>Category</th><th>Question</th><th>Response</th><th>Summary</th>"
+                         "<th>Confidence</th><th>Concerns</th></tr>\n")
+            for data in session.interview_data.values():
+                processed_info = data.get('processed_info') or {}
+                confidence = processed_info.get('confidence_level')
+                low = isinstance(confidence, (int, float)) and confidence < 5
+                response = data.get('raw_response', '')
+                if 'follow_up' in data:
+                    response += f"\n\nFollow-up: {data['follow_up']['response']}"
+                cells = [data.get('category'), data.get('question'), response, processed_info.get('summary'),
+                         confidence, "; ".join(map(str, processed_info.get('concerns') or []))]
+                row_open = '<tr class="low">' if low else "<tr>"
+                parts.append(row_open + "".join(
+                    "<td>" + html.escape("" if cell is None else str(cell)).replace("\n", "<br>") + "</td>"
+                    for cell in cells
+                ) + "</tr>\n")
+            parts.append("</table>\n")
+        return "".join(parts)
+
+    def end(self, totals: CaseloadTotals) -> str:
+        parts = ["<h2>Caseload totals</h2>\n",
+                 f"<p>{totals.sessions} sessions ({totals.incomplete_sessions} incomplete), {totals.answers} answers, "
+                 f"{html.escape(str(totals.first_timestamp or '-'))} to {html.escape(str(totals.last_timestamp or '-'))}</p>\n",
+                 "<table><tr><th>Category</th><th>Answers</th><th>Avg confidence</th><th>Inadequate</th>"
+                 "<th>Follow-up needed</th><th>With concerns</th></tr>\n"]
+        for row in totals.category_rows():
+            confidence = f"{row['avg_confidence']:.1f}" if row['avg_confidence'] is not None else "-"
+            parts.append(f"<tr><td>{html.escape(row['category'])}</td><td>{row['answers']}</td><td>{confidence}</td>"
+                         f"<td>{row['inadequate']}</td><td>{row['follow_up_needed']}</td>"
+                         f"<td>{row['with_concerns']}</td></tr>\n")
+        parts.append("</table>\n<table><tr><th>Language</th><th>Answers</th></tr>\n")
+        for language, count in sorted(totals.languages.items(), key=lambda item: -item[1]):
+            parts.append(f"<tr><td>{html.escape(language)}</td><td>{count}</td></tr>\n")
+        parts.append("</table>\n</body></html>\n")
+        return "".join(parts)
+
+
+FORMATS = {"text": TextReport, "csv": CSVReport, "html": HTMLReport}
+
+
+def write_report(sessions: Iterable[Session], path: str, report_format: str = 'text',
+                 detail: bool = True, title: str = "Asylum Interview Caseload Report") -> CaseloadTotals:
+    """Stream `sessions` into a report file; return the caseload totals"""
+    formatter = FORMATS[report_format]()
+    totals = CaseloadTotals()
+    with open(path, 'w', encoding='utf-8', newline='', buffering=BUFFER_SIZE) as f:
+        f.write(formatter.begin(title))
+        for session in sessions:
+            totals.add(session)
+            f.write(formatter.session(session, detail))
+        f.write(formatter.end(totals))
+    return totals
+
+
+def main():
+    """Write a caseload report over a directory of saved interviews"""
+    load_dotenv()
+
+    parser = argparse.ArgumentParser(description="Caseload report across saved asylum interviews")
+    parser.add_argument('directory', nargs='?', default=os.getenv('OUTPUT_DIRECTORY', './interviews'))
+    parser.add_argument('--format', choices=sorted(FORMATS), default='text')
+    parser.add_argument('--output', help="Report file (default: caseload_<timestamp>.<ext> in the directory)")
+    parser.add_argument('--since', help="Interviews on or after this ISO date, e.g. 2025-06-02")
+    parser.add_argument('--until', help="Interviews before this ISO date")
+    parser.add_argument('--totals-only', action='store_true', help="Leave out the individual answers")
+    args = parser.parse_args()
+
+    output = args.output or os.path.join(
+        args.directory, f"caseload_{datetime.now().strftime('%Y%m%d_%H%M%S')}.{FORMATS[args.format].extension}"
+    )
+    sessions = iter_session_files(args.directory, os.getenv('FILE_PREFIX', 'asylum_interview_'),
+                                  args.since, args.until)
+    totals = write_report(sessions, output, args.format, detail=not args.totals_only)
+
+    print(f"📄 {totals.sessions} sessions, {totals.answers} answers reported in: {output}")
+
+
+if __name__ == "__main__":
+    main()
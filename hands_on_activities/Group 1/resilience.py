@@ -0,0 +1,459 @@
+"""
+Resilient calls to the transcription and analysis services.
+
+A failed network call should not make the applicant answer again. The
+ResilientCaller retries only the stage that failed, with jittered
+exponential backoff (honouring Retry-After), inside a per-stage time budget
+of QUESTION_TIMEOUT seconds. A circuit breaker per stage stops calling a
+service after several consecutive failures and lets one trial call through
+after CIRCUIT_RESET_SECONDS.
+
+When a call cannot be completed (budget spent, retries exhausted or circuit
+open) it raises CallDeferred and the agent degrades instead of re-asking:
+the recorded answer is kept in the OfflineQueue, a directory with a
+manifest in the format read by batch_process.py, so
+
+    python batch_process.py interviews/offline_queue
+
+transcribes and analyses the queued answers once the service is back; an
+answer whose analysis failed keeps a local verdict and is analysed again in
+the end-of-interview batch. Errors that retrying cannot fix (bad request,
+authentication) are raised unchanged.
+"""
+
+import asyncio
+import contextvars
+import json
+import os
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+from typing import Awaitable, Callable, Dict, Optional, Tuple
+
+from audio_capture import Audio, audio_bytes
+
+# Sessions in one process may share a queue directory and its manifest
+_manifest_lock = threading.Lock()
+
+
+def is_rate_limit_error(error: Exception) -> bool:
+    """True for HTTP 429 / RateLimitError style failures"""
+    return (getattr(error, 'status_code', None) == 429
+            or type(error).__name__ == 'RateLimitError')
+
+
+def is_transient_error(error: Exception) -> bool:
+    """True for failures worth retrying: rate limits, timeouts, 5xx, dropped connections"""
+    if is_rate_limit_error(error):
+        return True
+    status = getattr(error, 'status_code', None)
+    if status is not None:
+        return status >= 500
+    return type(error).__name__ in ('APIConnectionError', 'APITimeoutError', 'Timeout',
+                                     'ConnectionError', 'TimeoutError')
+
+
+def retry_after_seconds(error: Exception) -> Optional[float]:
+    """Read a Retry-After header from an API error, if the server sent one"""
+    response = getattr(error, 'response', None)
+    headers = getattr(response, 'headers', None) or {}
+    try:
+        return float(headers.get('retry-after'))
+    except (TypeError, ValueError):
+        return None
+
+
+class Cooldown:
+    """
+    A pause shared by everyone holding it: one rate-limited call sets it and
+    every caller waits it out before sending its next request.
+    """
+
+    def __init__(self):
+        self._resume_at = 0.0
+        self._lock = threading.Lock()
+
+    def remaining(self) -> float:
+        with self._lock:
+            return max(0.0, self._resume_at - time.monotonic())
+
+    def extend(self, delay: float):
+        """Pause every holder for at least `delay` seconds from now"""
+        with self._lock:
+            self._resume_at = max(self._resume_at, time.monotonic() + delay)
+
+    def wait(self) -> float:
+        """Sleep out the pause; return the seconds slept"""
+        delay = self.remaining()
+        if delay > 0:
+            time.sleep(delay)
+        return delay
+
+
+# The API account is shared by every agent, batch job and pooled client in the process
+_shared_cooldown = Cooldown()
+
+
+def shared_cooldown() -> Cooldown:
+    """The process-wide rate-limit cool-down"""
+    return _shared_cooldown
+
+
+class RateLimitBackoff:
+    """
+    Jittered exponential backoff shared by all workers.
+
+    A rate-limit response from one worker pauses every worker until the
+    cool-down has passed, so the pool backs off as a whole instead of each
+    thread hammering the API independently. Backoffs given the same
+    `cooldown` (see shared_cooldown()) pause together across sessions and
+    batch jobs.
+    """
+
+    def __init__(self, max_attempts: int = 6, base_delay: float = 1.0, max_delay: float = 60.0,
+                 cooldown: Optional[Cooldown] = None):
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.cooldown = cooldown or Cooldown()
+        self._lock = threading.Lock()
+        self.rate_limited = 0
+        self.retries = 0
+
+    def cooldown_remaining(self) -> float:
+        return self.cooldown.remaining()
+
+    def _wait_for_cooldown(self):
+        self.cooldown.wait()
+
+    def next_delay(self, attempt: int, error: Exception) -> float:
+        """Seconds to wait before retrying after `error` on attempt `attempt` (from 0)"""
+        delay = min(self.max_delay, self.base_delay * 2 ** attempt)
+        delay = random.uniform(delay / 2, delay)
+        server_delay = retry_after_seconds(error)
+        if server_delay is not None:
+            delay = max(delay, server_delay)
+        return delay
+
+    def note_retry(self, error: Exception, delay: float):
+        """Count a retry; a rate limit pauses every caller for `delay`"""
+        rate_limited = is_rate_limit_error(error)
+        with self._lock:
+            self.retries += 1
+            if rate_limited:
+                self.rate_limited += 1
+        if rate_limited:
+            self.cooldown.extend(delay)
+
+    def call(self, func: Callable, *args, **kwargs):
+        """Call func, retrying transient failures; re-raise anything else"""
+        for attempt in range(self.max_attempts):
+            self._wait_for_cooldown()
+            try:
+                return func(*args, **kwargs)
+            except Exception as e:
+                if not is_transient_error(e) or attempt == self.max_attempts - 1:
+                    raise
+
+                delay = self.next_delay(attempt, e)
+                self.note_retry(e, delay)
+                print(f"⏳ {type(e).__name__}, retrying in {delay:.1f}s")
+                time.sleep(delay)
+
+
+class CallDeferred(RuntimeError):
+    """A service call was given up on; the caller should degrade rather than fail"""
+
+    def __init__(self, stage: str, reason: str, pending=None):
+        super().__init__(f"{stage} deferred: {reason}")
+        self.stage = stage
+        self.reason = reason
+        # The abandoned attempt (a Future or Task) when the call overran its time budget; it
+        # may still be reading its arguments, so release them only once it is done
+        self.pending = pending
+
+
+class CircuitBreaker:
+    """
+    Opens after `failure_threshold` consecutive failures; after
+    `reset_timeout` seconds one trial call is let through (half-open), and
+    its outcome closes or re-opens the circuit.
+    """
+
+    CLOSED, OPEN, HALF_OPEN = 'closed', 'open', 'half_open'
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 60.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened = 0
+        self._opened_at = 0.0
+        self._trial_running = False
+        self._lock = threading.Lock()
+
+    def admit(self) -> Optional[bool]:
+        """None when no call may go out now, True for the half-open trial call, else False"""
+        with self._lock:
+            if self.state == self.CLOSED:
+                return False
+            if self.state == self.OPEN and time.monotonic() - self._opened_at >= self.reset_timeout:
+                self.state = self.HALF_OPEN
+            if self.state == self.HALF_OPEN and not self._trial_running:
+                self._trial_running = True
+                return True
+            return None
+
+    def allow(self) -> bool:
+        """Whether a call may go out now"""
+        return self.admit() is not None
+
+    def record_success(self):
+        with self._lock:
+            self.state = self.CLOSED
+            self.failures = 0
+            self._trial_running = False
+
+    def release_trial(self):
+        """End a trial call whose outcome said nothing about the service (e.g. a bad request)"""
+        with self._lock:
+            self._trial_running = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            self._trial_running = False
+            if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+                if self.state != self.OPEN:
+                    self.opened += 1
+                    print(f"🔌 Circuit opened after {self.failures} failed calls; "
+                          f"retrying in {self.reset_timeout:.0f}s")
+                self.state = self.OPEN
+                self._opened_at = time.monotonic()
+
+
+class ResilientCaller:
+    """Retries, time budget and circuit breaking for one session's service calls"""
+
+    def __init__(self, backoff: Optional[RateLimitBackoff] = None, timeout: Optional[float] = None,
+                 failure_threshold: int = 5, reset_timeout: float = 60.0):
+        self.backoff = backoff or RateLimitBackoff(max_attempts=4, base_delay=0.5, max_delay=8.0)
+        self.timeout = timeout or None
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.breakers: Dict[str, CircuitBreaker] = {}
+        self.counts = {"timeouts": 0, "deferred": 0, "short_circuited": 0}
+        self._lock = threading.Lock()
+        # Calls run here when they have a time budget; one that overruns is left to finish on its own
+        self._pool = ThreadPoolExecutor(max_workers=4, thread_name_prefix='resilient-call') if self.timeout else None
+
+    def breaker(self, stage: str) -> CircuitBreaker:
+        with self._lock:
+            if stage not in self.breakers:
+                self.breakers[stage] = CircuitBreaker(self.failure_threshold, self.reset_timeout)
+            return self.breakers[stage]
+
+    def _count(self, key: str):
+        with self._lock:
+            self.counts[key] += 1
+
+    def _defer(self, stage: str, reason: str, pending=None) -> CallDeferred:
+        self._count('deferred')
+        print(f"📥 {stage} deferred: {reason}")
+        return CallDeferred(stage, reason, pending)
+
+    def _budget(self) -> str:
+        return f" within {self.timeout:g}s" if self.timeout else ""
+
+    def _admit(self, stage: str) -> Tuple[Optional[float], bool]:
+        """Check the circuit; return the deadline for this call and whether it is the half-open trial"""
+        trial = self.breaker(stage).admit()
+        if trial is None:
+            self._count('short_circuited')
+            raise self._defer(stage, "circuit open")
+        return (time.monotonic() + self.timeout if self.timeout else None), trial
+
+    def _retry_delay(self, stage: str, attempt: int, error: Exception, deadline: Optional[float]) -> float:
+        """
+        Seconds to wait before the next attempt; raise CallDeferred when there
+        is none. The circuit counts one failure per call given up, not per attempt.
+        """
+        breaker = self.breaker(stage)
+        delay = self.backoff.next_delay(attempt, error)
+        reason = None
+        if attempt == self.backoff.max_attempts - 1:
+            reason = f"{type(error).__name__} after {attempt + 1} attempts: {error}"
+        elif breaker.state != CircuitBreaker.CLOSED:
+            reason = f"{type(error).__name__}, circuit open"
+        elif deadline is not None and time.monotonic() + delay >= deadline:
+            reason = f"{type(error).__name__}, no time left{self._budget()}"
+        if reason:
+            breaker.record_failure()
+            raise self._defer(stage, reason) from error
+        self.backoff.note_retry(error, delay)
+        print(f"⏳ {stage}: {type(error).__name__}, retrying in {delay:.1f}s")
+        return delay
+
+    def _timed_out(self, stage: str, pending) -> CallDeferred:
+        self._count('timeouts')
+        self.breaker(stage).record_failure()
+        return self._defer(stage, f"no reply{self._budget()}", pending)
+
+    def _result_by(self, stage: str, future, deadline: float):
+        """Wait for a submitted attempt until the deadline"""
+        try:
+            return future.result(timeout=max(0.0, deadline - time.monotonic()))
+        except FutureTimeout:
+            if future.done():
+                raise  # a TimeoutError raised by the call itself
+            raise self._timed_out(stage, future) from None
+
+    def call(self, stage: str, func: Callable, *args, **kwargs):
+        """
+        Call `func` for `stage` ("transcribe", "analyse"), retrying transient
+        failures; raise CallDeferred when the call has to be given up
+        """
+        deadline, trial = self._admit(stage)
+        breaker = self.breaker(stage)
+        try:
+            for attempt in range(self.backoff.max_attempts):
+                self.backoff._wait_for_cooldown()
+                try:
+                    if deadline is None:
+                        result = func(*args, **kwargs)
+                    else:
+                        future = self._pool.submit(contextvars.copy_context().run, func, *args, **kwargs)
+                        result = self._result_by(stage, future, deadline)
+                except CallDeferred:
+                    raise
+                except Exception as e:
+                    if not is_transient_error(e):
+                        raise
+                    time.sleep(self._retry_delay(stage, attempt, e, deadline))
+                else:
+                    breaker.record_success()
+                    return result
+        finally:
+            if trial:
+                breaker.release_trial()
+
+    async def acall(self, stage: str, make_call: Callable[[], Awaitable]):
+        """
+        call() for coroutines; `make_call` starts a fresh attempt. An attempt
+        that overruns the time budget is left to finish on its own, like a
+        thread in call().
+        """
+        deadline, trial = self._admit(stage)
+        breaker = self.breaker(stage)
+        try:
+            for attempt in range(self.backoff.max_attempts):
+                cooldown = self.backoff.cooldown_remaining()
+                if cooldown > 0:
+                    await asyncio.sleep(cooldown)
+                try:
+                    if deadline is None:
+                        result = await make_call()
+                    else:
+                        task = asyncio.ensure_future(make_call())
+                        done, _ = await asyncio.wait({task}, timeout=max(0.0, deadline - time.monotonic()))
+                        if not done:
+                            # Nobody awaits it any more; keep its eventual error from being logged
+                            task.add_done_callback(lambda t: t.cancelled() or t.exception())
+                            raise self._timed_out(stage, task)
+                        result = task.result()
+                except CallDeferred:
+                    raise
+                except Exception as e:
+                    if not is_transient_error(e):
+                        raise
+                    await asyncio.sleep(self._retry_delay(stage, attempt, e, deadline))
+                else:
+                    breaker.record_success()
+                    return result
+        finally:
+            if trial:
+                breaker.release_trial()
+
+    def stats(self) -> Dict:
+        with self._lock:
+            breakers = dict(self.breakers)
+        return dict(self.counts, retries=self.backoff.retries, rate_limited=self.backoff.rate_limited,
+                    circuits_opened=sum(breaker.opened for breaker in breakers.values()),
+                    open_circuits=[stage for stage, breaker in breakers.items()
+                                   if breaker.state != CircuitBreaker.CLOSED])
+
+    def close(self):
+        if self._pool is not None:
+            self._pool.shutdown(wait=False)
+
+
+def resilient_caller_from_env(question_timeout: float) -> ResilientCaller:
+    """
+    ResilientCaller configured from API_MAX_ATTEMPTS, API_BACKOFF_* and
+    CIRCUIT_*, observing the process-wide rate-limit cool-down
+    """
+    return ResilientCaller(
+        RateLimitBackoff(max_attempts=int(os.getenv('API_MAX_ATTEMPTS', 4)),
+                         base_delay=float(os.getenv('API_BACKOFF_BASE', 0.5)),
+                         max_delay=float(os.getenv('API_BACKOFF_MAX', 8)),
+                         cooldown=shared_cooldown()),
+        timeout=question_timeout,
+        failure_threshold=int(os.getenv('CIRCUIT_FAILURE_THRESHOLD', 5)),
+        reset_timeout=float(os.getenv('CIRCUIT_RESET_SECONDS', 60))
+    )
+
+
+class OfflineQueue:
+    """
+    Recorded answers kept for later processing: WAV files under
+    <directory>/<session id>/ and a batch_process.py manifest listing the
+    main answers. Follow-up recordings are kept alongside and referenced
+    from the interview data.
+    """
+
+    MANIFEST = 'manifest.json'
+
+    def __init__(self, directory: str, session_id: str):
+        self.directory = directory
+        self.session_id = session_id
+        self.count = 0
+
+    def add(self, audio: Audio, question_id: str, follow_up: bool = False) -> str:
+        """Keep a recording; return the path of the kept WAV file"""
+        name = f"{question_id}_follow_up.wav" if follow_up else f"{question_id}.wav"
+        relative_path = os.path.join(self.session_id, name)
+        path = os.path.join(self.directory, relative_path)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'wb') as f:
+            f.write(audio_bytes(audio))
+
+        self.count += 1
+        if not follow_up:
+            with _manifest_lock:
+                self._add_to_manifest(question_id, relative_path)
+        return path
+
+    def _add_to_manifest(self, question_id: str, relative_path: str):
+        manifest_path = os.path.join(self.directory, self.MANIFEST)
+        manifest = {"sessions": []}
+        if os.path.exists(manifest_path):
+            with open(manifest_path, 'r', encoding='utf-8') as f:
+                manifest = json.load(f)
+
+        for session in manifest['sessions']:
+            if session['session_id'] == self.session_id:
+                break
+        else:
+            session = {"session_id": self.session_id, "answers": {}}
+            manifest['sessions'].append(session)
+        session['answers'][question_id] = {"audio": relative_path}
+
+        temporary_path = manifest_path + '.tmp'
+        with open(temporary_path, 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, indent=2)
+        os.replace(temporary_path, manifest_path)
+
+
+def offline_queue_directory(output_dir: str) -> str:
+    return os.getenv('OFFLINE_QUEUE_DIRECTORY') or os.path.join(output_dir, 'offline_queue')
@@ -0,0 +1,298 @@
+"""
+Persistent content-addressed cache for transcription and analysis results.
+
+Transcriptions are keyed by a hash of the audio bytes plus model and language;
+analyses by a hash of the prompt plus model and temperature. Entries live as
+small JSON files on disk, expire after a TTL and are evicted least-recently-used
+once the cache grows past its size limit. The async wrappers read and write
+the cache from a worker thread, off the event loop.
+"""
+
+import asyncio
+import hashlib
+import json
+import os
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+from audio_capture import Audio, audio_bytes
+from backends import (
+    ANALYSIS_SYSTEM_PROMPT,
+    AnalysisBackend,
+    TranscriptionBackend,
+    build_analysis_prompt,
+    build_batch_analysis_prompt,
+    call_async,
+)
+
+
+def _hash(*parts) -> str:
+    digest = hashlib.sha256()
+    for part in parts:
+        if not isinstance(part, (bytes, bytearray, memoryview)):
+            part = str(part).encode('utf-8')
+        digest.update(memoryview(part).nbytes.to_bytes(8, 'big'))
+        digest.update(part)
+    return digest.hexdigest()
+
+
+def transcription_key(wav: bytes, model: str, language: Optional[str]) -> str:
+    return _hash("transcription", wav, model, language or "auto")
+
+
+def analysis_key(prompt: str, model: str, temperature: float) -> str:
+    return _hash("analysis", ANALYSIS_SYSTEM_PROMPT, prompt, model, temperature)
+
+
+class ResultCache:
+    """On-disk JSON cache with size-based LRU eviction, TTL and hit/miss counters"""
+
+    def __init__(self, directory: str, max_bytes: int = 100 * 1024 * 1024,
+                 ttl_seconds: Optional[float] = None):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        self._entries = {}  # key -> (size, last_access)
+        self._total_bytes = 0
+
+        os.makedirs(directory, exist_ok=True)
+        self._scan()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, key[:2], f"{key}.json")
+
+    def _scan(self):
+        """Rebuild the in-memory index from the files on disk"""
+        for shard in os.listdir(self.directory):
+            shard_dir = os.path.join(self.directory, shard)
+            if not os.path.isdir(shard_dir):
+                continue
+            for name in os.listdir(shard_dir):
+                if not name.endswith('.json'):
+                    continue
+                stat = os.stat(os.path.join(shard_dir, name))
+                self._entries[name[:-5]] = (stat.st_size, stat.st_mtime)
+                self._total_bytes += stat.st_size
+
+    def get(self, key: str) -> Optional[Dict]:
+        with self._lock:
+            if key not in self._entries:
+                self.misses += 1
+                return None
+
+            path = self._path(key)
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    record = json.load(f)
+            except (OSError, ValueError):
+                self._remove(key)
+                self.misses += 1
+                return None
+
+            if self.ttl_seconds is not None and time.time() - record['created'] > self.ttl_seconds:
+                self._remove(key)
+                self.misses += 1
+                return None
+
+            # Touch for LRU ordering; mtime doubles as last-access time across runs
+            now = time.time()
+            os.utime(path, (now, now))
+            self._entries[key] = (self._entries[key][0], now)
+            self.hits += 1
+            return record['value']
+
+    def put(self, key: str, value: Dict):
+        data = json.dumps({"created": time.time(), "value": value}, ensure_ascii=False).encode('utf-8')
+        path = self._path(key)
+
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            temp_path = f"{path}.{threading.get_ident()}.tmp"
+            with open(temp_path, 'wb') as f:
+                f.write(data)
+            os.replace(temp_path, path)
+
+            self._entries[key] = (len(data), time.time())
+            self._total_bytes += len(data)
+            self._evict()
+
+    def _remove(self, key: str):
+        size, _ = self._entries.pop(key)
+        self._total_bytes -= size
+        try:
+            os.unlink(self._path(key))
+        except OSError:
+            pass
+
+    def _evict(self):
+        if self._total_bytes <= self.max_bytes:
+            return
+        for key, _ in sorted(self._entries.items(), key=lambda item: item[1][1]):
+            if self._total_bytes <= self.max_bytes:
+                break
+            self._remove(key)
+            self.evictions += 1
+
+    def stats(self) -> Dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self._total_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": self.hits / lookups if lookups else 0.0
+            }
+
+
+class CachedTranscriber(TranscriptionBackend):
+    """Transcription backend wrapper that reuses results for identical audio"""
+
+    def __init__(self, inner: TranscriptionBackend, cache: ResultCache):
+        self.inner = inner
+        self.cache = cache
+        self.model = getattr(inner, 'model', type(inner).__name__)
+
+    def _key(self, audio: Audio, language: Optional[str]) -> str:
+        return transcription_key(audio_bytes(audio), self.model, language)
+
+    def transcribe(self, audio: Audio, language: Optional[str] = None) -> Tuple[str, Optional[str]]:
+        text, detected_language, _ = self.transcribe_scored(audio, language=language)
+        return text, detected_language
+
+    def transcribe_scored(self, audio: Audio,
+                          language: Optional[str] = None) -> Tuple[str, Optional[str], Optional[float]]:
+        key = self._key(audio, language)
+        cached = self.cache.get(key)
+        if cached is not None:
+            return cached['text'], cached['language'], cached.get('confidence')
+
+        text, detected_language, confidence = self.inner.transcribe_scored(audio, language=language)
+        self.cache.put(key, {"text": text, "language": detected_language, "confidence": confidence})
+        return text, detected_language, confidence
+
+    async def atranscribe(self, audio: Audio, language: Optional[str] = None) -> Tuple[str, Optional[str]]:
+        text, detected_language, _ = await self.atranscribe_scored(audio, language=language)
+        return text, detected_language
+
+    async def atranscribe_scored(self, audio: Audio,
+                                 language: Optional[str] = None) -> Tuple[str, Optional[str], Optional[float]]:
+        key = await asyncio.to_thread(self._key, audio, language)
+        cached = await asyncio.to_thread(self.cache.get, key)
+        if cached is not None:
+            return cached['text'], cached['language'], cached.get('confidence')
+
+        text, detected_language, confidence = await call_async(self.inner, 'transcribe_scored',
+                                                               audio, language=language)
+        await asyncio.to_thread(self.cache.put, key,
+                                {"text": text, "language": detected_language, "confidence": confidence})
+        return text, detected_language, confidence
+
+
+class CachedAnalyser(AnalysisBackend):
+    """Analysis backend wrapper that reuses results for identical prompts"""
+
+    def __init__(self, inner: AnalysisBackend, cache: ResultCache):
+        self.inner = inner
+        self.cache = cache
+        self.model = getattr(inner, 'model', type(inner).__name__)
+        self.temperature = getattr(inner, 'temperature', 0.0)
+
+    def analyse(self, transcribed_text: str, question_data: Dict) -> Dict:
+        key = analysis_key(build_analysis_prompt(transcribed_text, question_data),
+                           self.model, self.temperature)
+
+        cached = self.cache.get(key)
+        if cached is not None:
+            return cached
+
+        processed_info = self.inner.analyse(transcribed_text, question_data)
+        self.cache.put(key, processed_info)
+        return processed_info
+
+    async def aanalyse(self, transcribed_text: str, question_data: Dict) -> Dict:
+        key = analysis_key(build_analysis_prompt(transcribed_text, question_data),
+                           self.model, self.temperature)
+
+        cached = await asyncio.to_thread(self.cache.get, key)
+        if cached is not None:
+            return cached
+
+        processed_info = await call_async(self.inner, 'analyse', transcribed_text, question_data)
+        await asyncio.to_thread(self.cache.put, key, processed_info)
+        return processed_info
+
+    def analyse_batch(self, answers: List[Tuple[str, Dict]]) -> Dict[str, Dict]:
+        key = analysis_key(build_batch_analysis_prompt(answers), self.model, self.temperature)
+
+        cached = self.cache.get(key)
+        if cached is not None:
+            return cached
+
+        results = self.inner.analyse_batch(answers)
+        self.cache.put(key, results)
+        return results
+
+    async def aanalyse_batch(self, answers: List[Tuple[str, Dict]]) -> Dict[str, Dict]:
+        key = analysis_key(build_batch_analysis_prompt(answers), self.model, self.temperature)
+
+        cached = await asyncio.to_thread(self.cache.get, key)
+        if cached is not None:
+            return cached
+
+        results = await call_async(self.inner, 'analyse_batch', answers)
+        await asyncio.to_thread(self.cache.put, key, results)
+        return results
+
+    def analyse_stream(self, transcribed_text: str, question_data: Dict, on_field=None) -> Dict:
+        key = analysis_key(build_analysis_prompt(transcribed_text, question_data),
+                           self.model, self.temperature)
+
+        cached = self.cache.get(key)
+        if cached is not None:
+            if on_field:
+                for name, value in cached.items():
+                    on_field(name, value)
+            return cached
+
+        processed_info = self.inner.analyse_stream(transcribed_text, question_data, on_field)
+        self.cache.put(key, processed_info)
+        return processed_info
+
+    async def aanalyse_stream(self, transcribed_text: str, question_data: Dict, on_field=None) -> Dict:
+        key = analysis_key(build_analysis_prompt(transcribed_text, question_data),
+                           self.model, self.temperature)
+
+        cached = await asyncio.to_thread(self.cache.get, key)
+        if cached is not None:
+            if on_field:
+                for name, value in cached.items():
+                    on_field(name, value)
+            return cached
+
+        processed_info = await call_async(self.inner, 'analyse_stream', transcribed_text, question_data,
+                                          on_field=on_field)
+        await asyncio.to_thread(self.cache.put, key, processed_info)
+        return processed_info
+
+
+def result_cache_from_env() -> Optional[ResultCache]:
+    """Build the result cache described by the CACHE_* settings, or None when disabled"""
+    if os.getenv('CACHE_ENABLED', 'false').lower() != 'true':
+        return None
+
+    ttl_hours = os.getenv('CACHE_TTL_HOURS')
+    return ResultCache(
+        os.getenv('CACHE_DIRECTORY', './.cache/results'),
+        max_bytes=int(float(os.getenv('CACHE_MAX_MB', 100)) * 1024 * 1024),
+        ttl_seconds=float(ttl_hours) * 3600 if ttl_hours else None
+    )
@@ -0,0 +1,226 @@
+#!/usr/bin/env python3
+"""
+Crash-safe session journal.
+
+Every answer, analysis update, follow-up and finished question is appended to
+a JSON-lines file and fsync'd before the interview moves on, so a crash or
+Ctrl+C loses at most the answer being recorded. Replaying the journal
+rebuilds interview_data, which lets an interrupted session be resumed
+(`python voice_test.py --resume`) and the final JSON be written from the
+journal without transcribing or analysing anything again.
+
+A journal left behind by a session that never finished can be turned into
+the usual interview JSON from the command line:
+
+    python session_journal.py interviews/journals/asylum_interview_20250101_120000_ab12cd.jsonl
+"""
+
+import argparse
+import glob
+import json
+import os
+import threading
+import uuid
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from dotenv import load_dotenv
+
+AGENT_VERSION = "1.0"
+
+
+def interview_document(interview_data: Dict, detected_languages, total_questions: int,
+                       configuration: Dict) -> Dict:
+    """The saved interview JSON: metadata plus the per-question data"""
+    return {
+        "interview_metadata": {
+            "timestamp": datetime.now().isoformat(),
+            "total_questions": total_questions,
+            "answered_questions": len(interview_data),
+            "detected_languages": list(detected_languages),
+            "agent_version": AGENT_VERSION,
+            "configuration": configuration
+        },
+        "interview_data": interview_data
+    }
+
+
+def new_session_id() -> str:
+    """Timestamp plus a short random suffix, so concurrent sessions never share a journal"""
+    return f"{datetime.now().strftime('%Y%m%d_%H%M%S')}_{uuid.uuid4().hex[:6]}"
+
+
+class SessionJournal:
+    """
+    Append-only JSON-lines record of one interview session.
+
+    Opening an existing journal replays it, so `interview_data`,
+    `detected_languages` and `completed` reflect everything recorded before
+    the process stopped. A torn last line (the process died mid-write) is
+    ignored. Records are applied to the in-memory state exactly as they are
+    read back from disk, so the live state and a replay never disagree.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.session = {}
+        self.interview_data = {}
+        self.detected_languages = []
+        self.completed = []
+        self.finished = False
+        self.skipped_lines = 0
+        self._lock = threading.Lock()
+
+        if os.path.exists(path):
+            self._replay()
+        else:
+            os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        self._file = open(path, 'a', encoding='utf-8')
+
+    def _replay(self):
+        with open(self.path, 'r', encoding='utf-8') as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    self.skipped_lines += 1
+                    continue
+                self._apply(record)
+
+    def _apply(self, record: Dict):
+        event = record.get('event')
+        question_id = record.get('question_id')
+
+        if event == 'session':
+            self.session = record
+        elif event == 'answer':
+            self.interview_data[question_id] = record['entry']
+        elif event == 'analysis' and question_id in self.interview_data:
+            self.interview_data[question_id]['processed_info'] = record['processed_info']
+        elif event == 'follow_up' and question_id in self.interview_data:
+            self.interview_data[question_id]['follow_up'] = record['follow_up']
+        elif event == 'language' and record['language'] not in self.detected_languages:
+            self.detected_languages.append(record['language'])
+        elif event == 'question_done' and question_id not in self.completed:
+            self.completed.append(question_id)
+        elif event == 'complete':
+            self.finished = True
+
+    def _append(self, record: Dict):
+        line = json.dumps(dict(record, at=datetime.now().isoformat()), ensure_ascii=False, default=str)
+        with self._lock:
+            self._file.write(line + "\n")
+            self._file.flush()
+            os.fsync(self._file.fileno())
+            # Apply the serialised copy: later in-place edits by the caller
+            # must not leak into the journal state
+            self._apply(json.loads(line))
+
+    def start(self, session_id: str, question_ids: List[str], configuration: Dict):
+        """Write the session header; a journal being resumed keeps its original one"""
+        if self.session:
+            self._append({"event": "resume"})
+            return
+        self._append({
+            "event": "session",
+            "session_id": session_id,
+            "question_ids": question_ids,
+            "configuration": configuration
+        })
+
+    def record_answer(self, question_id: str, entry: Dict):
+        self._append({"event": "answer", "question_id": question_id, "entry": entry})
+
+    def record_analysis(self, question_id: str, processed_info: Dict):
+        self._append({"event": "analysis", "question_id": question_id, "processed_info": processed_info})
+
+    def record_follow_up(self, question_id: str, follow_up: Dict):
+        self._append({"event": "follow_up", "question_id": question_id, "follow_up": follow_up})
+
+    def record_language(self, language: str):
+        if language not in self.detected_languages:
+            self._append({"event": "language", "language": language})
+
+    def record_question_done(self, question_id: str):
+        self._append({"event": "question_done", "question_id": question_id})
+
+    def record_complete(self, output_path: str):
+        self._append({"event": "complete", "output": output_path})
+
+    @property
+    def session_id(self) -> Optional[str]:
+        return self.session.get('session_id')
+
+    def ordered_interview_data(self) -> Dict:
+        """interview_data in script order, whatever order the answers were settled in"""
+        order = self.session.get('question_ids', [])
+        ordered = {question_id: self.interview_data[question_id]
+                   for question_id in order if question_id in self.interview_data}
+        ordered.update(self.interview_data)
+        return ordered
+
+    def document(self, total_questions: Optional[int] = None) -> Dict:
+        """The final interview JSON, built from the journal alone"""
+        if total_questions is None:
+            total_questions = len(self.session.get('question_ids', []))
+        return interview_document(self.ordered_interview_data(), self.detected_languages,
+                                  total_questions, self.session.get('configuration', {}))
+
+    def close(self):
+        with self._lock:
+            if not self._file.closed:
+                self._file.close()
+
+
+def journal_directory(output_dir: str) -> str:
+    """Where journals are kept: JOURNAL_DIRECTORY, or a journals/ folder in the output directory"""
+    return os.getenv('JOURNAL_DIRECTORY') or os.path.join(output_dir, 'journals')
+
+
+def journal_enabled() -> bool:
+    return os.getenv('JOURNAL_ENABLED', 'true').lower() == 'true'
+
+
+def latest_unfinished_journal(directory: str) -> Optional[str]:
+    """Most recently written journal whose session never completed, or None"""
+    paths = sorted(glob.glob(os.path.join(directory, '*.jsonl')), key=os.path.getmtime, reverse=True)
+    for path in paths:
+        journal = SessionJournal(path)
+        journal.close()
+        if journal.session and not journal.finished:
+            return path
+    return None
+
+
+def main():
+    """Write the interview JSON for a journal, e.g. one left by a crashed session"""
+    load_dotenv()
+
+    parser = argparse.ArgumentParser(description="Compact a session journal into interview JSON")
+    parser.add_argument('journal', help="Journal file (.jsonl)")
+    parser.add_argument('--output', help="Output file (default: next to the journal's interview files)")
+    args = parser.parse_args()
+
+    journal = SessionJournal(args.journal)
+    journal.close()
+    if not journal.session:
+        print(f"❌ {args.journal} is not a session journal")
+        return
+
+    output = args.output or os.path.join(
+        os.getenv('OUTPUT_DIRECTORY', './interviews'),
+        f"{os.getenv('FILE_PREFIX', 'asylum_interview_')}{journal.session_id}.json"
+    )
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump(journal.document(), f, indent=2, ensure_ascii=False)
+
+    status = "complete" if journal.finished else "incomplete"
+    print(f"💾 {len(journal.interview_data)} answers ({status} session) written to: {output}")
+    if journal.skipped_lines:
+        print(f"⚠️ {journal.skipped_lines} unreadable journal lines skipped")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,853 @@
+"""
+Record and replay every backend interaction of an interview session.
+
+With RECORD_SESSION=<directory> the agent's transcriber, analyser, TTS and
+audio input are wrapped so that each call is written to a cassette in that
+directory: the captured answer audio (as WAV files), the transcript, the
+analysis reply (including the order and timing of streamed fields), the
+spoken prompts and how long every call took.
+
+With REPLAY_SESSION=<directory> the same interactions are served back
+instead of calling the real backends, so an interview can be re-run
+deterministically without an API key, microphone or speaker:
+
+    cassette/
+        cassette.json       metadata, configuration, outcome, interactions
+        audio/0001.wav      one file per recorded answer
+
+Transcriptions are matched to recorded calls by a hash of the uploaded
+audio, analyses by question id and transcript; a call that matches nothing
+takes the next unused recording of its kind (counted in `mismatches`, or an
+error with strict=True). REPLAY_LATENCY sets the delay injected per call:
+"recorded" (the original durations, times REPLAY_LATENCY_SCALE), "none", or
+a fixed number of seconds.
+
+A cassette replays the conversation it recorded, so replay it with the
+interview settings it was recorded with (seed cassettes keep theirs under
+metadata["environment"]); a mode that asks different questions or calls,
+such as section analysis, shows up as mismatches and unused interactions.
+
+Seed cassettes can be made from saved interviews without any audio:
+
+    python session_replay.py seed interviews/asylum_interview_20250602_150755.json cassettes/seed_1
+    python session_replay.py show cassettes/seed_1
+"""
+
+import argparse
+import array
+import asyncio
+import hashlib
+import json
+import os
+import random
+import tempfile
+import threading
+import time
+import wave
+import zlib
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+from audio_capture import SAMPLE_WIDTH, Audio, BufferSource, PCMSource, audio_bytes
+from backends import (
+    AnalysisBackend,
+    AudioInputBackend,
+    RuleBasedAnalyser,
+    TranscriptionBackend,
+    TTSBackend,
+    call_async,
+)
+
+CASSETTE_VERSION = 1
+CASSETTE_FILE = 'cassette.json'
+
+# Interaction kinds and the agent stage whose span contains them
+STAGE_OF_KIND = {
+    "say": "speak",
+    "record": "record_audio",
+    "transcribe": "transcribe_audio",
+    "analyse": "process_response",
+    "analyse_stream": "process_response",
+    "analyse_batch": "analyse_batch",
+}
+
+
+class ReplayMismatch(RuntimeError):
+    """A call during replay has no matching recorded interaction"""
+
+
+class ReplayedError(RuntimeError):
+    """An error raised by the original backend, raised again during replay"""
+
+
+def audio_digest(audio: Audio) -> str:
+    return hashlib.sha256(audio_bytes(audio)).hexdigest()
+
+
+def session_outcome(interview_data: Dict) -> Dict:
+    """The parts of a session that must come out the same on every replay (no timestamps)"""
+    return {
+        question_id: {
+            "raw_response": entry.get('raw_response'),
+            "attempt": entry.get('attempt'),
+            "adequately_answered": (entry.get('processed_info') or {}).get('adequately_answered'),
+            "follow_up": (entry.get('follow_up') or {}).get('response'),
+        }
+        for question_id, entry in interview_data.items()
+    }
+
+
+# ---------------------------------------------------------------------------
+# Cassettes
+# ---------------------------------------------------------------------------
+
+class Cassette:
+    """The recorded interactions of one session, stored in a directory"""
+
+    def __init__(self, path: str, metadata: Optional[Dict] = None, interactions: Optional[List[Dict]] = None):
+        self.path = path
+        self.metadata = metadata or {}
+        self.interactions = interactions or []
+        self._lock = threading.Lock()
+        self._audio_count = sum(1 for interaction in self.interactions if interaction['kind'] == 'record')
+
+    @classmethod
+    def load(cls, path: str) -> 'Cassette':
+        with open(os.path.join(path, CASSETTE_FILE), 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        if data.get('version') != CASSETTE_VERSION:
+            raise ValueError(f"{path}: unsupported cassette version {data.get('version')!r}")
+        return cls(path, data.get('metadata'), data.get('interactions'))
+
+    def add(self, kind: str, duration: float, **fields) -> Dict:
+        """Append one interaction; `duration` is the call's wall time in seconds"""
+        with self._lock:
+            interaction = {"seq": len(self.interactions), "kind": kind, "duration_s": round(duration, 6), **fields}
+            self.interactions.append(interaction)
+        return interaction
+
+    def save_audio(self, pcm: bytes, rate: int, channels: int) -> str:
+        """Write a recorded answer as a WAV file; return its name within the cassette"""
+        with self._lock:
+            self._audio_count += 1
+            name = os.path.join('audio', f"{self._audio_count:04d}.wav")
+        path = os.path.join(self.path, name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with wave.open(path, 'wb') as wav:
+            wav.setnchannels(channels)
+            wav.setsampwidth(SAMPLE_WIDTH)
+            wav.setframerate(rate)
+            wav.writeframes(pcm)
+        return name
+
+    def load_audio(self, name: str) -> Tuple[bytes, int, int]:
+        """(pcm, rate, channels) of a recorded answer"""
+        with wave.open(os.path.join(self.path, name), 'rb') as wav:
+            return wav.readframes(wav.getnframes()), wav.getframerate(), wav.getnchannels()
+
+    def of_kind(self, kind: str) -> List[Dict]:
+        return [interaction for interaction in self.interactions if interaction['kind'] == kind]
+
+    def save(self, **metadata) -> str:
+        """Write cassette.json, merging `metadata` into the stored metadata"""
+        self.metadata.update(metadata)
+        os.makedirs(self.path, exist_ok=True)
+        path = os.path.join(self.path, CASSETTE_FILE)
+        with self._lock:
+            data = {"version": CASSETTE_VERSION, "metadata": self.metadata, "interactions": self.interactions}
+            with open(path, 'w', encoding='utf-8') as f:
+                json.dump(data, f, indent=1, ensure_ascii=False)
+        return path
+
+    def summary(self) -> Dict:
+        counts, seconds = {}, {}
+        for interaction in self.interactions:
+            kind = interaction['kind']
+            counts[kind] = counts.get(kind, 0) + 1
+            seconds[kind] = seconds.get(kind, 0.0) + interaction['duration_s']
+        return {"counts": counts, "seconds": seconds}
+
+
+# ---------------------------------------------------------------------------
+# Recording
+# ---------------------------------------------------------------------------
+
+def _error_fields(error: Exception) -> Dict:
+    return {"error": {"type": type(error).__name__, "message": str(error)}}
+
+
+class RecordingTranscriber(TranscriptionBackend):
+    """Passes calls to another transcriber and records them"""
+
+    def __init__(self, inner: TranscriptionBackend, cassette: Cassette):
+        self.inner = inner
+        self.cassette = cassette
+
+    def _record(self, audio: Audio, language: Optional[str], call: Callable, scored: bool):
+        digest = audio_digest(audio)
+        start = time.perf_counter()
+        try:
+            result = call()
+        except Exception as e:
+            self.cassette.add('transcribe', time.perf_counter() - start, audio_sha256=digest,
+                              language=language, **_error_fields(e))
+            raise
+        text, detected_language = result[0], result[1]
+        self.cassette.add('transcribe', time.perf_counter() - start, audio_sha256=digest, language=language,
+                          result=[text, detected_language, result[2] if scored else None])
+        return result
+
+    def transcribe(self, audio: Audio, language: Optional[str] = None) -> Tuple[str, Optional[str]]:
+        return self._record(audio, language, lambda: self.inner.transcribe(audio, language=language), False)
+
+    def transcribe_scored(self, audio: Audio, language: Optional[str] = None):
+        return self._record(audio, language, lambda: self.inner.transcribe_scored(audio, language=language), True)
+
+    async def _arecord(self, audio: Audio, language: Optional[str], method: str, scored: bool):
+        digest = audio_digest(audio)
+        start = time.perf_counter()
+        try:
+            result = await call_async(self.inner, method, audio, language=language)
+        except Exception as e:
+            self.cassette.add('transcribe', time.perf_counter() - start, audio_sha256=digest,
+                              language=language, **_error_fields(e))
+            raise
+        self.cassette.add('transcribe', time.perf_counter() - start, audio_sha256=digest, language=language,
+                          result=[result[0], result[1], result[2] if scored else None])
+        return result
+
+    async def atranscribe(self, audio: Audio, language: Optional[str] = None):
+        return await self._arecord(audio, language, 'transcribe', False)
+
+    async def atranscribe_scored(self, audio: Audio, language: Optional[str] = None):
+        return await self._arecord(audio, language, 'transcribe_scored', True)
+
+
+class RecordingAnalyser(AnalysisBackend):
+    """Passes calls to another analyser and records them"""
+
+    def __init__(self, inner: AnalysisBackend, cassette: Cassette):
+        self.inner = inner
+        self.cassette = cassette
+
+    def _record(self, kind: str, fields: Dict, call: Callable):
+        start = time.perf_counter()
+        try:
+            result = call()
+        except Exception as e:
+            self.cassette.add(kind, time.perf_counter() - start, **fields, **_error_fields(e))
+            raise
+        self.cassette.add(kind, time.perf_counter() - start, **fields, result=result)
+        return result
+
+    def analyse(self, transcribed_text: str, question_data: Dict) -> Dict:
+        return self._record('analyse', {"question_id": question_data['id'], "text": transcribed_text},
+                            lambda: self.inner.analyse(transcribed_text, question_data))
+
+    def analyse_batch(self, answers: List[Tuple[str, Dict]]) -> Dict[str, Dict]:
+        fields = {"question_ids": [question_data['id'] for _, question_data in answers],
+                  "texts": [transcribed_text for transcribed_text, _ in answers]}
+        return self._record('analyse_batch', fields, lambda: self.inner.analyse_batch(answers))
+
+    def analyse_stream(self, transcribed_text: str, question_data: Dict,
+                       on_field: Optional[Callable[[str, object], None]] = None) -> Dict:
+        start = time.perf_counter()
+        field_times = []
+
+        def timed_field(name, value):
+            field_times.append([name, round(time.perf_counter() - start, 6)])
+            if on_field:
+                on_field(name, value)
+
+        fields = {"question_id": question_data['id'], "text": transcribed_text, "field_times": field_times}
+        return self._record('analyse_stream', fields,
+                            lambda: self.inner.analyse_stream(transcribed_text, question_data, on_field=timed_field))
+
+    async def aanalyse(self, transcribed_text: str, question_data: Dict) -> Dict:
+        start = time.perf_counter()
+        fields = {"question_id": question_data['id'], "text": transcribed_text}
+        try:
+            result = await call_async(self.inner, 'analyse', transcribed_text, question_data)
+        except Exception as e:
+            self.cassette.add('analyse', time.perf_counter() - start, **fields, **_error_fields(e))
+            raise
+        self.cassette.add('analyse', time.perf_counter() - start, **fields, result=result)
+        return result
+
+
+class RecordingTTS(TTSBackend):
+    """
+    Records what is said and for how long. Pre-rendering (render / play) is
+    passed through unrecorded, so prompts played from a cache replay as instant.
+    """
+
+    def __init__(self, inner: TTSBackend, cassette: Cassette):
+        self.inner = inner
+        self.cassette = cassette
+
+    def setup(self, rate: int, volume: float):
+        if hasattr(self.inner, 'setup'):
+            self.inner.setup(rate, volume)
+
+    def say(self, text: str):
+        start = time.perf_counter()
+        self.inner.say(text)
+        self.cassette.add('say', time.perf_counter() - start, text=text)
+
+    async def asay(self, text: str):
+        start = time.perf_counter()
+        await call_async(self.inner, 'say', text)
+        self.cassette.add('say', time.perf_counter() - start, text=text)
+
+    def render(self, text: str, path: Optional[str] = None) -> Optional[str]:
+        return self.inner.render(text, path)
+
+    def play(self, path: str):
+        self.inner.play(path)
+
+    def close(self):
+        if hasattr(self.inner, 'close'):
+            self.inner.close()
+
+
+class _RecordingSource(PCMSource):
+    """Copies everything read from a source; written to the cassette on close"""
+
+    def __init__(self, inner: PCMSource, cassette: Cassette):
+        super().__init__(inner.rate, inner.channels)
+        self.realtime = inner.realtime
+        self.inner = inner
+        self.cassette = cassette
+        self._captured = bytearray()
+        self._opened = time.perf_counter()
+
+    def read(self, frames: int) -> bytes:
+        data = self.inner.read(frames)
+        self._captured += data
+        return data
+
+    def close(self):
+        self.inner.close()
+        audio = self.cassette.save_audio(bytes(self._captured), self.rate, self.channels)
+        seconds = len(self._captured) / (self.rate * self.channels * SAMPLE_WIDTH)
+        self.cassette.add('record', time.perf_counter() - self._opened, audio=audio,
+                          rate=self.rate, channels=self.channels, audio_seconds=round(seconds, 3))
+
+
+class RecordingAudioInput(AudioInputBackend):
+    """Saves every recorded answer to the cassette"""
+
+    def __init__(self, inner: AudioInputBackend, cassette: Cassette):
+        self.inner = inner
+        self.cassette = cassette
+
+    def open_source(self, rate: int, channels: int, chunk: int) -> PCMSource:
+        return _RecordingSource(self.inner.open_source(rate, channels, chunk), self.cassette)
+
+    def close(self):
+        self.inner.close()
+
+
+def record_backends(cassette: Cassette, transcriber: TranscriptionBackend, analyser: AnalysisBackend,
+                    tts: TTSBackend, audio_input: AudioInputBackend) -> Tuple:
+    """The four backends wrapped so that every interaction lands in `cassette`"""
+    return (RecordingTranscriber(transcriber, cassette), RecordingAnalyser(analyser, cassette),
+            RecordingTTS(tts, cassette), RecordingAudioInput(audio_input, cassette))
+
+
+def cassette_from_env() -> Optional[Cassette]:
+    """A new cassette in RECORD_SESSION, or None when sessions are not recorded"""
+    path = os.getenv('RECORD_SESSION')
+    if not path:
+        return None
+    os.makedirs(path, exist_ok=True)
+    return Cassette(path, {"recorded_at": datetime.now().isoformat()})
+
+
+# ---------------------------------------------------------------------------
+# Replay
+# ---------------------------------------------------------------------------
+
+class ReplayLatency:
+    """
+    Delay injected for each replayed call: "recorded" (the original
+    duration times `scale`), "none", or "fixed" (`seconds` per call)
+    """
+
+    def __init__(self, mode: str = 'recorded', scale: float = 1.0, seconds: float = 0.0):
+        if mode not in ('recorded', 'none', 'fixed'):
+            raise ValueError(f"Unknown replay latency mode '{mode}'")
+        self.mode = mode
+        self.scale = scale
+        self.seconds = seconds
+
+    @classmethod
+    def parse(cls, spec: str, scale: float = 1.0) -> 'ReplayLatency':
+        """"recorded", "none" or a number of seconds"""
+        spec = (spec or 'recorded').strip().lower()
+        if spec in ('recorded', 'none'):
+            return cls(spec, scale=scale)
+        return cls('fixed', seconds=float(spec))
+
+    def delay(self, interaction: Dict) -> float:
+        if self.mode == 'none':
+            return 0.0
+        if self.mode == 'fixed':
+            return self.seconds
+        return interaction['duration_s'] * self.scale
+
+    def describe(self) -> str:
+        if self.mode == 'recorded':
+            return f"recorded x{self.scale:g}"
+        if self.mode == 'fixed':
+            return f"fixed {self.seconds:g} s"
+        return "none"
+
+
+class ReplaySession:
+    """Hands out a cassette's interactions to the replay backends"""
+
+    def __init__(self, cassette: Cassette, latency: Optional[ReplayLatency] = None, strict: bool = False):
+        self.cassette = cassette
+        self.latency = latency or ReplayLatency()
+        self.strict = strict
+        self.mismatches = 0
+        self.injected = {}  # kind -> seconds of delay injected
+        self._remaining = {}
+        for interaction in cassette.interactions:
+            self._remaining.setdefault(interaction['kind'], []).append(interaction)
+        self._lock = threading.Lock()
+
+    def take(self, kind: str, matches: Optional[Callable[[Dict], bool]] = None,
+             required: bool = True) -> Optional[Dict]:
+        """
+        The first unused interaction of `kind` that `matches`, else the next
+        unused one (a mismatch). None, or ReplayMismatch when `required`, if
+        none is left.
+        """
+        with self._lock:
+            remaining = self._remaining.get(kind, [])
+            for position, interaction in enumerate(remaining):
+                if matches is None or matches(interaction):
+                    return remaining.pop(position)
+            if not remaining:
+                if required:
+                    raise ReplayMismatch(f"No recorded '{kind}' interaction left in {self.cassette.path}")
+                return None
+            if self.strict:
+                raise ReplayMismatch(f"No recorded '{kind}' interaction matches the call "
+                                     f"(next recorded: #{remaining[0]['seq']})")
+            self.mismatches += 1
+            return remaining.pop(0)
+
+    def delay(self, interaction: Dict) -> float:
+        seconds = self.latency.delay(interaction)
+        with self._lock:
+            self.injected[interaction['kind']] = self.injected.get(interaction['kind'], 0.0) + seconds
+        return seconds
+
+    def wait(self, interaction: Dict):
+        seconds = self.delay(interaction)
+        if seconds > 0:
+            time.sleep(seconds)
+
+    async def await_delay(self, interaction: Dict):
+        seconds = self.delay(interaction)
+        if seconds > 0:
+            await asyncio.sleep(seconds)
+
+    def unused(self) -> Dict[str, int]:
+        """Recorded interactions the replay did not ask for, per kind"""
+        with self._lock:
+            return {kind: len(remaining) for kind, remaining in self._remaining.items() if remaining}
+
+    def injected_seconds(self) -> float:
+        with self._lock:
+            return sum(self.injected.values())
+
+    def backends(self) -> Dict:
+        return {
+            "transcriber": ReplayTranscriber(self),
+            "analyser": ReplayAnalyser(self),
+            "tts": ReplayTTS(self),
+            "audio_input": ReplayAudioInput(self),
+        }
+
+
+def _result(interaction: Dict):
+    if 'error' in interaction:
+        error = interaction['error']
+        raise ReplayedError(f"{error['type']}: {error['message']}")
+    return interaction['result']
+
+
+class ReplayTranscriber(TranscriptionBackend):
+    """Recorded transcripts, matched by the uploaded audio"""
+
+    def __init__(self, session: ReplaySession):
+        self.session = session
+
+    def _take(self, audio: Audio) -> Dict:
+        digest = audio_digest(audio)
+        return self.session.take('transcribe', lambda interaction: interaction['audio_sha256'] == digest)
+
+    def transcribe_scored(self, audio: Audio, language: Optional[str] = None):
+        interaction = self._take(audio)
+        self.session.wait(interaction)
+        return tuple(_result(interaction))
+
+    def transcribe(self, audio: Audio, language: Optional[str] = None) -> Tuple[str, Optional[str]]:
+        text, detected_language, _ = self.transcribe_scored(audio, language)
+        return text, detected_language
+
+    async def atranscribe_scored(self, audio: Audio, language: Optional[str] = None):
+        interaction = self._take(audio)
+        await self.session.await_delay(interaction)
+        return tuple(_result(interaction))
+
+    async def atranscribe(self, audio: Audio, language: Optional[str] = None) -> Tuple[str, Optional[str]]:
+        text, detected_language, _ = await self.atranscribe_scored(audio, language)
+        return text, detected_language
+
+
+class ReplayAnalyser(AnalysisBackend):
+    """Recorded analyses, matched by question id and transcript"""
+
+    def __init__(self, session: ReplaySession):
+        self.session = session
+
+    def _take(self, kinds: Tuple[str, ...], question_data: Dict, transcribed_text: str) -> Dict:
+        def matches(interaction):
+            return interaction['question_id'] == question_data['id'] and interaction['text'] == transcribed_text
+
+        # A streamed reply can stand in for a plain one and vice versa
+        for kind in kinds:
+            interaction = self.session.take(kind, matches, required=False)
+            if interaction is not None:
+                return interaction
+        raise ReplayMismatch(f"No recorded analysis left for '{question_data['id']}' in {self.session.cassette.path}")
+
+    def analyse(self, transcribed_text: str, question_data: Dict) -> Dict:
+        interaction = self._take(('analyse', 'analyse_stream'), question_data, transcribed_text)
+        self.session.wait(interaction)
+        return _result(interaction)
+
+    def analyse_batch(self, answers: List[Tuple[str, Dict]]) -> Dict[str, Dict]:
+        question_ids = [question_data['id'] for _, question_data in answers]
+        interaction = self.session.take('analyse_batch', lambda recorded: recorded['question_ids'] == question_ids,
+                                        required=False)
+        if interaction is None:
+            # Recorded per answer, replayed in a batch
+            return super().analyse_batch(answers)
+        self.session.wait(interaction)
+        return _result(interaction)
+
+    def analyse_stream(self, transcribed_text: str, question_data: Dict,
+                       on_field: Optional[Callable[[str, object], None]] = None) -> Dict:
+        interaction = self._take(('analyse_stream', 'analyse'), question_data, transcribed_text)
+        total = self.session.delay(interaction)
+        processed_info = _result(interaction)
+        field_times = interaction.get('field_times') or [[name, interaction['duration_s']] for name in processed_info]
+
+        # Fields arrive at their recorded share of the (scaled) call duration
+        start = time.perf_counter()
+        for name, offset in field_times:
+            if interaction['duration_s'] > 0:
+                pause = start + total * offset / interaction['duration_s'] - time.perf_counter()
+                if pause > 0:
+                    time.sleep(pause)
+            if on_field and name in processed_info:
+                on_field(name, processed_info[name])
+        remaining = start + total - time.perf_counter()
+        if remaining > 0:
+            time.sleep(remaining)
+        return processed_info
+
+    async def aanalyse(self, transcribed_text: str, question_data: Dict) -> Dict:
+        interaction = self._take(('analyse', 'analyse_stream'), question_data, transcribed_text)
+        await self.session.await_delay(interaction)
+        return _result(interaction)
+
+
+class ReplayTTS(TTSBackend):
+    """Takes as long as the recorded speech; prompts never recorded are instant"""
+
+    def __init__(self, session: ReplaySession):
+        self.session = session
+
+    def _take(self, text: str) -> Optional[Dict]:
+        return self.session.take('say', lambda interaction: interaction['text'] == text, required=False)
+
+    def say(self, text: str):
+        interaction = self._take(text)
+        if interaction:
+            self.session.wait(interaction)
+
+    async def asay(self, text: str):
+        interaction = self._take(text)
+        if interaction:
+            await self.session.await_delay(interaction)
+
+
+class _PacedSource(BufferSource):
+    """A recorded answer read back no faster than `seconds_per_second` of delay per second of audio"""
+
+    realtime = True
+
+    def __init__(self, pcm: bytes, rate: int, channels: int, seconds_per_second: float):
+        super().__init__(pcm, rate, channels)
+        self.seconds_per_second = seconds_per_second
+        self._start = None
+        self._served = 0.0
+
+    def read(self, frames: int) -> bytes:
+        if self._start is None:
+            self._start = time.perf_counter()
+        data = super().read(frames)
+        self._served += len(data) / (self.rate * self.channels * SAMPLE_WIDTH)
+        pause = self._start + self._served * self.seconds_per_second - time.perf_counter()
+        if pause > 0:
+            time.sleep(pause)
+        return data
+
+
+class ReplayAudioInput(AudioInputBackend):
+    """Serves the recorded answers in order, paced to the injected latency"""
+
+    def __init__(self, session: ReplaySession):
+        self.session = session
+
+    def open_source(self, rate: int, channels: int, chunk: int) -> PCMSource:
+        interaction = self.session.take('record')
+        pcm, recorded_rate, recorded_channels = self.session.cassette.load_audio(interaction['audio'])
+        seconds = self.session.delay(interaction)
+        audio_seconds = interaction.get('audio_seconds') or 0
+        if seconds <= 0 or audio_seconds <= 0:
+            return BufferSource(pcm, recorded_rate, recorded_channels)
+        return _PacedSource(pcm, recorded_rate, recorded_channels, seconds / audio_seconds)
+
+
+def replay_session_from_env() -> Optional[ReplaySession]:
+    """ReplaySession for the cassette in REPLAY_SESSION, or None"""
+    path = os.getenv('REPLAY_SESSION')
+    if not path:
+        return None
+    latency = ReplayLatency.parse(os.getenv('REPLAY_LATENCY', 'recorded'),
+                                  scale=float(os.getenv('REPLAY_LATENCY_SCALE', 1.0)))
+    return ReplaySession(Cassette.load(path), latency,
+                         strict=os.getenv('REPLAY_STRICT', 'false').lower() == 'true')
+
+
+# ---------------------------------------------------------------------------
+# Seed cassettes from saved interviews
+# ---------------------------------------------------------------------------
+
+# Call durations written into seed cassettes, whose scripted backends answer
+# instantly. Assumptions in the range of a pyttsx3 voice at 175 WPM, Whisper
+# and GPT-4 from Europe; replace with a real recording where it matters.
+SEED_TIMINGS = {
+    "say_per_char": 0.065,
+    "transcribe_base": 0.45,
+    "transcribe_per_audio_second": 0.04,
+    "analyse_base": 1.6,
+    "analyse_per_char": 0.004,
+}
+
+SEED_AUDIO_RATE = 16000
+
+# A clean, predictable configuration for the run that produces a seed
+SEED_ENVIRONMENT = {
+    "INTERVIEW_BACKEND": "local", "ANALYSIS_MODE": "per_answer", "PIPELINE_MODE": "false",
+    "SPECULATIVE_MODE": "false", "RECORD_MODE": "fixed", "AUDIO_RATE": str(SEED_AUDIO_RATE),
+    "AUDIO_CHANNELS": "1", "AUDIO_IN_MEMORY": "true", "UPLOAD_PREPROCESS": "false",
+    "CACHE_ENABLED": "false", "PRECLASSIFIER_ENABLED": "false", "PROMPT_CACHE_ENABLED": "false",
+    "LANGUAGE_HINTING": "false", "JOURNAL_ENABLED": "false", "QUESTION_FLOW_PREFETCH": "false",
+    "TRACE_FORMAT": "none", "RECORD_SESSION": "", "REPLAY_SESSION": "", "AUDIO_QUALITY_CHECK": "false",
+}
+
+
+@contextmanager
+def patched_environment(values: Dict[str, str]) -> Iterator[None]:
+    saved = {key: os.environ.get(key) for key in values}
+    os.environ.update(values)
+    try:
+        yield
+    finally:
+        for key, value in saved.items():
+            if value is None:
+                os.environ.pop(key, None)
+            else:
+                os.environ[key] = value
+
+
+def synthetic_speech(text: str, rate: int, seed: int) -> bytes:
+    """
+    Deterministic speech-like PCM for a scripted answer: bursts of noise
+    loud enough for the voice activity detector, about 0.4 s per word
+    """
+    rng = random.Random(seed)
+    block = array.array('h', (rng.randint(-3000, 3000) for _ in range(rate // 50)))
+    gains = [0.6 + 0.4 * rng.random() for _ in range(16)]
+    blocks = max(50, min(750, len(text.split()) * 20))
+    samples = array.array('h')
+    for index in range(blocks):
+        gain = gains[index % len(gains)]
+        samples.extend(int(sample * gain) for sample in block)
+    return samples.tobytes()
+
+
+class ScriptedApplicant:
+    """
+    Answers an interview from a saved session: the TTS remembers the last
+    prompt, the audio input produces synthetic speech for the matching
+    answer, the transcriber returns its text and the analyser the saved
+    analysis. Earlier attempts (the file keeps only the last one) are
+    judged inadequate so the run takes as many attempts as the original.
+    """
+
+    def __init__(self, interview: Dict):
+        self.answers = {}  # question text -> saved entry
+        self.follow_ups = {}  # follow-up question -> response
+        self.by_id = interview['interview_data']
+        for entry in self.by_id.values():
+            self.answers[entry['question']] = entry
+            if entry.get('follow_up'):
+                self.follow_ups[entry['follow_up']['question']] = entry['follow_up']['response']
+        self.prompt = ""
+        self.current = None
+        self.pending = []  # (text, language) of recorded answers not yet transcribed
+        self.analyses = {}  # question id -> analyses so far
+        self.recordings = 0
+        self._lock = threading.Lock()
+
+    def answer_for(self, prompt: str) -> Tuple[str, Optional[str]]:
+        if prompt in self.answers:
+            self.current = self.answers[prompt]
+        if prompt in self.follow_ups:
+            return self.follow_ups[prompt], self.current and self.current.get('language')
+        if self.current is None:
+            return "I am not sure.", None
+        return self.current['raw_response'], self.current.get('language')
+
+    def backends(self) -> Dict:
+        applicant = self
+
+        class Voice(TTSBackend):
+            def say(self, text: str):
+                applicant.prompt = text
+
+        class Microphone(AudioInputBackend):
+            def open_source(self, rate: int, channels: int, chunk: int) -> PCMSource:
+                with applicant._lock:
+                    text, language = applicant.answer_for(applicant.prompt)
+                    applicant.recordings += 1
+                    applicant.pending.append((text, language))
+                    seed = zlib.crc32(f"{applicant.recordings}:{text}".encode())
+                return BufferSource(synthetic_speech(text, rate, seed), rate, 1)
+
+        class Transcriber(TranscriptionBackend):
+            def transcribe(self, audio: Audio, language: Optional[str] = None):
+                with applicant._lock:
+                    text, detected_language = applicant.pending.pop(0)
+                return text, None if detected_language == 'unknown' else detected_language
+
+        class Analyser(AnalysisBackend):
+            def analyse(self, transcribed_text: str, question_data: Dict) -> Dict:
+                entry = applicant.by_id.get(question_data['id'])
+                with applicant._lock:
+                    count = applicant.analyses[question_data['id']] = applicant.analyses.get(question_data['id'], 0) + 1
+                if entry is None:
+                    return RuleBasedAnalyser().analyse(transcribed_text, question_data)
+                if count < (entry.get('attempt') or 1):
+                    return dict(entry['processed_info'], adequately_answered=False, follow_up_needed=False,
+                                suggested_follow_up=entry['processed_info'].get('suggested_follow_up')
+                                or "Could you tell me a little more?")
+                return entry['processed_info']
+
+        return {"transcriber": Transcriber(), "analyser": Analyser(), "tts": Voice(), "audio_input": Microphone()}
+
+
+def _apply_seed_timings(cassette: Cassette, timings: Dict):
+    for interaction in cassette.interactions:
+        kind = interaction['kind']
+        if kind == 'say':
+            duration = timings['say_per_char'] * len(interaction['text'])
+        elif kind == 'record':
+            duration = interaction['audio_seconds']
+        elif kind == 'transcribe':
+            duration = timings['transcribe_base']
+        elif kind in ('analyse', 'analyse_stream'):
+            duration = timings['analyse_base'] + timings['analyse_per_char'] * len(interaction['text'])
+        else:
+            continue
+        interaction['duration_s'] = round(duration, 6)
+
+    # Transcription time grows with the length of the answer it follows
+    audio_seconds = [interaction['audio_seconds'] for interaction in cassette.of_kind('record')]
+    for interaction, seconds in zip(cassette.of_kind('transcribe'), audio_seconds):
+        interaction['duration_s'] = round(interaction['duration_s']
+                                          + timings['transcribe_per_audio_second'] * seconds, 6)
+
+
+def seed_cassette(interview_path: str, directory: str, timings: Optional[Dict] = None) -> Cassette:
+    """Record a cassette by running the agent against a saved interview's answers"""
+    from voice_test import AsylumInterviewAgent
+
+    with open(interview_path, 'r', encoding='utf-8') as f:
+        interview = json.load(f)
+    configuration = interview.get('interview_metadata', {}).get('configuration', {})
+
+    cassette = Cassette(directory, {"recorded_at": datetime.now().isoformat(),
+                                    "seeded_from": os.path.basename(interview_path)})
+    applicant = ScriptedApplicant(interview)
+    environment = dict(SEED_ENVIRONMENT,
+                       MAX_RETRIES=str(configuration.get('max_retries', 3)),
+                       RECORD_DURATION=str(configuration.get('record_duration', 15)))
+    with tempfile.TemporaryDirectory() as output_dir, \
+            patched_environment(dict(environment, OUTPUT_DIRECTORY=output_dir)):
+        backends = applicant.backends()
+        agent = AsylumInterviewAgent(*record_backends(cassette, backends['transcriber'], backends['analyser'],
+                                                      backends['tts'], backends['audio_input']))
+        try:
+            agent.conduct_interview()
+            cassette.metadata.update(configuration=agent._configuration(),
+                                     outcome=session_outcome(agent.interview_data))
+        finally:
+            agent.close()
+
+    _apply_seed_timings(cassette, timings or SEED_TIMINGS)
+    cassette.save(environment={key: value for key, value in environment.items()
+                               if key not in ('RECORD_SESSION', 'REPLAY_SESSION')})
+    return cassette
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Create and inspect session cassettes")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    seed = commands.add_parser('seed', help="Make a cassette from a saved interview JSON file")
+    seed.add_argument('interview')
+    seed.add_argument('directory')
+
+    show = commands.add_parser('show', help="Summarise a cassette")
+    show.add_argument('directory')
+    args = parser.parse_args()
+
+    if args.command == 'seed':
+        cassette = seed_cassette(args.interview, args.directory)
+        print(f"📼 Cassette written to {args.directory} ({len(cassette.interactions)} interactions)")
+        return
+
+    cassette = Cassette.load(args.directory)
+    summary = cassette.summary()
+    print(f"📼 {args.directory}: {len(cassette.interactions)} interactions")
+    for key in ('recorded_at', 'seeded_from'):
+        if key in cassette.metadata:
+            print(f"   {key}: {cassette.metadata[key]}")
+    for kind, count in sorted(summary['counts'].items()):
+        print(f"   {kind:<16}{count:>5} calls {summary['seconds'][kind]:>9.2f} s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+"""
+Speculative transcription of an answer while it is still being recorded.
+
+PartialTranscription cuts the incoming audio into segments at quiet moments
+and sends each finished segment to the transcription backend on a worker
+thread. By the time the applicant stops speaking, only the last few seconds
+remain to be transcribed, so the answer can be judged (and any follow-up
+spoken) almost immediately.
+"""
+
+from concurrent.futures import Executor
+from typing import Callable, Optional, Tuple
+
+from audio_capture import SAMPLE_WIDTH, Audio, AudioClip, chunk_rms, wav_header
+
+
+class PartialTranscription:
+    """
+    Segment-by-segment transcription of one answer.
+
+    feed() every recorded chunk; a segment is submitted at the first quiet
+    chunk once it holds `segment_seconds` of audio (or unconditionally at
+    twice that), so cuts rarely land mid-word. result() submits the tail and
+    joins the segment texts in order. Segments without a single loud chunk
+    are not sent, since speech recognisers tend to invent words for silence.
+    A segment failing `check` (the audio quality gate) is not sent either; it
+    cancels the speculation, so the full answer is checked and transcribed
+    as usual.
+    """
+
+    def __init__(self, transcribe: Callable[[Audio], Tuple[str, Optional[str]]], pool: Executor,
+                 rate: int, channels: int = 1, segment_seconds: float = 4.0,
+                 silence_threshold: float = 500.0, check: Optional[Callable[[bytes], bool]] = None):
+        self._transcribe = transcribe
+        self._check = check
+        self._pool = pool
+        self.rate = rate
+        self.channels = channels
+        self.silence_threshold = silence_threshold
+        self.segment_bytes = int(segment_seconds * rate) * channels * SAMPLE_WIDTH
+        self._segment = bytearray()
+        self._segment_has_speech = False
+        self._futures = []
+        self._cancelled = False
+
+    @property
+    def segments(self) -> int:
+        return len(self._futures)
+
+    def feed(self, data: bytes):
+        if self._cancelled:
+            return
+        quiet = chunk_rms(data) < self.silence_threshold
+        self._segment += data
+        self._segment_has_speech = self._segment_has_speech or not quiet
+
+        if len(self._segment) >= 2 * self.segment_bytes:
+            self._submit()
+        elif len(self._segment) >= self.segment_bytes and quiet:
+            self._submit()
+
+    def _submit(self):
+        if self._cancelled:
+            return
+        pcm = bytes(self._segment)
+        has_speech = self._segment_has_speech
+        self._segment = bytearray()
+        self._segment_has_speech = False
+        if not has_speech:
+            return
+        if self._check is not None and not self._check(pcm):
+            self.cancel()
+            return
+
+        clip = AudioClip(memoryview(wav_header(len(pcm), self.rate, self.channels) + pcm),
+                         self.rate, self.channels)
+        self._futures.append(self._pool.submit(self._transcribe, clip))
+
+    def cancel(self):
+        """Stop: nothing more is submitted and segments not yet started are dropped"""
+        self._cancelled = True
+        self._segment = bytearray()
+        self._segment_has_speech = False
+        for future in self._futures:
+            future.cancel()
+        self._futures = []
+
+    def result(self) -> Optional[Tuple[str, Optional[str]]]:
+        """
+        Transcribe what is left and return (joined text, first detected
+        language), or None when no segment held speech or a segment could
+        not be transcribed, in which case the caller should transcribe the
+        full recording as usual.
+        """
+        self._submit()
+        if not self._futures:
+            return None
+
+        texts = []
+        language = None
+        for future in self._futures:
+            try:
+                text, detected_language = future.result()
+            except Exception as e:
+                print(f"⚠️ Segment transcription failed ({type(e).__name__}); transcribing the full answer")
+                self.cancel()
+                return None
+            if text and text.strip():
+                texts.append(text.strip())
+            if language in (None, 'unknown'):
+                language = detected_language
+        return " ".join(texts), language
@@ -0,0 +1,136 @@
+"""
+Per-stage latency instrumentation for interview sessions.
+
+StageTracer records a high-resolution span for every speak / record /
+transcribe / analyse / follow-up step, tagged with the current question and
+attempt plus payload sizes, and exports them as JSON lines or in Chrome trace
+format (load the file in chrome://tracing or https://ui.perfetto.dev).
+"""
+
+import contextvars
+import json
+import math
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, List
+
+# Attributes (question id, attempt, ...) attached to every span opened in the
+# current thread or asyncio task
+_trace_context = contextvars.ContextVar('trace_context', default={})
+
+
+def percentile(values: List[float], fraction: float) -> float:
+    """Nearest-rank percentile of a non-empty list"""
+    ordered = sorted(values)
+    index = max(0, math.ceil(fraction * len(ordered)) - 1)
+    return ordered[index]
+
+
+class StageTracer:
+    """Collects timed spans for one interview session"""
+
+    def __init__(self):
+        self.spans = []
+        self._lock = threading.Lock()
+        self._origin_ns = time.perf_counter_ns()
+        self.started_at = time.time()
+
+    @contextmanager
+    def context(self, **attrs):
+        """Tag every span opened inside this block with `attrs`"""
+        token = _trace_context.set({**_trace_context.get(), **attrs})
+        try:
+            yield
+        finally:
+            _trace_context.reset(token)
+
+    def current_context(self) -> Dict:
+        """Attributes set by the enclosing context() blocks"""
+        return dict(_trace_context.get())
+
+    @contextmanager
+    def span(self, stage: str, **attrs):
+        """
+        Time a stage. The yielded dict holds the span's attributes; add
+        payload sizes or outcomes to it before the block ends.
+        """
+        info = {**_trace_context.get(), **attrs}
+        start = time.perf_counter_ns()
+        try:
+            yield info
+        except BaseException as e:
+            info['error'] = type(e).__name__
+            raise
+        finally:
+            end = time.perf_counter_ns()
+            record = {
+                "stage": stage,
+                "start_ms": (start - self._origin_ns) / 1e6,
+                "duration_ms": (end - start) / 1e6,
+                "thread": threading.get_ident(),
+                **info
+            }
+            with self._lock:
+                self.spans.append(record)
+
+    def retry_count(self) -> int:
+        """Extra attempts beyond the first, over all questions"""
+        attempts = {}
+        for span in self.spans:
+            if 'question_id' in span and 'attempt' in span:
+                question_id = span['question_id']
+                attempts[question_id] = max(attempts.get(question_id, 1), span['attempt'])
+        return sum(count - 1 for count in attempts.values())
+
+    def stage_summary(self) -> Dict[str, Dict]:
+        """count / total / p50 / p95 / max milliseconds per stage"""
+        durations = {}
+        for span in self.spans:
+            durations.setdefault(span['stage'], []).append(span['duration_ms'])
+
+        return {
+            stage: {
+                "count": len(values),
+                "total_ms": sum(values),
+                "p50_ms": percentile(values, 0.50),
+                "p95_ms": percentile(values, 0.95),
+                "max_ms": max(values),
+            }
+            for stage, values in durations.items()
+        }
+
+    def write_jsonl(self, path: str):
+        with open(path, 'w', encoding='utf-8') as f:
+            for span in self.spans:
+                f.write(json.dumps(span, ensure_ascii=False) + "\n")
+
+    def write_chrome_trace(self, path: str):
+        events = []
+        for span in self.spans:
+            args = {k: v for k, v in span.items() if k not in ('stage', 'start_ms', 'duration_ms', 'thread')}
+            events.append({
+                "name": span['stage'],
+                "cat": "interview",
+                "ph": "X",
+                "ts": span['start_ms'] * 1000,
+                "dur": span['duration_ms'] * 1000,
+                "pid": os.getpid(),
+                "tid": span['thread'],
+                "args": args
+            })
+
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, f)
+
+    def export(self, data_filepath: str, trace_format: str) -> str:
+        """Write the trace next to a saved interview file; return the trace path"""
+        base, _ = os.path.splitext(data_filepath)
+        if trace_format == 'chrome':
+            path = f"{base}.trace.json"
+            self.write_chrome_trace(path)
+        else:
+            path = f"{base}.trace.jsonl"
+            self.write_jsonl(path)
+        return path
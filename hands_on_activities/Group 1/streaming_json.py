@@ -0,0 +1,102 @@
+"""
+Tolerant JSON parsing for language-model replies.
+
+Models asked for JSON sometimes wrap it in prose or a ``` code fence.
+extract_json() finds the object wherever it sits in the reply, and
+IncrementalJSONObject parses a streamed reply field by field, so callers can
+act on early fields (e.g. "adequately_answered") before generation finishes.
+"""
+
+import json
+import re
+from typing import Any, Dict
+
+_decoder = json.JSONDecoder()
+
+
+def extract_json(text: str) -> Dict:
+    """Return the first JSON object in `text`; raise ValueError if there is none"""
+    try:
+        value = json.loads(text)
+        if isinstance(value, dict):
+            return value
+    except ValueError:
+        pass
+
+    for match in re.finditer(r'\{', text):
+        try:
+            value, _ = _decoder.raw_decode(text, match.start())
+        except ValueError:
+            continue
+        if isinstance(value, dict):
+            return value
+
+    raise ValueError("No JSON object found in model response")
+
+
+class IncrementalJSONObject:
+    """
+    Parses the top-level fields of a JSON object as its text arrives.
+
+    feed() returns the fields completed by each chunk. Anything before the
+    first opening brace is skipped, so a leading sentence or code fence does
+    no harm. The raw text is kept in `text` for a final extract_json().
+    """
+
+    def __init__(self):
+        self.text = ""
+        self.fields = {}
+        self.complete = False
+        self._pos = 0
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self._field_start = None
+
+    def feed(self, chunk: str) -> Dict[str, Any]:
+        self.text += chunk
+        new_fields = {}
+
+        text = self.text
+        while self._pos < len(text) and not self.complete:
+            char = text[self._pos]
+
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif char == '\\':
+                    self._escape = True
+                elif char == '"':
+                    self._in_string = False
+            elif self._depth == 0:
+                # Prose before the object: only an opening brace matters
+                if char == '{':
+                    self._depth = 1
+                    self._field_start = self._pos + 1
+            elif char == '"':
+                self._in_string = True
+            elif char in '{[':
+                self._depth += 1
+            elif char in '}]':
+                self._depth -= 1
+                if self._depth == 0:
+                    self._emit(text[self._field_start:self._pos], new_fields)
+                    self.complete = True
+            elif char == ',' and self._depth == 1:
+                self._emit(text[self._field_start:self._pos], new_fields)
+                self._field_start = self._pos + 1
+
+            self._pos += 1
+
+        return new_fields
+
+    def _emit(self, member: str, new_fields: Dict):
+        """Parse one `"name": value` member and record it"""
+        if not member.strip():
+            return
+        try:
+            field = json.loads("{" + member + "}")
+        except ValueError:
+            return
+        self.fields.update(field)
+        new_fields.update(field)
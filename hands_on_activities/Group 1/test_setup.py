@@ -28,7 +28,8 @@ def test_environment():
     # Check other environment variables
     config_vars = [
         'AUDIO_CHUNK', 'AUDIO_CHANNELS', 'AUDIO_RATE', 'RECORD_DURATION',
-        'TTS_RATE', 'TTS_VOLUME', 'OUTPUT_DIRECTORY', 'MAX_RETRIES'
+        'TTS_RATE', 'TTS_VOLUME', 'OUTPUT_DIRECTORY', 'MAX_RETRIES',
+        'RECORD_MODE', 'PIPELINE_MODE'
     ]
     
     for var in config_vars:
@@ -138,13 +139,428 @@ def test_tts():
         print(f"❌ TTS test failed: {e}")
         return False
 
+def test_vad_capture():
+    """Test voice-activity endpointing on a synthetic in-memory recording"""
+    print("\n🧪 Testing Voice Activity Detection...")
+    
+    try:
+        import math
+        import struct
+        from audio_capture import BufferSource, record_until_silence
+        
+        rate, chunk = 16000, 1024
+        
+        def tone(seconds, amplitude):
+            return b''.join(
+                struct.pack('<h', int(amplitude * math.sin(i / 5)))
+                for i in range(int(rate * seconds))
+            )
+        
+        # 1s speech followed by 5s of near-silence
+        pcm = tone(1, 8000) + tone(5, 50)
+        frames = record_until_silence(BufferSource(pcm, rate), chunk,
+                                      max_duration=15, silence_duration=1.0)
+        captured = len(frames) * chunk / rate
+        
+        if captured < 3:
+            print(f"✅ Recording stopped after {captured:.1f}s of a 6s take")
+            return True
+        else:
+            print(f"❌ Recording did not stop on silence ({captured:.1f}s captured)")
+            return False
+        
+    except Exception as e:
+        print(f"❌ VAD test failed: {e}")
+        return False
+
+def test_audio_quality():
+    """Test the pre-upload quality check on synthetic takes"""
+    print("\n🧪 Testing Audio Quality Check...")
+    
+    try:
+        import math
+        import struct
+        from concurrent.futures import ThreadPoolExecutor
+        from functools import partial
+        from audio_quality import QualityGate
+        from speculative import PartialTranscription
+        
+        rate = 16000
+        
+        def take(seconds, amplitude, hiss=0):
+            samples = (
+                amplitude * math.sin(i / 5) * (0.5 + 0.5 * math.sin(i / 1500)) + hiss * math.sin(i * 1.7)
+                for i in range(int(rate * seconds))
+            )
+            return b''.join(struct.pack('<h', int(max(-32768, min(32767, x)))) for x in samples)
+        
+        gate = QualityGate()
+        cases = [
+            ("spoken answer", take(1, 8000) + take(2, 50), None),
+            ("short 'yes'", take(0.3, 6000) + take(5, 50), None),
+            ("silence", take(3, 50), 'silent'),
+            ("clipped", take(2, 60000), 'clipped'),
+            ("noise", take(3, 2000, hiss=2500), 'noisy'),
+        ]
+        passed = True
+        for name, pcm, expected in cases:
+            problem = gate.check(pcm, rate)['problem']
+            verdict = f"rejected as {problem}" if problem else "kept"
+            if problem == expected:
+                print(f"✅ {name}: {verdict}")
+            else:
+                print(f"❌ {name}: {verdict}, expected {f'rejected as {expected}' if expected else 'kept'}")
+                passed = False
+        
+        # In speculative mode a clipped segment must not be uploaded
+        uploads = []
+        with ThreadPoolExecutor(max_workers=1) as pool:
+            speculation = PartialTranscription(lambda clip: uploads.append(clip) or ("", None), pool, rate,
+                                               segment_seconds=1.0,
+                                               check=partial(gate.passes, rate=rate, channels=1))
+            clipped = take(3, 60000)
+            for offset in range(0, len(clipped), 2048):
+                speculation.feed(clipped[offset:offset + 2048])
+            if speculation.result() is None and not uploads:
+                print("✅ clipped speculative segments: not uploaded")
+            else:
+                print(f"❌ clipped speculative segments: {len(uploads)} uploaded")
+                passed = False
+        
+        print(f"📊 {gate.stats()['check_ms_avg']:.1f} ms per take")
+        return passed
+        
+    except Exception as e:
+        print(f"❌ Audio quality test failed: {e}")
+        return False
+
+def test_preclassifier():
+    """Test which answers the local pre-classifier accepts and which it leaves to the model"""
+    print("\n🧪 Testing Answer Pre-classifier...")
+    
+    try:
+        from preclassifier import (validate_country, validate_language, validate_name,
+                                   validate_no_previous_application)
+        
+        no_application = "No previous asylum applications"
+        cases = [
+            (validate_name, "Benjamin Ching", "Benjamin Ching"),
+            (validate_name, "My name is Amina Hassan.", "Amina Hassan"),
+            (validate_name, "Omar al Rashid", "Omar al Rashid"),
+            (validate_name, "Sorry. What did you say?", None),
+            (validate_name, "Sorry what", None),
+            (validate_name, "I don't understand the question", None),
+            (validate_name, "Benjamin", None),
+            (validate_country, "Syria.", "Syria"),
+            (validate_country, "I am from Eritrea.", "Eritrea"),
+            (validate_country, "From the Democratic Republic of the Congo", "Democratic Republic of the Congo"),
+            (validate_country, "I'm Afghan", "Afghanistan"),
+            (validate_country, "I lived in Turkey for two years.", None),
+            (validate_country, "I came through Turkey and Greece.", None),
+            (validate_country, "I am from Syria but I travelled via Turkey", None),
+            (validate_language, "Tigrinya and Amharic", "Tigrinya, Amharic"),
+            (validate_language, "My native language is Dari.", "Dari"),
+            (validate_language, "My native language is Arabic and I also speak French and English.", None),
+            (validate_language, "Sorry, can you repeat that? I only understand a little English.", None),
+            (validate_language, "I don't speak Arabic.", None),
+            (validate_no_previous_application, "No.", no_application),
+            (validate_no_previous_application, "No, I have not.", no_application),
+            (validate_no_previous_application, "I have never applied for asylum before.", no_application),
+            (validate_no_previous_application, "Not in Switzerland, but I applied in the Netherlands.", None),
+            (validate_no_previous_application, "No, I have applied before.", None),
+            (validate_no_previous_application, "Yes, in Italy.", None),
+        ]
+        failed = [f"{validate.__name__}({answer!r}) = {validate(answer)!r}"
+                  for validate, answer, expected in cases if validate(answer) != expected]
+        
+        if failed:
+            for failure in failed:
+                print(f"❌ {failure}")
+            return False
+        print(f"✅ {len(cases)} answers classified as expected")
+        return True
+        
+    except Exception as e:
+        print(f"❌ Pre-classifier test failed: {e}")
+        return False
+
+def test_question_flow():
+    """Test that the default question flow compiles and branches on the previous-application answer"""
+    print("\n🧪 Testing Question Flow...")
+    
+    try:
+        import contextlib
+        import io
+        import struct
+        import tempfile
+        from audio_capture import BufferSource, audio_bytes
+        from backends import AudioInputBackend, RuleBasedAnalyser, SilentTTS, TranscriptionBackend
+        from question_flow import DEFAULT_FLOW_PATH, compile_flow
+        from session_replay import patched_environment
+        from voice_test import AsylumInterviewAgent
+        
+        flow = compile_flow(DEFAULT_FLOW_PATH)
+        previous_question = flow.questions[flow.index['previous_applications']]['question']
+        
+        def walk(previous_application):
+            answers = {}
+            asked = []
+            position = flow.start
+            while position is not None and len(asked) <= len(flow.questions):
+                question_id = flow.questions[position]['id']
+                asked.append(question_id)
+                answer = previous_application if question_id == 'previous_applications' else "Yes."
+                answers[question_id] = {"raw_response": answer, "processed_info": {"follow_up_needed": False}}
+                position = flow.next_index(position, answers)
+            return asked
+        
+        def walk_pipelined(previous_application):
+            """Run a pipelined interview; each recording carries its number in every sample"""
+            answers = []
+            
+            class Voice(SilentTTS):
+                prompt = ""
+                
+                def say(self, text):
+                    Voice.prompt = text
+            
+            class Microphone(AudioInputBackend):
+                def open_source(self, rate, channels, chunk):
+                    answers.append(previous_application if Voice.prompt == previous_question
+                                   else "A complete answer.")
+                    return BufferSource(struct.pack('<h', len(answers)) * rate, rate, channels)
+            
+            class Transcriber(TranscriptionBackend):
+                def transcribe(self, audio, language=None):
+                    number = struct.unpack('<h', bytes(audio_bytes(audio)[44:46]))[0]
+                    return answers[number - 1], "en"
+            
+            with tempfile.TemporaryDirectory() as output_dir, \
+                    patched_environment({"PIPELINE_MODE": "true", "OUTPUT_DIRECTORY": output_dir,
+                                         "JOURNAL_ENABLED": "false", "CACHE_ENABLED": "false",
+                                         "AUDIO_QUALITY_CHECK": "false", "PRECLASSIFIER_ENABLED": "false",
+                                         "ANALYSIS_MODE": "per_answer", "QUESTION_FLOW": DEFAULT_FLOW_PATH}), \
+                    contextlib.redirect_stdout(io.StringIO()):
+                agent = AsylumInterviewAgent(transcriber=Transcriber(), analyser=RuleBasedAnalyser(),
+                                             tts=Voice(), audio_input=Microphone())
+                try:
+                    agent.conduct_interview()
+                finally:
+                    agent.close()
+            return list(agent.interview_data)
+        
+        paths = [
+            ("No, I have not.", False),
+            ("Yes, in Italy in 2021.", True),
+            ("No, but my brother applied in Germany.", True),
+        ]
+        passed = True
+        for mode, walker in (("sequential", walk), ("pipelined", walk_pipelined)):
+            for answer, asks_details in paths:
+                asked = walker(answer)
+                complete = asked[-1] == 'documentation' and 'previous_applications' in asked
+                if complete and ('previous_applications_details' in asked) == asks_details:
+                    print(f"✅ {mode}, {answer!r}: {len(asked)} questions, "
+                          f"details {'asked' if asks_details else 'skipped'}")
+                else:
+                    print(f"❌ {mode}, {answer!r}: asked {' -> '.join(asked)}")
+                    passed = False
+        return passed
+        
+    except Exception as e:
+        print(f"❌ Question flow test failed: {e}")
+        return False
+
+def test_circuit_breaker():
+    """Test retries and the circuit breaker's open -> half-open -> closed cycle"""
+    print("\n🧪 Testing Circuit Breaker...")
+    
+    try:
+        import contextlib
+        import io
+        import time
+        from resilience import CallDeferred, CircuitBreaker, RateLimitBackoff, ResilientCaller
+        
+        class ServiceDown(Exception):
+            status_code = 503
+        
+        class BadRequest(Exception):
+            status_code = 400
+        
+        def fail(error):
+            def call():
+                raise error
+            return call
+        
+        def deferred(caller, func):
+            try:
+                caller.call('transcribe', func)
+            except CallDeferred:
+                return True
+            return False
+        
+        caller = ResilientCaller(RateLimitBackoff(max_attempts=3, base_delay=0.001, max_delay=0.001),
+                                 failure_threshold=2, reset_timeout=0.05)
+        breaker = caller.breaker('transcribe')
+        checks = []
+        with contextlib.redirect_stdout(io.StringIO()):
+            # Retries within one call count as a single failure
+            checks.append(("retried call deferred", deferred(caller, fail(ServiceDown()))))
+            checks.append(("one failure per call", breaker.failures == 1 and breaker.state == CircuitBreaker.CLOSED))
+            deferred(caller, fail(ServiceDown()))
+            checks.append(("opens after threshold", breaker.state == CircuitBreaker.OPEN))
+            checks.append(("short-circuits while open", deferred(caller, lambda: "never called")))
+            
+            # A trial ending in a non-transient error must not leave the circuit stuck half-open
+            time.sleep(0.06)
+            try:
+                caller.call('transcribe', fail(BadRequest()))
+            except BadRequest:
+                pass
+            checks.append(("trial released", caller.call('transcribe', lambda: "ok") == "ok"))
+            checks.append(("closes after a good trial", breaker.state == CircuitBreaker.CLOSED))
+            
+            # A failed trial re-opens the circuit
+            for _ in range(2):
+                deferred(caller, fail(ServiceDown()))
+            time.sleep(0.06)
+            deferred(caller, fail(ServiceDown()))
+            checks.append(("failed trial re-opens", breaker.state == CircuitBreaker.OPEN and breaker.opened == 3))
+            
+            # Without a time budget a TimeoutError from the call is retried, not a TypeError
+            unlimited = ResilientCaller(RateLimitBackoff(max_attempts=2, base_delay=0.001, max_delay=0.001),
+                                        timeout=None)
+            checks.append(("TimeoutError without budget", deferred(unlimited, fail(TimeoutError()))))
+            
+            # With one, an overrunning attempt is abandoned and handed back to the caller
+            budgeted = ResilientCaller(RateLimitBackoff(max_attempts=2), timeout=0.05)
+            try:
+                budgeted.call('analyse', time.sleep, 0.3)
+                checks.append(("overrun deferred", False))
+            except CallDeferred as e:
+                checks.append(("overrun deferred", e.pending is not None and not e.pending.done()))
+            budgeted.close()
+        
+        failed = [name for name, passed in checks if not passed]
+        if failed:
+            print(f"❌ Circuit breaker checks failed: {', '.join(failed)}")
+            return False
+        print(f"✅ {len(checks)} retry and circuit breaker checks passed")
+        return True
+        
+    except Exception as e:
+        print(f"❌ Circuit breaker test failed: {e}")
+        return False
+
+def test_connection_pool():
+    """Test connection reuse and shared rate limiting against a local mock API server"""
+    print("\n🧪 Testing Shared Connection Pool...")
+    
+    try:
+        import asyncio
+        import json
+        import threading
+        import time
+        from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+        from http_pool import ClientPool
+        
+        completion = json.dumps({
+            "id": "chatcmpl-test", "object": "chat.completion", "created": 0, "model": "gpt-4",
+            "choices": [{"index": 0, "finish_reason": "stop",
+                         "message": {"role": "assistant", "content": "{}"}}]
+        }).encode()
+        
+        class MockAPI(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            
+            def do_POST(self):
+                self.rfile.read(int(self.headers.get('Content-Length', 0)))
+                if self.path.endswith('/rate-limited'):
+                    self.send_response(429)
+                    self.send_header('Retry-After', '0.3')
+                    body = b'{"error": {"message": "rate limited"}}'
+                else:
+                    self.send_response(200)
+                    self.send_header('x-ratelimit-remaining-requests', '499')
+                    body = completion
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+            
+            def log_message(self, *args):
+                pass
+        
+        server = ThreadingHTTPServer(('127.0.0.1', 0), MockAPI)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        base_url = f"http://127.0.0.1:{server.server_address[1]}/v1"
+        pool = ClientPool(max_connections=4, max_keepalive=4)
+        
+        try:
+            # Two "agents" with their own OpenAI clients, five questions each
+            agents = [pool.openai_client("test-key", base_url=base_url, max_retries=0),
+                      pool.openai_client("other-key", base_url=base_url, max_retries=0)]
+            # The SDK's own retries are off: they would multiply ResilientCaller's attempts
+            sdk_retries = pool.openai_client("test-key", base_url=base_url).max_retries
+            for _ in range(5):
+                for client in agents:
+                    client.chat.completions.create(model="gpt-4", messages=[{"role": "user", "content": "Hi"}])
+            
+            # A 429 for one caller pauses the next request of every caller
+            pool.http_client().post(f"{base_url}/rate-limited", content=b"{}")
+            start = time.monotonic()
+            agents[1].chat.completions.create(model="gpt-4", messages=[{"role": "user", "content": "Hi"}])
+            paused = time.monotonic() - start
+            
+            # Async clients share the pool too, on every event loop they are used from
+            async def ask():
+                client = pool.async_openai_client("test-key", base_url=base_url, max_retries=0)
+                await asyncio.gather(*(client.chat.completions.create(
+                    model="gpt-4", messages=[{"role": "user", "content": "Hi"}]) for _ in range(3)))
+            asyncio.run(ask())
+            asyncio.run(ask())
+            # ... and close each loop's connections when asyncio.run() shuts the loop down
+            open_loops = pool.stats()['open_event_loops']
+        finally:
+            pool.close()
+            server.shutdown()
+            server.server_close()
+        
+        stats = pool.stats()
+        if stats['requests'] != 18:
+            print(f"❌ Expected 18 requests through the pool, saw {stats['requests']}")
+            return False
+        if stats['connections_opened'] > 1 + 3 + 3:
+            print(f"❌ Connections were not reused ({stats['connections_opened']} opened for 18 requests)")
+            return False
+        if sdk_retries != 0:
+            print(f"❌ Pooled OpenAI clients retry on their own ({sdk_retries} SDK retries)")
+            return False
+        if open_loops:
+            print(f"❌ Connections of {open_loops} finished event loop(s) were left open")
+            return False
+        if stats['rate_limited'] != 1 or paused < 0.25:
+            print(f"❌ Rate limit was not shared (paused {paused:.2f}s after a 429)")
+            return False
+        
+        print(f"✅ {stats['requests']} requests over {stats['connections_opened']} connections "
+              f"({stats['reuse_rate']:.0%} reused); a 429 paused the next caller for {paused:.2f}s")
+        return True
+        
+    except ImportError as e:
+        print(f"❌ Connection pool test needs the OpenAI SDK and httpx: {e}")
+        return False
+    except Exception as e:
+        print(f"❌ Connection pool test failed: {e}")
+        return False
+
 def test_openai_connection():
     """Test OpenAI API connection"""
     print("\n🧪 Testing OpenAI Connection...")
     
     try:
-        from openai import OpenAI
-        client = OpenAI(api_key=os.getenv('OPENAI_API_KEY'))
+        from backends import openai_client
+        client = openai_client(os.getenv('OPENAI_API_KEY'))
         
         # Test with a simple completion
         response = client.chat.completions.create(
@@ -175,6 +591,12 @@ def main():
         ("Package Imports", test_imports),
         ("Audio Devices", test_audio_devices),
         ("Text-to-Speech", test_tts),
+        ("Voice Activity Detection", test_vad_capture),
+        ("Audio Quality Check", test_audio_quality),
+        ("Answer Pre-classifier", test_preclassifier),
+        ("Question Flow", test_question_flow),
+        ("Circuit Breaker", test_circuit_breaker),
+        ("Shared Connection Pool", test_connection_pool),
         ("OpenAI Connection", test_openai_connection)
     ]
     
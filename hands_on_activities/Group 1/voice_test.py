@@ -1,31 +1,135 @@
 import os
+import copy
 import json
-import wave
+import argparse
 import tempfile
 import threading
-import signal
-import requests
-import base64
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
 from datetime import datetime
+from functools import partial
 from typing import Dict, List, Optional, Tuple
-import pyaudio
-import pyttsx3
-from openai import OpenAI
 from dotenv import load_dotenv
+from audio_capture import (
+    Audio,
+    AudioClip,
+    PCMBufferPool,
+    PCMSource,
+    SilenceEndpointer,
+    VoiceActivityDetector,
+    audio_bytes,
+    buffer_capacity,
+    iter_chunks,
+)
+from backends import (
+    AnalysisBackend,
+    AudioInputBackend,
+    RuleBasedAnalyser,
+    TranscriptionBackend,
+    TTSBackend,
+    create_local_backends,
+    create_openai_backends,
+    error_processed_info,
+)
+from archive import archive_from_env
+from audio_encoding import upload_encoder_from_env
+from audio_quality import FEEDBACK as QUALITY_FEEDBACK, quality_gate_from_env
+from language_session import language_session_from_env
+from preclassifier import preclassifier_from_env
+from report import answer_blocks
+from prompt_audio import prompt_cache_from_env
+from question_flow import flow_source_from_env
+from speculative import PartialTranscription
+from result_cache import CachedAnalyser, CachedTranscriber, result_cache_from_env
+from session_journal import (
+    SessionJournal,
+    interview_document,
+    journal_directory,
+    journal_enabled,
+    latest_unfinished_journal,
+    new_session_id,
+)
+from session_replay import cassette_from_env, record_backends, replay_session_from_env, session_outcome
+from http_pool import used_pool_stats
+from resilience import CallDeferred, OfflineQueue, offline_queue_directory, resilient_caller_from_env
+from stage_timer import StageTracer
 
 # Load environment variables
 load_dotenv()
 
+class DeferredTranscript(str):
+    """Placeholder transcript for an answer kept in the offline queue; `path` is the kept recording"""
+    
+    def __new__(cls, path: str):
+        transcript = super().__new__(cls, "[Recording kept for offline transcription]")
+        transcript.path = path
+        return transcript
+
+
 class AsylumInterviewAgent:
     """
     Intelligent agent for conducting asylum interviews with voice interaction,
     automatic transcription, and structured data extraction.
     """
     
-    def __init__(self):
-        """Initialize the asylum interview agent with environment configuration"""
+    WELCOME_MESSAGE = """Welcome to the asylum interview system. I am an AI assistant that will help collect your information for your asylum application. 
+        
+        I will ask you several questions about your background and reasons for seeking asylum. Please speak clearly after each question. 
+        
+        You can ask me to repeat a question at any time. Let's begin."""
+    
+    COMPLETION_MESSAGE = """Thank you for completing the interview. Your responses have been recorded and will be processed for your asylum application. 
+        
+        The information will be reviewed and may be used to prepare for your official interview with the authorities."""
+    
+    RESUME_MESSAGE = "Welcome back. We will continue the interview where we left off."
+    
+    RECORDING_FAILED_MESSAGE = "I couldn't record your response. Let me try again."
+    NOT_UNDERSTOOD_MESSAGE = "I couldn't understand your response. Please try again."
+    REQUIRED_QUESTION_MESSAGE = "This is a required question. Let me try a different approach."
+    PIPELINED_NOT_UNDERSTOOD_MESSAGE = "Let's go back to an earlier question. I couldn't understand your response."
+    PIPELINED_REQUIRED_MESSAGE = "This is a required question. A case worker will follow up with you on it."
+    
+    def __init__(self, transcriber: Optional[TranscriptionBackend] = None,
+                 analyser: Optional[AnalysisBackend] = None,
+                 tts: Optional[TTSBackend] = None,
+                 audio_input: Optional[AudioInputBackend] = None):
+        """
+        Initialize the asylum interview agent with environment configuration.
+        
+        Any backend not passed in is taken from INTERVIEW_BACKEND: "openai"
+        (Whisper, GPT-4, pyttsx3, PyAudio) or "local" (offline stubs).
+        """
         # Load configuration from environment
-        self.openai_client = OpenAI(api_key=os.getenv('OPENAI_API_KEY'))
+        self.backend_name = os.getenv('INTERVIEW_BACKEND', 'openai').lower()
+        
+        # REPLAY_SESSION serves a recorded session's interactions in place of
+        # the real backends; RECORD_SESSION records this session's
+        self.replay = replay_session_from_env()
+        if None in (transcriber, analyser, tts, audio_input):
+            defaults = self.replay.backends() if self.replay else self._default_backends()
+            transcriber = transcriber or defaults['transcriber']
+            analyser = analyser or defaults['analyser']
+            tts = tts or defaults['tts']
+            audio_input = audio_input or defaults['audio_input']
+        self.cassette = cassette_from_env()
+        if self.cassette:
+            transcriber, analyser, tts, audio_input = record_backends(
+                self.cassette, transcriber, analyser, tts, audio_input)
+        
+        # Wrap transcription/analysis in the persistent result cache, unless
+        # the caller already shares a cached backend across agents
+        if isinstance(transcriber, CachedTranscriber):
+            self.result_cache = transcriber.cache
+        else:
+            self.result_cache = result_cache_from_env()
+            if self.result_cache:
+                transcriber = CachedTranscriber(transcriber, self.result_cache)
+                analyser = CachedAnalyser(analyser, self.result_cache)
+        
+        self.transcriber = transcriber
+        self.analyser = analyser
+        self.tts = tts
+        self.audio_input = audio_input
         
         # Audio settings
         self.audio_chunk = int(os.getenv('AUDIO_CHUNK', 1024))
@@ -33,9 +137,38 @@ class AsylumInterviewAgent:
         self.audio_rate = int(os.getenv('AUDIO_RATE', 44100))
         self.record_duration = int(os.getenv('RECORD_DURATION', 15))
         
-        # TTS settings
-        self.tts_engine = pyttsx3.init()
+        # Recording mode: "fixed" always records the full duration,
+        # "vad" stops once the applicant has stopped speaking
+        self.record_mode = os.getenv('RECORD_MODE', 'fixed').lower()
+        self.vad_silence_duration = float(os.getenv('VAD_SILENCE_DURATION', 1.5))
+        self.vad_energy_threshold = float(os.getenv('VAD_ENERGY_THRESHOLD', 500))
+        
+        # Keep recordings in memory and hand them straight to transcription
+        # instead of writing a temporary WAV file per answer
+        self.audio_in_memory = os.getenv('AUDIO_IN_MEMORY', 'false').lower() == 'true'
+        self.audio_buffers = PCMBufferPool()
+        
+        # Silent, clipped or noisy takes are caught locally, before upload
+        self.quality_gate = quality_gate_from_env()
+        self.take_quality = {}  # (question id, attempt or 'follow_up') -> metrics of the kept take
+        self.rejected_takes = {}  # question id -> metrics of takes rejected by the gate
+        self.last_take_problem = None
+        
+        # Optional resample/trim/compress stage before upload
+        self.upload_encoder = upload_encoder_from_env()
         
+        # Speculative mode transcribes answers segment by segment while they
+        # are recorded and pre-renders each question's follow-up prompt
+        self.speculative_mode = os.getenv('SPECULATIVE_MODE', 'false').lower() == 'true'
+        self.speculative_segment_seconds = float(os.getenv('SPECULATIVE_SEGMENT_SECONDS', 4))
+        # Pre-render the prompts of the questions that can come next in the flow
+        self.flow_prefetch = os.getenv('QUESTION_FLOW_PREFETCH', 'false').lower() == 'true'
+        self.speculation_pool = ThreadPoolExecutor(max_workers=3) \
+            if self.speculative_mode or self.flow_prefetch else None
+        self.speculations = {}  # recorded answer -> PartialTranscription
+        self.prerendered = {}  # prompt text -> future of a rendered audio file
+        
+        # TTS settings
         self.setup_tts()
         
         # Output settings
@@ -45,400 +178,960 @@ class AsylumInterviewAgent:
         # Interview settings
         self.max_retries = int(os.getenv('MAX_RETRIES', 3))
         self.question_timeout = int(os.getenv('QUESTION_TIMEOUT', 30))
+        
+        # Transcription and analysis calls are retried on their own, within
+        # QUESTION_TIMEOUT seconds, and behind a circuit breaker; an answer
+        # that cannot be processed now is kept in the offline queue instead
+        # of being asked again
+        self.resilience = resilient_caller_from_env(self.question_timeout)
+        # Created on first use, named after the session; pipelined workers may get there together
+        self.offline_queue = None
+        self._offline_queue_lock = threading.Lock()
         self.default_language = os.getenv('DEFAULT_LANGUAGE', 'auto')
+        # With auto-detection, hint the language once the session has settled on one
+        self.language_session = language_session_from_env(self.default_language)
+        
+        # Pipelined mode hands transcription/analysis to worker threads while
+        # the next question is being asked
+        self.pipeline_mode = os.getenv('PIPELINE_MODE', 'false').lower() == 'true'
+        self.pipeline_workers = int(os.getenv('PIPELINE_WORKERS', 2))
+        
+        # Analysis mode: "per_answer" sends every answer to the analyser,
+        # "stream" does the same but moves on as soon as the verdict fields
+        # have streamed in, "section" / "interview" only run a local adequacy
+        # check per answer and analyse each category (or the whole interview)
+        # in one request
+        self.analysis_mode = os.getenv('ANALYSIS_MODE', 'per_answer').lower()
+        self.adequacy_checker = RuleBasedAnalyser(min_words=int(os.getenv('ADEQUACY_MIN_WORDS', 2)))
+        
+        # Local per-category validators that settle obvious answers without the analyser
+        self.preclassifier = preclassifier_from_env()
+        self.stream_pool = ThreadPoolExecutor(max_workers=2) if self.analysis_mode == 'stream' else None
+        self.streams_pending = []  # analyses still generating after their verdict was used
         
         # Create output directory if it doesn't exist
         os.makedirs(self.output_dir, exist_ok=True)
         
+        # Per-stage timing trace, exported next to the saved interview data
+        self.tracer = StageTracer()
+        self.trace_format = os.getenv('TRACE_FORMAT', 'jsonl').lower()
+        
         # Interview state
         self.interview_data = {}
         self.current_question_index = 0
         self.detected_languages = set()
+        self.batch_pending = []  # answered question ids awaiting batched analysis
+        self.completed_questions = set()
         
-        # Define interview questions with categories
+        # Append-only journal of the session, opened when the interview starts
+        # (or by resume()) so an interrupted session can be continued
+        self.journal = None
+        self.resumed = False
+        
+        # Define interview questions with categories; the flow decides their
+        # order and follow-ups from the answers (QUESTION_FLOW, reloaded on change)
+        self.flow_source = flow_source_from_env()
+        self.flow = self.flow_source.flow
         self.questions = self._load_interview_questions()
         
+        # Pre-rendered audio for the fixed script, warmed in the background
+        self.prompt_cache = prompt_cache_from_env(self.tts)
+        if self.prompt_cache:
+            self.prompt_cache.warm_in_background(self.script_prompts())
+        
         print("🤖 Asylum Interview Agent initialized successfully")
     
+    def _default_backends(self) -> Dict:
+        """Backends selected by INTERVIEW_BACKEND"""
+        if self.backend_name == 'local':
+            return create_local_backends(os.getenv('LOCAL_AUDIO_DIR'), os.getenv('LOCAL_TRANSCRIPTS_FILE'))
+        return create_openai_backends(os.getenv('OPENAI_API_KEY'))
+    
     def setup_tts(self):
         """Configure text-to-speech engine to use Emma voice"""
         try:
-            voices = self.tts_engine.getProperty('voices')
-            if voices:
-                # Look for Emma voice first, then other high-quality female voices
-                preferred_voices = [
-                    'Emma',      # Preferred Emma voice
-                    'Samantha',  # High-quality female voice
-                    'Karen',     # Australian female voice
-                    'Moira',     # Irish female voice
-                    'Alice',     # Italian female voice
-                ]
-                
-                selected_voice = None
-                
-                # First try to find exact name matches
-                for preferred_name in preferred_voices:
-                    for voice in voices:
-                        if voice.name.lower() == preferred_name.lower():
-                            selected_voice = voice.id
-                            print(f"🎤 Found preferred voice: {voice.name}")
-                            break
-                    if selected_voice:
-                        break
-                
-                # If no exact match, look for voices containing the preferred names
-                if not selected_voice:
-                    for preferred_name in preferred_voices:
-                        for voice in voices:
-                            if preferred_name.lower() in voice.name.lower():
-                                selected_voice = voice.id
-                                print(f"🎤 Found similar voice: {voice.name}")
-                                break
-                        if selected_voice:
-                            break
-                
-                # Final fallback - use system default
-                if not selected_voice:
-                    selected_voice = voices[0].id
-                    print(f"🎤 Using default voice: {voices[0].name}")
-                
-                self.tts_engine.setProperty('voice', selected_voice)
-                print("🎤 Voice selected successfully")
-            
             # Optimize speech parameters
             rate = int(os.getenv('TTS_RATE', 175))
             volume = float(os.getenv('TTS_VOLUME', 0.9))
             
-            self.tts_engine.setProperty('rate', rate)
-            self.tts_engine.setProperty('volume', volume)
-            
-            print(f"🎤 TTS configured - Rate: {rate} WPM, Volume: {volume}")
+            if hasattr(self.tts, 'setup'):
+                self.tts.setup(rate, volume)
+                print(f"🎤 TTS configured - Rate: {rate} WPM, Volume: {volume}")
             
         except Exception as e:
             print(f"⚠️ TTS setup warning: {e}")
             print("📢 Using default TTS settings")
     
     def _load_interview_questions(self) -> List[Dict]:
-        """Load structured interview questions"""
-        return [
-            {
-                "id": "personal_info_1",
-                "category": "personal_information",
-                "question": "Please state your full name as it appears on your documents.",
-                "required": True,
-                "follow_up": "Could you spell your last name for me?"
-            },
-            {
-                "id": "origin_1",
-                "category": "origin",
-                "question": "What is your country of origin?",
-                "required": True,
-                "follow_up": "Which specific city or region are you from?"
-            },
-            {
-                "id": "language_1",
-                "category": "language",
-                "question": "What is your native language? Do you speak any other languages?",
-                "required": True,
-                "follow_up": None
-            },
-            {
-                "id": "persecution_1",
-                "category": "persecution",
-                "question": "Can you describe the main reason you are seeking asylum? What happened that made you leave your country?",
-                "required": True,
-                "follow_up": "Can you provide more specific details about what happened?"
-            },
-            {
-                "id": "timeline_1",
-                "category": "timeline",
-                "question": "When did you leave your home country? What was your journey like?",
-                "required": True,
-                "follow_up": "Did you travel directly to Switzerland?"
-            },
-            {
-                "id": "family_1",
-                "category": "family",
-                "question": "Do you have any family members with you or still in your home country?",
-                "required": False,
-                "follow_up": "Are any family members in danger?"
-            },
-            {
-                "id": "previous_applications",
-                "category": "legal_history",
-                "question": "Have you applied for asylum in any other country before coming to Switzerland?",
-                "required": True,
-                "follow_up": "What was the outcome of that application?"
-            },
-            {
-                "id": "documentation",
-                "category": "evidence",
-                "question": "Do you have any documents to support your application, such as identity documents, medical records, or evidence of persecution?",
-                "required": False,
-                "follow_up": "If you don't have documents, can you explain why?"
-            }
-        ]
+        """Load structured interview questions from the question flow"""
+        return self.flow.questions
     
     def speak(self, text: str, priority: str = "normal"):
         """Convert text to speech with priority handling"""
         print(f"🗣️ Agent: {text}")
         
-        # Add pauses for better comprehension
-        if priority == "important":
-            text = f"Please listen carefully. {text}"
+        text = self._spoken_text(text, priority)
         
         try:
-            self.tts_engine.say(text)
-            self.tts_engine.runAndWait()
+            with self.tracer.span('speak', chars=len(text)) as span:
+                rendered = self._prerendered_audio(text)
+                span['prerendered'] = rendered is not None
+                if rendered:
+                    try:
+                        self.tts.play(rendered)
+                        return
+                    except Exception as e:
+                        print(f"⚠️ Pre-rendered playback failed, speaking live: {e}")
+                self.tts.say(text)
         except Exception as e:
             print(f"❌ TTS Error: {e}")
     
-    def record_audio(self, duration: Optional[int] = None) -> Optional[str]:
-        """Record audio from microphone with error handling"""
+    @staticmethod
+    def _spoken_text(text: str, priority: str = "normal") -> str:
+        """The exact text handed to the TTS backend for a prompt"""
+        # Add pauses for better comprehension
+        if priority == "important":
+            return f"Please listen carefully. {text}"
+        return text
+    
+    def script_prompts(self) -> List[str]:
+        """Every fixed string the agent speaks, as passed to the TTS backend"""
+        prompts = [
+            self._spoken_text(self.WELCOME_MESSAGE, "important"),
+            self._spoken_text(self.COMPLETION_MESSAGE, "important"),
+            self._spoken_text(self.RESUME_MESSAGE, "important"),
+            self.RECORDING_FAILED_MESSAGE,
+            self.NOT_UNDERSTOOD_MESSAGE,
+            self.REQUIRED_QUESTION_MESSAGE,
+        ]
+        if self.pipeline_mode:
+            prompts += [self.PIPELINED_NOT_UNDERSTOOD_MESSAGE, self.PIPELINED_REQUIRED_MESSAGE]
+        if self.quality_gate:
+            prompts += list(QUALITY_FEEDBACK.values())
+        for question_data in self.questions:
+            prompts.append(question_data['question'])
+            if question_data.get('follow_up'):
+                prompts.append(question_data['follow_up'])
+            if self.pipeline_mode:
+                prompts.append(f"Let's go back to an earlier question: {question_data['question']}")
+        return prompts
+    
+    def prerender(self, text: str):
+        """Start synthesising a prompt in the background so speak() can play it at once"""
+        if self.speculation_pool is None or text in self.prerendered or not hasattr(self.tts, 'render'):
+            return
+        if self.prompt_cache and self.prompt_cache.get(text):
+            return
+        self.prerendered[text] = self.speculation_pool.submit(self.tts.render, text)
+    
+    def _prerendered_audio(self, text: str) -> Optional[str]:
+        """The pre-rendered file for `text` if it is ready, else None (speak it live instead)"""
+        if self.prompt_cache:
+            path = self.prompt_cache.get(text)
+            if path:
+                return path
+        future = self.prerendered.get(text)
+        if future is None or not future.done() or future.exception() is not None:
+            return None
+        return future.result()
+    
+    def _new_speculation(self, source: PCMSource) -> Optional[PartialTranscription]:
+        """Partial transcription for one answer in speculative mode, None otherwise"""
+        if not self.speculative_mode:
+            return None
+        check = None
+        if self.quality_gate:
+            check = partial(self.quality_gate.passes, rate=source.rate, channels=source.channels)
+        return PartialTranscription(self._transcribe_segment, self.speculation_pool,
+                                    source.rate, source.channels,
+                                    segment_seconds=self.speculative_segment_seconds,
+                                    silence_threshold=self.vad_energy_threshold, check=check)
+    
+    def _transcribe_segment(self, clip: AudioClip) -> Tuple[str, Optional[str]]:
+        """
+        Transcribe one speculative segment of an answer (runs on a worker
+        thread), with the same retries, time budget and circuit as full answers
+        """
+        upload = self.upload_encoder.prepare(clip) if self.upload_encoder else clip
+        return self.resilience.call('transcribe', self._transcribe_upload, upload)
+    
+    def _transcribe_upload(self, upload: Audio) -> Tuple[str, Optional[str]]:
+        """One transcription call, with the session's language hint when hinting is on"""
+        if self.language_session:
+            return self.language_session.transcribe(self.transcriber, upload)
+        return self.transcriber.transcribe(
+            upload,
+            language=self.default_language if self.default_language != 'auto' else None
+        )
+    
+    def record_audio(self, duration: Optional[int] = None,
+                     source: Optional[PCMSource] = None) -> Optional[Audio]:
+        """
+        Record audio from microphone (or a given PCM source) with error handling.
+
+        In "vad" record mode capture stops after a stretch of trailing silence,
+        with `duration` acting as the upper bound.
+        """
         if duration is None:
             duration = self.record_duration
         
-        print(f"🎤 Recording for up to {duration} seconds... Speak now.")
+        if self.record_mode == 'vad':
+            print(f"🎤 Recording for up to {duration} seconds (stops when you pause)... Speak now.")
+        else:
+            print(f"🎤 Recording for up to {duration} seconds... Speak now.")
         
-        try:
-            audio = pyaudio.PyAudio()
-            
-            # Check if microphone is available
-            device_count = audio.get_device_count()
-            if device_count == 0:
-                print("❌ No audio devices found")
-                return None
-            
-            stream = audio.open(
-                format=pyaudio.paInt16,
-                channels=self.audio_channels,
-                rate=self.audio_rate,
-                input=True,
-                frames_per_buffer=self.audio_chunk
-            )
-            
-            frames = []
-            
-            for _ in range(0, int(self.audio_rate / self.audio_chunk * duration)):
+        with self.tracer.span('record_audio', max_seconds=duration) as span:
+            try:
+                owns_source = source is None
+                if owns_source:
+                    source = self.audio_input.open_source(self.audio_rate, self.audio_channels, self.audio_chunk)
+                
+                # Chunks are copied straight into a pooled, preallocated WAV buffer
+                buffer = self.audio_buffers.acquire(
+                    buffer_capacity(source.rate, source.channels, self.audio_chunk, duration)
+                )
+                speculation = self._new_speculation(source)
                 try:
-                    data = stream.read(self.audio_chunk, exception_on_overflow=False)
-                    frames.append(data)
-                except Exception as e:
-                    print(f"⚠️ Audio read warning: {e}")
-                    break
-            
-            stream.stop_stream()
-            stream.close()
-            audio.terminate()
-            
-            # Save to temporary file
-            temp_file = tempfile.NamedTemporaryFile(delete=False, suffix='.wav')
-            
-            with wave.open(temp_file.name, 'wb') as wf:
-                wf.setnchannels(self.audio_channels)
-                wf.setsampwidth(audio.get_sample_size(pyaudio.paInt16))
-                wf.setframerate(self.audio_rate)
-                wf.writeframes(b''.join(frames))
-            
-            print("✅ Audio recorded successfully")
-            return temp_file.name
+                    for data in iter_chunks(source, self.audio_chunk, duration, self._new_endpointer(source)):
+                        if not buffer.append(data):
+                            break
+                        if speculation:
+                            speculation.feed(data)
+                finally:
+                    if owns_source:
+                        source.close()
+                
+                clip = buffer.clip(source.rate, source.channels)
+                span['bytes'] = len(clip.wav)
+                span['audio_seconds'] = round(clip.duration, 3)
+                if not self._take_usable(clip, span):
+                    if speculation:
+                        speculation.cancel()
+                    return None
+                audio = self._finish_recording(clip)
+                if speculation:
+                    self.speculations[audio] = speculation
+                return audio
             
-        except Exception as e:
-            print(f"❌ Recording error: {e}")
+            except Exception as e:
+                print(f"❌ Recording error: {e}")
+                return None
+    
+    def _new_endpointer(self, source: PCMSource) -> Optional[SilenceEndpointer]:
+        """End-of-answer detector for "vad" record mode, None for fixed-length recording"""
+        if self.record_mode != 'vad':
             return None
+        return SilenceEndpointer(source.rate, self.audio_chunk, self.vad_silence_duration,
+                                 VoiceActivityDetector(self.vad_energy_threshold))
+    
+    def _take_key(self) -> Tuple[Optional[str], object]:
+        """Key of the take being recorded: (question id, attempt or 'follow_up')"""
+        context = self.tracer.current_context()
+        return context.get('question_id'), 'follow_up' if context.get('follow_up') else context.get('attempt')
+    
+    def _take_usable(self, clip: AudioClip, span: Dict) -> bool:
+        """
+        Run the quality gate on a finished take. A rejected take is released
+        here, without being uploaded; its metrics are kept for the answer.
+        """
+        self.last_take_problem = None
+        if not self.quality_gate:
+            return True
+        
+        metrics = self.quality_gate.check(clip.pcm, clip.rate, clip.channels)
+        span['quality'] = metrics['problem'] or 'ok'
+        question_id, attempt = self._take_key()
+        if metrics['usable']:
+            self.take_quality[(question_id, attempt)] = metrics
+            return True
+        
+        snr = f", SNR {metrics['snr_db']} dB" if metrics['snr_db'] is not None else ""
+        print(f"🎚️ Take rejected before upload ({metrics['problem']}): {metrics['speech_seconds']}s of speech, "
+              f"{metrics['clipping_ratio']:.1%} clipped{snr}")
+        self.rejected_takes.setdefault(question_id, []).append(dict(metrics, attempt=attempt))
+        self.last_take_problem = metrics['problem']
+        clip.release()
+        return False
+    
+    def _retake_message(self) -> str:
+        """What to say when a take could not be used: the quality gate's reason, if it gave one"""
+        if self.last_take_problem:
+            return self.quality_gate.feedback(self.last_take_problem)
+        return self.RECORDING_FAILED_MESSAGE
+    
+    def _finish_recording(self, clip: AudioClip) -> Audio:
+        """Hand back the clip itself in in-memory mode, otherwise a temporary WAV file path"""
+        print(f"✅ Audio recorded successfully ({clip.duration:.1f}s)")
+        if self.audio_in_memory:
+            return clip
+        
+        try:
+            with tempfile.NamedTemporaryFile(delete=False, suffix='.wav') as temp_file:
+                temp_file.write(clip.wav)
+            return temp_file.name
+        finally:
+            clip.release()
     
-    def transcribe_audio(self, audio_file_path: str) -> Tuple[Optional[str], Optional[str]]:
-        """Transcribe audio using OpenAI Whisper"""
+    def transcribe_audio(self, audio: Audio) -> Tuple[Optional[str], Optional[str]]:
+        """
+        Transcribe audio using the configured transcription backend (Whisper by default).
+        
+        `audio` is a temporary WAV file path or an in-memory AudioClip; either
+        is disposed of afterwards. With UPLOAD_PREPROCESS enabled it is first
+        downsampled, trimmed and compressed for upload.
+        """
         try:
-            with open(audio_file_path, 'rb') as audio_file:
-                transcript = self.openai_client.audio.transcriptions.create(
-                    model="whisper-1",
-                    file=audio_file,
-                    response_format="verbose_json",
-                    language=self.default_language if self.default_language != 'auto' else None
-                )
+            with self.tracer.span('transcribe_audio') as span:
+                speculation = self.speculations.pop(audio, None)
+                result = speculation.result() if speculation else None
+                if result:
+                    span['segments'] = speculation.segments
+                    text, detected_language = result
+                else:
+                    upload = self.upload_encoder.prepare(audio) if self.upload_encoder else audio
+                    span['bytes'] = len(audio_bytes(upload))
+                    text, detected_language = self.resilience.call('transcribe', self._transcribe_upload, upload)
+                span['language'] = detected_language
             
-            # Extract language information from verbose response
-            detected_language = getattr(transcript, 'language', 'unknown')
             if detected_language and detected_language != 'unknown':
-                self.detected_languages.add(detected_language)
-            
-            return transcript.text, detected_language
+                self._note_language(detected_language)
             
+            return text, detected_language
+        
+        except CallDeferred as deferred:
+            placeholder = self._queue_offline(audio)
+            if deferred.pending is not None:
+                # The abandoned attempt may still be reading the recording
+                self._dispose_when_done(audio, deferred.pending)
+                audio = None
+            return placeholder, None
         except Exception as e:
             print(f"❌ Transcription error: {e}")
             return None, None
         finally:
-            # Clean up temporary file
-            if os.path.exists(audio_file_path):
-                os.unlink(audio_file_path)
+            if audio is not None:
+                self._dispose_audio(audio)
+    
+    def _queue_offline(self, audio: Audio) -> 'DeferredTranscript':
+        """Keep an answer that could not be transcribed now; its placeholder transcript"""
+        if self.offline_queue is None:
+            with self._offline_queue_lock:
+                if self.offline_queue is None:
+                    session_id = self.journal.session_id if self.journal else new_session_id()
+                    self.offline_queue = OfflineQueue(offline_queue_directory(self.output_dir), session_id)
+        context = self.tracer.current_context()
+        path = self.offline_queue.add(audio, context.get('question_id', 'unknown'),
+                                      follow_up=context.get('follow_up', False))
+        print(f"📥 Answer kept for offline transcription: {path}")
+        return DeferredTranscript(path)
+    
+    def _note_language(self, language: str):
+        """Add a detected language to the session"""
+        self.detected_languages.add(language)
+        if self.journal:
+            self.journal.record_language(language)
+    
+    def _dispose_when_done(self, audio: Audio, pending):
+        """Dispose of a recording once an abandoned call (Future or Task) reading it has finished"""
+        pending.add_done_callback(lambda _: self._dispose_audio(audio))
+    
+    def _dispose_audio(self, audio: Audio):
+        """Delete a temporary recording, or return an in-memory clip's buffer to the pool"""
+        if isinstance(audio, AudioClip):
+            audio.release()
+        elif os.path.exists(audio):
+            os.unlink(audio)
+    
+    def close(self):
+        """Release the microphone and any other device the backends keep open"""
+        if self.stream_pool is not None:
+            self.stream_pool.shutdown(wait=False)
+        if self.language_session:
+            self.language_session.close()
+        self.resilience.close()
+        if self.speculation_pool is not None:
+            self.speculation_pool.shutdown(wait=True)
+            for future in self.prerendered.values():
+                if not future.exception() and future.result() and os.path.exists(future.result()):
+                    os.unlink(future.result())
+            self.prerendered.clear()
+        for backend in (self.audio_input, self.tts):
+            if hasattr(backend, 'close'):
+                try:
+                    backend.close()
+                except Exception as e:
+                    print(f"⚠️ Audio shutdown warning: {e}")
+        if self.journal:
+            self.journal.close()
+        if self.cassette:
+            self.cassette.save(configuration=self._configuration(),
+                               question_ids=[question['id'] for question in self.questions],
+                               outcome=session_outcome(self.interview_data))
     
     def process_response(self, transcribed_text: str, question_data: Dict) -> Dict:
         """Process response using AI to extract structured information"""
-        prompt = f"""
-        You are an AI assistant helping to process asylum interview responses. 
-        
-        Question Category: {question_data['category']}
-        Question Asked: "{question_data['question']}"
-        User Response: "{transcribed_text}"
-        
-        Please analyze this response and provide:
-        1. Key information extracted
-        2. Whether the response adequately answers the question
-        3. Any red flags or concerns
-        4. Suggested follow-up questions if needed
-        5. Confidence level (1-10) in the response quality
-        
-        Format your response as JSON with the following structure:
-        {{
-            "extracted_info": "main information from the response",
-            "adequately_answered": true/false,
-            "concerns": ["list of any concerns"],
-            "follow_up_needed": true/false,
-            "suggested_follow_up": "specific follow-up question if needed",
-            "confidence_level": 1-10,
-            "summary": "brief summary for case file"
-        }}
-        """
+        if isinstance(transcribed_text, DeferredTranscript):
+            return self._deferred_transcription_info(transcribed_text)
+        
+        processed_info = self._preclassify(transcribed_text, question_data)
+        if processed_info:
+            return processed_info
+        
+        if self.analysis_mode in ('section', 'interview'):
+            return self._check_adequacy(transcribed_text, question_data)
         
         try:
-            response = self.openai_client.chat.completions.create(
-                model="gpt-4",
-                messages=[
-                    {
-                        "role": "system", 
-                        "content": "You are an expert legal assistant specializing in asylum cases. Analyze responses carefully for completeness and credibility."
-                    },
-                    {"role": "user", "content": prompt}
-                ],
-                temperature=0.2
-            )
-            
-            return json.loads(response.choices[0].message.content)
-            
+            with self.tracer.span('process_response', chars=len(transcribed_text)) as span:
+                if self.analysis_mode == 'stream':
+                    processed_info = self._process_streaming(transcribed_text, question_data)
+                    span['early'] = processed_info.get('analysis_pending', False)
+                else:
+                    processed_info = self.resilience.call('analyse', self.analyser.analyse,
+                                                          transcribed_text, question_data)
+                span['adequate'] = bool(processed_info.get('adequately_answered'))
+                return processed_info
+        
+        except CallDeferred as e:
+            return self._deferred_analysis(transcribed_text, question_data, e)
         except Exception as e:
             print(f"❌ Response processing error: {e}")
-            return {
-                "extracted_info": transcribed_text,
-                "adequately_answered": False,
-                "concerns": [f"Processing error: {str(e)}"],
-                "follow_up_needed": True,
-                "confidence_level": 1,
-                "summary": f"Raw response: {transcribed_text}"
-            }
+            return error_processed_info(transcribed_text, e)
+    
+    def _deferred_analysis(self, transcribed_text: str, question_data: Dict, error: CallDeferred) -> Dict:
+        """
+        Local adequacy verdict for an answer the analyser could not take now;
+        the answer joins the end-of-interview batch analysis
+        """
+        processed_info = self._check_adequacy(transcribed_text, question_data)
+        processed_info['deferred'] = 'analysis'
+        processed_info['concerns'] = processed_info['concerns'] + [f"Analysis deferred: {error.reason}"]
+        return processed_info
+    
+    @staticmethod
+    def _deferred_transcription_info(transcript: 'DeferredTranscript') -> Dict:
+        """processed_info for an answer whose recording waits in the offline queue"""
+        return {
+            "extracted_info": "",
+            "adequately_answered": False,
+            "concerns": ["Transcription deferred: the recording is kept for offline processing"],
+            "follow_up_needed": False,
+            "confidence_level": 0,
+            "summary": "Answer recorded; transcription pending",
+            "deferred": "transcription",
+            "audio": transcript.path
+        }
+    
+    @staticmethod
+    def _answer_settled(processed_info: Dict) -> bool:
+        """Whether an answer needs no further attempt: adequate, or kept for offline processing"""
+        return bool(processed_info.get('adequately_answered', False)) or \
+            processed_info.get('deferred') == 'transcription'
+    
+    def _preclassify(self, transcribed_text: str, question_data: Dict) -> Optional[Dict]:
+        """processed_info from the local pre-classifier, or None when the analyser must decide"""
+        if not self.preclassifier:
+            return None
+        with self.tracer.span('preclassify', chars=len(transcribed_text)) as span:
+            processed_info = self.preclassifier.classify(transcribed_text, question_data)
+            span['skipped'] = processed_info is not None
+            return processed_info
+    
+    @staticmethod
+    def _stream_decided(fields: Dict) -> bool:
+        """Whether enough of a streamed analysis has arrived to choose the next prompt"""
+        if fields.get('adequately_answered') is True:
+            return 'follow_up_needed' in fields
+        if fields.get('adequately_answered') is False:
+            return 'suggested_follow_up' in fields
+        return False
+    
+    def _process_streaming(self, transcribed_text: str, question_data: Dict) -> Dict:
+        """
+        Stream the analysis and return as soon as the verdict fields are in.
+        
+        If generation is still running, the returned dict is marked
+        "analysis_pending" and is filled in place once the full reply arrives,
+        so the copy stored in interview_data ends up complete.
+        """
+        fields = {}
+        decided = threading.Event()
+        
+        def on_field(name, value):
+            fields[name] = value
+            if self._stream_decided(fields):
+                decided.set()
+        
+        future = self.stream_pool.submit(self.resilience.call, 'analyse', self.analyser.analyse_stream,
+                                         transcribed_text, question_data, on_field)
+        future.add_done_callback(lambda _: decided.set())
+        decided.wait()
+        
+        if future.done():
+            return future.result()
+        
+        processed_info = dict(fields, analysis_pending=True)
+        future.add_done_callback(lambda done: self._complete_stream(question_data['id'], processed_info, done))
+        self.streams_pending.append(future)
+        return processed_info
+    
+    def _complete_stream(self, question_id: str, processed_info: Dict, future):
+        """Replace an early streamed verdict with the finished analysis"""
+        if future.cancelled():
+            return
+        error = future.exception()
+        if error is not None:
+            print(f"❌ Response processing error: {error}")
+            processed_info.pop('analysis_pending', None)
+            processed_info.setdefault('concerns', []).append(f"Processing error: {str(error)}")
+        else:
+            result = future.result()
+            processed_info.clear()
+            processed_info.update(result)
+        if self.journal:
+            self.journal.record_analysis(question_id, processed_info)
+    
+    def finish_streams(self):
+        """Wait for analyses that were still generating when the interview moved on"""
+        pending, self.streams_pending = self.streams_pending, []
+        if pending:
+            wait(pending)
+    
+    def _check_adequacy(self, transcribed_text: str, question_data: Dict) -> Dict:
+        """Fast local verdict used by the retry loop until the batched analysis replaces it"""
+        with self.tracer.span('adequacy_check', chars=len(transcribed_text)) as span:
+            processed_info = self.adequacy_checker.analyse(transcribed_text, question_data)
+            processed_info['analysis_pending'] = True
+            span['adequate'] = processed_info['adequately_answered']
+            return processed_info
+    
+    def _section_ends(self, question_index: int) -> bool:
+        """True when the next question starts a new category (or there is none)"""
+        if question_index + 1 >= len(self.questions):
+            return True
+        return self.questions[question_index + 1]['category'] != self.questions[question_index]['category']
+    
+    def _take_batch(self) -> List[Tuple[str, Dict]]:
+        """(transcribed_text, question_data) for every answer awaiting batched analysis"""
+        questions = {question['id']: question for question in self.questions}
+        answers = [
+            (self.interview_data[question_id]['raw_response'], questions[question_id])
+            for question_id in self.batch_pending
+            if question_id in self.interview_data
+        ]
+        self.batch_pending = []
+        return answers
+    
+    def _apply_batch(self, answers: List[Tuple[str, Dict]], results: Dict[str, Dict]) -> List[Dict]:
+        """Store batched analysis results; return the questions that now need a follow-up"""
+        follow_ups = []
+        for _, question_data in answers:
+            processed_info = results.get(question_data['id'])
+            if not isinstance(processed_info, dict):
+                continue
+            self.interview_data[question_data['id']]['processed_info'] = processed_info
+            if self.journal:
+                self.journal.record_analysis(question_data['id'], processed_info)
+            if self._wants_follow_up(question_data):
+                follow_ups.append(question_data)
+        return follow_ups
+    
+    def analyse_batch(self):
+        """
+        Analyse all answers collected since the last batch in one request and
+        ask any follow-ups it calls for. On failure the local adequacy
+        verdicts are kept.
+        """
+        answers = self._take_batch()
+        if not answers:
+            return
+        
+        print(f"\n🔄 Analysing {len(answers)} answers together...")
+        try:
+            with self.tracer.span('analyse_batch', answers=len(answers)):
+                results = self.resilience.call('analyse', self.analyser.analyse_batch, answers)
+        except Exception as e:
+            print(f"❌ Batch analysis error: {e}")
+            return
+        
+        for question_data in self._apply_batch(answers, results):
+            self._ask_followup(question_data['follow_up'], question_data['id'])
     
     def conduct_interview(self) -> Dict:
         """Main interview flow with intelligent question management"""
         print("\n🏛️ Asylum Interview Agent Starting...")
         print("=" * 60)
         
-        # Welcome and explanation
-        welcome_msg = """Welcome to the asylum interview system. I am an AI assistant that will help collect your information for your asylum application. 
+        self.start_journal()
         
-        I will ask you several questions about your background and reasons for seeking asylum. Please speak clearly after each question. 
-        
-        You can ask me to repeat a question at any time. Let's begin."""
+        # Welcome and explanation
+        self.speak(self.RESUME_MESSAGE if self.resumed else self.WELCOME_MESSAGE, priority="important")
         
-        self.speak(welcome_msg, priority="important")
+        if self.pipeline_mode:
+            self._conduct_pipelined()
+        else:
+            i = self._open_question_from(self.flow.start)
+            while i is not None:
+                question_data = self.questions[i]
+                self.current_question_index = i
+                print(f"\n📋 Question {i+1}/{len(self.questions)} - Category: {question_data['category']}")
+                self._prefetch_next(i)
+                
+                # Ask the main question
+                success = self._ask_question_with_retry(question_data, i)
+                
+                if not success and question_data['required']:
+                    self.speak(self.REQUIRED_QUESTION_MESSAGE)
+                    # Could implement alternative questioning strategies here
+                
+                self._question_done(question_data)
+                
+                if self.analysis_mode == 'section' and self._section_ends(i):
+                    self.analyse_batch()
+                
+                i = self._next_question(i)
         
-        for i, question_data in enumerate(self.questions):
-            print(f"\n📋 Question {i+1}/{len(self.questions)} - Category: {question_data['category']}")
-            
-            # Ask the main question
-            success = self._ask_question_with_retry(question_data, i)
-            
-            if not success and question_data['required']:
-                self.speak("This is a required question. Let me try a different approach.")
-                # Could implement alternative questioning strategies here
+        # Whatever is still waiting for batched analysis (interview mode, pipelined mode)
+        # or still streaming in
+        self.analyse_batch()
+        self.finish_streams()
         
         # Interview completion
-        completion_msg = """Thank you for completing the interview. Your responses have been recorded and will be processed for your asylum application. 
-        
-        The information will be reviewed and may be used to prepare for your official interview with the authorities."""
-        
-        self.speak(completion_msg, priority="important")
+        self.speak(self.COMPLETION_MESSAGE, priority="important")
         
         return self.interview_data
     
+    def _wants_follow_up(self, question_data: Dict) -> bool:
+        """Whether the flow's follow-up rule for a question holds for its stored answer"""
+        entry = self.interview_data.get(question_data['id'])
+        if entry and entry['processed_info'].get('deferred') == 'transcription':
+            return False
+        return self.flow.wants_follow_up(self.flow.index[question_data['id']], self.interview_data)
+    
+    def _open_question_from(self, index: Optional[int]) -> Optional[int]:
+        """
+        The first question from `index` on, following the flow, that has not
+        been settled yet (questions settled before a resume are skipped)
+        """
+        for _ in range(len(self.questions)):
+            if index is None or self.questions[index]['id'] not in self.completed_questions:
+                return index
+            index = self.flow.next_index(index, self.interview_data)
+        return None
+    
+    def _next_question(self, index: int) -> Optional[int]:
+        """Index of the next question to ask after `index`, or None when the interview is over"""
+        question_id = self.questions[index]['id']
+        if self.flow_source.refresh():
+            if question_id in self.flow_source.flow.index:
+                self.flow = self.flow_source.flow
+                self.questions = self.flow.questions
+                index = self.flow.index[question_id]
+            else:
+                print(f"⚠️ Reloaded flow has no question '{question_id}'; keeping the current flow")
+        return self._open_question_from(self.flow.next_index(index, self.interview_data))
+    
+    def _prefetch_next(self, index: int):
+        """Start rendering every question that can follow this one"""
+        if not self.flow_prefetch:
+            return
+        for successor in self.flow.successors(index):
+            self.prerender(self.questions[successor]['question'])
+    
     def _ask_question_with_retry(self, question_data: Dict, question_index: int) -> bool:
         """Ask a question with retry logic and intelligent follow-up"""
         question_id = question_data['id']
+        if question_data.get('follow_up'):
+            self.prerender(question_data['follow_up'])
         
         for attempt in range(self.max_retries):
-            print(f"\n🔄 Attempt {attempt + 1}/{self.max_retries}")
+            with self.tracer.context(question_id=question_id, attempt=attempt + 1):
+                print(f"\n🔄 Attempt {attempt + 1}/{self.max_retries}")
+                
+                # Ask the question
+                self.speak(question_data['question'])
+                
+                # Record response
+                audio_file = self.record_audio()
+                if not audio_file:
+                    self.speak(self._retake_message())
+                    continue
+                
+                # Transcribe
+                print("🔄 Processing your response...")
+                transcribed_text, detected_language = self.transcribe_audio(audio_file)
+                
+                if not transcribed_text:
+                    self.speak(self.NOT_UNDERSTOOD_MESSAGE)
+                    continue
+                
+                print(f"📝 Transcribed: {transcribed_text}")
+                if detected_language:
+                    print(f"🌍 Language detected: {detected_language}")
+                
+                # Process the response
+                processed_info = self.process_response(transcribed_text, question_data)
+                
+                # Store the information
+                self._store_response(question_data, transcribed_text, detected_language,
+                                     processed_info, attempt + 1)
+                
+                # Check if response is adequate (or kept for offline processing)
+                if self._answer_settled(processed_info):
+                    print("✅ Response recorded successfully")
+                    
+                    # Ask follow-up if needed
+                    if self._wants_follow_up(question_data):
+                        self._ask_followup(question_data['follow_up'], question_id)
+                    
+                    return True
+                else:
+                    # Provide feedback and ask for clarification
+                    if attempt < self.max_retries - 1:
+                        clarification = processed_info.get('suggested_follow_up', 
+                                                         "Could you provide more details or rephrase your answer?")
+                        self.speak(f"I need a bit more information. {clarification}")
+        
+        print("⚠️ Maximum retries reached for this question")
+        return False
+    
+    def _store_response(self, question_data: Dict, transcribed_text: str,
+                        detected_language: Optional[str], processed_info: Dict, attempt: int):
+        """Record an analysed answer in the interview data"""
+        self.interview_data[question_data['id']] = {
+            "question": question_data['question'],
+            "category": question_data['category'],
+            "raw_response": transcribed_text,
+            "processed_info": processed_info,
+            "language": detected_language,
+            "timestamp": datetime.now().isoformat(),
+            "attempt": attempt
+        }
+        self._attach_take_quality(self.interview_data[question_data['id']], question_data['id'], attempt)
+        if self.journal:
+            self.journal.record_answer(question_data['id'], self.interview_data[question_data['id']])
+        if processed_info.get('analysis_pending') and question_data['id'] not in self.batch_pending \
+                and (self.analysis_mode in ('section', 'interview') or processed_info.get('deferred') == 'analysis'):
+            self.batch_pending.append(question_data['id'])
+    
+    def _attach_take_quality(self, entry: Dict, question_id: str, attempt: int):
+        """Add the quality metrics of the answer's take, and of any rejected takes, to its entry"""
+        quality = self.take_quality.pop((question_id, attempt), None)
+        if quality:
+            entry['audio_quality'] = quality
+        rejected = [take for take in self.rejected_takes.get(question_id, []) if take['attempt'] != 'follow_up']
+        if rejected:
+            entry['rejected_takes'] = rejected
+    
+    def _analyse_answer(self, audio_file: Audio, question_data: Dict,
+                        attempt: int = 1) -> Tuple[Optional[str], Optional[str], Optional[Dict]]:
+        """Transcribe and analyse a recorded answer; safe to run on a worker thread"""
+        with self.tracer.context(question_id=question_data['id'], attempt=attempt):
+            transcribed_text, detected_language = self.transcribe_audio(audio_file)
+            if not transcribed_text:
+                return None, detected_language, None
             
-            # Ask the question
-            self.speak(question_data['question'])
+            return transcribed_text, detected_language, self.process_response(transcribed_text, question_data)
+    
+    def _conduct_pipelined(self):
+        """
+        Ask questions back to back while earlier answers are transcribed and
+        analysed in the background.
+        
+        Retries and follow-ups for a question are handled as soon as its
+        result arrives; interview_data is rebuilt in question order at the end.
+        The flow is walked as in sequential mode, but only a question with
+        branches waits for its answer to settle before the next one is
+        chosen. The flow file is not reloaded mid-interview in this mode.
+        """
+        pending = {}  # question index -> (future, attempt)
+        
+        with ThreadPoolExecutor(max_workers=self.pipeline_workers) as pool:
+            i = self._open_question_from(self.flow.start)
+            while i is not None:
+                question_data = self.questions[i]
+                self.current_question_index = i
+                print(f"\n📋 Question {i+1}/{len(self.questions)} - Category: {question_data['category']}")
+                self._record_and_submit(pool, pending, i, 1, question_data['question'])
+                
+                # Settle any earlier answers that finished while this one was asked
+                self._reconcile_pipelined(pool, pending, block=False)
+                
+                # Where a branch depends on this answer, settle it before moving on
+                if self.flow.has_branches(i):
+                    while i in pending:
+                        self._reconcile_pipelined(pool, pending, block=True)
+                
+                i = self._open_question_from(self.flow.next_index(i, self.interview_data))
             
-            # Record response
-            audio_file = self.record_audio()
-            if not audio_file:
-                self.speak("I couldn't record your response. Let me try again.")
-                continue
+            while pending:
+                self._reconcile_pipelined(pool, pending, block=True)
+        
+        # Deterministic output order regardless of completion order
+        self.interview_data = {
+            question['id']: self.interview_data[question['id']]
+            for question in self.questions
+            if question['id'] in self.interview_data
+        }
+    
+    def _record_and_submit(self, pool: ThreadPoolExecutor, pending: Dict,
+                           question_index: int, attempt: int, prompt: str):
+        """Speak a prompt, record the answer and queue it for analysis"""
+        question_data = self.questions[question_index]
+        if question_data.get('follow_up'):
+            self.prerender(question_data['follow_up'])
+        
+        while attempt <= self.max_retries:
+            print(f"\n🔄 Attempt {attempt}/{self.max_retries}")
+            with self.tracer.context(question_id=question_data['id'], attempt=attempt):
+                self.speak(prompt)
+                audio_file = self.record_audio()
             
-            # Transcribe
-            print("🔄 Processing your response...")
-            transcribed_text, detected_language = self.transcribe_audio(audio_file)
+            if audio_file:
+                future = pool.submit(self._analyse_answer, audio_file, question_data, attempt)
+                pending[question_index] = (future, attempt)
+                return
             
-            if not transcribed_text:
-                self.speak("I couldn't understand your response. Please try again.")
+            self.speak(self._retake_message())
+            prompt = question_data['question']
+            attempt += 1
+        
+        self._give_up_pipelined(question_data)
+    
+    def _reconcile_pipelined(self, pool: ThreadPoolExecutor, pending: Dict, block: bool):
+        """Handle finished analyses in question order, re-asking or following up as needed"""
+        if block:
+            wait([future for future, _ in pending.values()], return_when=FIRST_COMPLETED)
+        
+        for question_index in sorted(pending):
+            future, attempt = pending[question_index]
+            if not future.done():
                 continue
+            del pending[question_index]
             
-            print(f"📝 Transcribed: {transcribed_text}")
-            if detected_language:
-                print(f"🌍 Language detected: {detected_language}")
+            question_data = self.questions[question_index]
+            transcribed_text, detected_language, processed_info = future.result()
+            can_retry = attempt < self.max_retries
             
-            # Process the response
-            processed_info = self.process_response(transcribed_text, question_data)
+            if not transcribed_text:
+                if can_retry:
+                    self.speak(self.PIPELINED_NOT_UNDERSTOOD_MESSAGE)
+                    self._record_and_submit(pool, pending, question_index, attempt + 1,
+                                            question_data['question'])
+                else:
+                    self._give_up_pipelined(question_data)
+                continue
             
-            # Store the information
-            self.interview_data[question_id] = {
-                "question": question_data['question'],
-                "category": question_data['category'],
-                "raw_response": transcribed_text,
-                "processed_info": processed_info,
-                "language": detected_language,
-                "timestamp": datetime.now().isoformat(),
-                "attempt": attempt + 1
-            }
+            print(f"📝 Transcribed ({question_data['id']}): {transcribed_text}")
+            self._store_response(question_data, transcribed_text, detected_language,
+                                 processed_info, attempt)
             
-            # Check if response is adequate
-            if processed_info.get('adequately_answered', False):
-                print("✅ Response recorded successfully")
-                
-                # Ask follow-up if needed
-                if processed_info.get('follow_up_needed') and question_data.get('follow_up'):
-                    self._ask_followup(question_data['follow_up'], question_id)
-                
-                return True
+            if self._answer_settled(processed_info):
+                print(f"✅ Response to {question_data['id']} recorded successfully")
+                if self._wants_follow_up(question_data):
+                    self._ask_followup(question_data['follow_up'], question_data['id'])
+                self._question_done(question_data)
+            elif can_retry:
+                clarification = processed_info.get('suggested_follow_up',
+                                                   "Could you provide more details or rephrase your answer?")
+                self.speak(f"Let's go back to an earlier question: {question_data['question']}")
+                self._record_and_submit(pool, pending, question_index, attempt + 1,
+                                        f"I need a bit more information. {clarification}")
             else:
-                # Provide feedback and ask for clarification
-                if attempt < self.max_retries - 1:
-                    clarification = processed_info.get('suggested_follow_up', 
-                                                     "Could you provide more details or rephrase your answer?")
-                    self.speak(f"I need a bit more information. {clarification}")
-        
-        print("⚠️ Maximum retries reached for this question")
-        return False
+                self._give_up_pipelined(question_data)
+    
+    def _give_up_pipelined(self, question_data: Dict):
+        """Report a question that could not be answered within the retry limit"""
+        print(f"⚠️ Maximum retries reached for {question_data['id']}")
+        if question_data['required']:
+            self.speak(self.PIPELINED_REQUIRED_MESSAGE)
+        self._question_done(question_data)
+    
+    def _question_done(self, question_data: Dict):
+        """Mark a question as settled so a resumed session does not ask it again"""
+        self.completed_questions.add(question_data['id'])
+        if self.journal:
+            self.journal.record_question_done(question_data['id'])
     
     def _ask_followup(self, follow_up_question: str, parent_question_id: str):
         """Ask a follow-up question"""
-        print(f"\n🔍 Follow-up question:")
-        self.speak(follow_up_question)
+        print("\n🔍 Follow-up question:")
+        with self.tracer.context(question_id=parent_question_id, follow_up=True), \
+                self.tracer.span('follow_up'):
+            self.speak(follow_up_question)
+            
+            audio_file = self.record_audio(duration=10)  # Shorter duration for follow-ups
+            if audio_file:
+                transcribed_text, detected_language = self.transcribe_audio(audio_file)
+                if transcribed_text:
+                    self._store_follow_up(parent_question_id, follow_up_question,
+                                          transcribed_text, detected_language)
+                    print(f"📝 Follow-up recorded: {transcribed_text}")
+    
+    def _store_follow_up(self, parent_question_id: str, follow_up_question: str,
+                         transcribed_text: str, detected_language: Optional[str]):
+        """Record a follow-up answer under its parent question"""
+        if parent_question_id not in self.interview_data:
+            return
+        self.interview_data[parent_question_id]['follow_up'] = {
+            "question": follow_up_question,
+            "response": transcribed_text,
+            "language": detected_language,
+            "timestamp": datetime.now().isoformat()
+        }
+        if isinstance(transcribed_text, DeferredTranscript):
+            self.interview_data[parent_question_id]['follow_up'].update(deferred='transcription',
+                                                                         audio=transcribed_text.path)
+        quality = self.take_quality.pop((parent_question_id, 'follow_up'), None)
+        if quality:
+            self.interview_data[parent_question_id]['follow_up']['audio_quality'] = quality
+        if self.journal:
+            self.journal.record_follow_up(parent_question_id, self.interview_data[parent_question_id]['follow_up'])
+    
+    def _configuration(self) -> Dict:
+        """Settings recorded in the saved interview metadata"""
+        return {
+            "max_retries": self.max_retries,
+            "record_duration": self.record_duration,
+            "record_mode": self.record_mode,
+            "analysis_mode": self.analysis_mode,
+            "default_language": self.default_language
+        }
+    
+    def start_journal(self):
+        """Open a new journal for this session unless journalling is off or one is already open"""
+        if self.journal is not None or not journal_enabled():
+            return
+        session_id = new_session_id()
+        path = os.path.join(journal_directory(self.output_dir), f"{self.file_prefix}{session_id}.jsonl")
+        self.journal = SessionJournal(path)
+        self.journal.start(session_id, [question['id'] for question in self.questions], self._configuration())
+    
+    def resume(self, journal_path: str):
+        """
+        Rebuild interview state from a journal and keep appending to it.
         
-        audio_file = self.record_audio(duration=10)  # Shorter duration for follow-ups
-        if audio_file:
-            transcribed_text, detected_language = self.transcribe_audio(audio_file)
-            if transcribed_text:
-                # Store follow-up response
-                if parent_question_id in self.interview_data:
-                    self.interview_data[parent_question_id]['follow_up'] = {
-                        "question": follow_up_question,
-                        "response": transcribed_text,
-                        "language": detected_language,
-                        "timestamp": datetime.now().isoformat()
-                    }
-                print(f"📝 Follow-up recorded: {transcribed_text}")
+        Answered questions are not asked again; the interview continues at the
+        first question the journal does not mark as done. Answers whose batched
+        or streamed analysis never arrived are queued for batch analysis.
+        """
+        journal = SessionJournal(journal_path)
+        if not journal.session:
+            journal.close()
+            raise ValueError(f"{journal_path} is not a session journal")
+        
+        self.interview_data = copy.deepcopy(journal.ordered_interview_data())
+        self.detected_languages = set(journal.detected_languages)
+        self.completed_questions = set(journal.completed)
+        next_question = self._open_question_from(self.flow.start)
+        self.current_question_index = len(self.questions) if next_question is None else next_question
+        self.batch_pending = [
+            question_id for question_id, entry in self.interview_data.items()
+            if entry.get('processed_info', {}).get('analysis_pending')
+        ]
+        
+        journal.start(journal.session_id, [question['id'] for question in self.questions], self._configuration())
+        self.journal = journal
+        self.resumed = True
     
     def save_interview_data(self, filename: Optional[str] = None) -> str:
         """Save comprehensive interview data"""
@@ -448,27 +1141,24 @@ class AsylumInterviewAgent:
         
         filepath = os.path.join(self.output_dir, filename)
         
-        # Add metadata
-        complete_data = {
-            "interview_metadata": {
-                "timestamp": datetime.now().isoformat(),
-                "total_questions": len(self.questions),
-                "answered_questions": len(self.interview_data),
-                "detected_languages": list(self.detected_languages),
-                "agent_version": "1.0",
-                "configuration": {
-                    "max_retries": self.max_retries,
-                    "record_duration": self.record_duration,
-                    "default_language": self.default_language
-                }
-            },
-            "interview_data": self.interview_data
-        }
+        # Add metadata; a journalled session is written straight from its journal
+        if self.journal:
+            complete_data = self.journal.document(len(self.questions))
+        else:
+            complete_data = interview_document(self.interview_data, self.detected_languages,
+                                               len(self.questions), self._configuration())
         
         with open(filepath, 'w', encoding='utf-8') as f:
             json.dump(complete_data, f, indent=2, ensure_ascii=False)
         
         print(f"💾 Complete interview data saved to: {filepath}")
+        if self.journal:
+            self.journal.record_complete(filepath)
+        
+        if self.trace_format != 'none' and self.tracer.spans:
+            trace_path = self.tracer.export(filepath, self.trace_format)
+            print(f"⏱️ Stage timing trace saved to: {trace_path}")
+        
         return filepath
     
     def generate_summary_report(self) -> str:
@@ -477,26 +1167,32 @@ class AsylumInterviewAgent:
         report_filename = f"{self.file_prefix}summary_{timestamp}.txt"
         report_filepath = os.path.join(self.output_dir, report_filename)
         
+        lines = [
+            "ASYLUM INTERVIEW SUMMARY REPORT\n",
+            "=" * 50 + "\n\n",
+            f"Interview Date: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n",
+            f"Total Questions: {len(self.questions)}\n",
+            f"Questions Answered: {len(self.interview_data)}\n",
+            f"Languages Detected: {', '.join(self.detected_languages) if self.detected_languages else 'None detected'}\n\n",
+            answer_blocks(self.interview_data),
+        ]
+        
+        if self.tracer.spans:
+            lines.append("STAGE TIMINGS (ms)\n")
+            lines.append(f"{'stage':<20}{'count':>7}{'p50':>10}{'p95':>10}{'total':>11}\n")
+            for stage, timing in self.tracer.stage_summary().items():
+                lines.append(f"{stage:<20}{timing['count']:>7}{timing['p50_ms']:>10.0f}"
+                             f"{timing['p95_ms']:>10.0f}{timing['total_ms']:>11.0f}\n")
+            lines.append(f"Retries: {self.tracer.retry_count()}\n")
+        
+        if self.preclassifier:
+            stats = self.preclassifier.stats()
+            lines.append(f"\nAnswers decided locally: {stats['skipped']}/{stats['checked']} "
+                         f"({stats['skip_rate']:.0%} skipped the analyser)\n")
+        
+        # One buffered write instead of a write per line
         with open(report_filepath, 'w', encoding='utf-8') as f:
-            f.write("ASYLUM INTERVIEW SUMMARY REPORT\n")
-            f.write("=" * 50 + "\n\n")
-            f.write(f"Interview Date: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n")
-            f.write(f"Total Questions: {len(self.questions)}\n")
-            f.write(f"Questions Answered: {len(self.interview_data)}\n")
-            f.write(f"Languages Detected: {', '.join(self.detected_languages) if self.detected_languages else 'None detected'}\n\n")
-            
-            for question_id, data in self.interview_data.items():
-                f.write(f"QUESTION: {data['question']}\n")
-                f.write(f"CATEGORY: {data['category']}\n")
-                f.write(f"RESPONSE: {data['raw_response']}\n")
-                
-                if 'processed_info' in data and 'summary' in data['processed_info']:
-                    f.write(f"SUMMARY: {data['processed_info']['summary']}\n")
-                
-                if 'follow_up' in data:
-                    f.write(f"FOLLOW-UP: {data['follow_up']['response']}\n")
-                
-                f.write("-" * 30 + "\n\n")
+            f.write("".join(lines))
         
         print(f"📄 Summary report saved to: {report_filepath}")
         return report_filepath
@@ -507,17 +1203,35 @@ def main():
     # Load environment variables first
     load_dotenv()
     
-    # Check if OpenAI API key is configured
-    if not os.getenv('OPENAI_API_KEY'):
+    parser = argparse.ArgumentParser(description="Run the asylum interview agent")
+    parser.add_argument('--resume', nargs='?', const='latest', metavar='JOURNAL',
+                        help="Continue an interrupted session from its journal "
+                             "(default: the most recent unfinished one)")
+    args = parser.parse_args()
+    
+    # Check if OpenAI API key is configured (not needed for the offline backend)
+    if os.getenv('INTERVIEW_BACKEND', 'openai').lower() != 'local' and not os.getenv('OPENAI_API_KEY'):
         print("❌ OpenAI API key not found!")
         print("Please set your OPENAI_API_KEY in the .env file")
         print("Copy .env.sample to .env and add your API key")
         return
     
+    agent = None
     try:
         # Initialize the agent
         agent = AsylumInterviewAgent()
         
+        if args.resume:
+            journal_path = args.resume
+            if journal_path == 'latest':
+                journal_path = latest_unfinished_journal(journal_directory(agent.output_dir))
+            if not journal_path:
+                print("❌ No unfinished interview session to resume")
+                return
+            agent.resume(journal_path)
+            print(f"↩️ Resuming session {agent.journal.session_id}: {len(agent.interview_data)} answers recovered, "
+                  f"continuing at question {agent.current_question_index + 1}/{len(agent.questions)}")
+        
         # Conduct the interview
         print("\n🚀 Starting asylum interview process...")
         interview_results = agent.conduct_interview()
@@ -526,12 +1240,53 @@ def main():
         saved_file = agent.save_interview_data()
         summary_file = agent.generate_summary_report()
         
+        # Make the session searchable straight away (python archive.py query ...)
+        archive = archive_from_env(agent.output_dir)
+        if archive:
+            archive.ingest_file(saved_file, agent.file_prefix)
+            archive.close()
+        
         # Display final summary
         print("\n" + "=" * 60)
         print("📊 INTERVIEW COMPLETED")
         print("=" * 60)
         print(f"✅ Questions answered: {len(interview_results)}/{len(agent.questions)}")
         print(f"🌍 Languages detected: {', '.join(agent.detected_languages) if agent.detected_languages else 'None'}")
+        if agent.upload_encoder:
+            upload = agent.upload_encoder.summary()
+            print(f"📦 Upload: {upload['bytes_saved'] / 1024:.0f} KB saved over {upload['answers']} answers "
+                  f"({upload['encode_ms_total']:.0f} ms encoding)")
+        if agent.result_cache:
+            stats = agent.result_cache.stats()
+            print(f"🗄️ Cache: {stats['hits']} hits, {stats['misses']} misses ({stats['hit_rate']:.0%} hit rate)")
+        if agent.language_session:
+            stats = agent.language_session.stats()
+            print(f"🗣️ Language hints: {stats['hinted']} hinted, {stats['auto']} auto-detected, "
+                  f"{stats['fallbacks']} fallbacks, {stats['races']} races")
+        if agent.preclassifier:
+            stats = agent.preclassifier.stats()
+            print(f"⚡ Pre-classifier: {stats['skipped']}/{stats['checked']} answers decided locally "
+                  f"({stats['skip_rate']:.0%} skip rate)")
+        if agent.quality_gate:
+            stats = agent.quality_gate.stats()
+            print(f"🎚️ Audio check: {stats['rejected']}/{stats['checked']} takes rejected before upload "
+                  f"({stats['by_problem']['silent']} silent, {stats['by_problem']['clipped']} clipped, "
+                  f"{stats['by_problem']['noisy']} noisy; {stats['check_ms_avg']:.1f} ms per take"
+                  f"{'' if stats['numpy'] else ', pure Python: pip install numpy'})")
+        stats = agent.resilience.stats()
+        if stats['retries'] or stats['deferred']:
+            print(f"🛟 Service calls: {stats['retries']} retried ({stats['rate_limited']} rate limited), "
+                  f"{stats['timeouts']} timed out, {stats['deferred']} deferred, "
+                  f"{stats['circuits_opened']} circuit openings")
+        pool_stats = used_pool_stats()
+        if pool_stats:
+            print(f"🔗 HTTP pool: {pool_stats['requests']} requests over {pool_stats['connections_opened']} connections "
+                  f"({pool_stats['reuse_rate']:.0%} reused, {pool_stats['tls_handshakes']} TLS handshakes), "
+                  f"{pool_stats['rate_limited']} rate limited, {pool_stats['cooldown_waited_s']:.1f}s cooling down")
+        if agent.offline_queue:
+            print(f"📥 {agent.offline_queue.count} recordings kept for offline processing in "
+                  f"{agent.offline_queue.directory} (process later with: python batch_process.py "
+                  f"{agent.offline_queue.directory})")
         print(f"💾 Data saved to: {saved_file}")
         print(f"📄 Summary saved to: {summary_file}")
         print("\n🎯 Next steps:")
@@ -541,9 +1296,15 @@ def main():
         
     except KeyboardInterrupt:
         print("\n\n⏹️ Interview interrupted by user")
+        if agent is not None and agent.journal:
+            print(f"📓 Progress is kept in {agent.journal.path}; continue with: python voice_test.py --resume")
     except Exception as e:
         print(f"\n❌ System error: {e}")
         print("Please check your configuration and try again")
+    finally:
+        # Stop the input stream and terminate PortAudio even after Ctrl+C
+        if agent is not None:
+            agent.close()
 
 if __name__ == "__main__":
     main()
\ No newline at end of file